@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.sql import insert
+
+from src.models.environ import Environ
+from src.models.file import FileORM
+from src.models.file_tree import FileTreeORM
+from src.models.metadata import MetadataORM
+from src.sql.directory_stat_crad import DirectoryStatCRAD
+from src.sql.file_crad import FileCRAD
+from src.sql.migration import migrate
+from src.sql.sql import SQLBase
+
+
+def node(path: Path, parent: Optional[dict], metadata_id: str, directory: bool):
+    return {
+        "id": str(uuid.uuid4()),
+        "parent_id": parent["id"] if parent else None,
+        "metadata_id": metadata_id,
+        "directory": directory,
+        "filename": str(path),
+        "pearent": str(path.parent),
+        "created_at": datetime.now(),
+    }
+
+
+async def build(session: AsyncSession, root: Path, files: int, width: int = 1000):
+    metadata = {
+        "id": str(uuid.uuid4()),
+        "suffix": ".bin",
+        "size": 1024,
+        "data": {},
+        "video": False,
+        "image": False,
+        "internet_media_type": "application/octet-stream",
+        "created_at": datetime.now(),
+    }
+    await session.execute(insert(MetadataORM), [metadata])
+
+    base = node(root.parent, None, metadata["id"], True)
+    top = node(root, base, metadata["id"], True)
+    rows = [base, top]
+    tree = [(base, base, 0), (top, top, 0), (base, top, 1)]
+    for i in range(0, files, width):
+        sub = node(root.joinpath(f"{i // width:04d}"), top, metadata["id"], True)
+        rows.append(sub)
+        tree += [(sub, sub, 0), (top, sub, 1), (base, sub, 2)]
+        for j in range(i, min(i + width, files)):
+            path = Path(sub["filename"]).joinpath(f"{j:06d}.bin")
+            leaf = node(path, sub, metadata["id"], False)
+            rows.append(leaf)
+            tree += [(leaf, leaf, 0), (sub, leaf, 1), (top, leaf, 2), (base, leaf, 3)]
+
+    for i in range(0, len(rows), 5000):
+        await session.execute(insert(FileORM), rows[i : i + 5000])
+    tree_rows = [
+        {"ancestor_id": a["id"], "descendant_id": d["id"], "depth": depth}
+        for a, d, depth in tree
+    ]
+    for i in range(0, len(tree_rows), 5000):
+        await session.execute(insert(FileTreeORM), tree_rows[i : i + 5000])
+    await DirectoryStatCRAD(session).repair()
+    await session.commit()
+
+
+async def main(files: int):
+    env = Environ()
+    engine = create_async_engine(f"{env.DB_URL}_benchmark")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLBase.metadata.drop_all)
+        await conn.run_sync(SQLBase.metadata.create_all)
+        await conn.run_sync(migrate)
+
+    root = Path("benchmark/data")
+    async with AsyncSession(engine) as session:
+        await build(session, root.joinpath("src"), files)
+
+    for name, src, dst in [
+        ("move", root.joinpath("src"), root.joinpath("dst")),
+        ("copy", root.joinpath("dst"), root.joinpath("copy")),
+    ]:
+        async with AsyncSession(engine) as session:
+            start = time.perf_counter()
+            await getattr(FileCRAD(session), name)(src, dst)
+            await session.commit()
+            print(f"{name} {files} files: {time.perf_counter() - start:.3f}s")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000))
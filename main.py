@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+from importlib.util import find_spec
 from pathlib import Path
 
 import uvicorn
@@ -28,7 +29,7 @@ async def lifespan(app: FastAPI):
 async def test_lifespan(app: FastAPI):
     FileResolver.set_temp()
     await LoggingDepends.init(path=Path("logs/testing.log"))
-    await SQLDepends.test(drop_all=True)
+    await SQLDepends.test(drop_all=env.WORKERS == 1)
     await Job.start()
     yield
     await Job.stop()
@@ -62,5 +63,11 @@ if __name__ == "__main__":
         #     "version": 1,
         #     "disable_existing_loggers": False,
         # },
-        reload=(not env.TESTING),
+        reload=(not env.TESTING and env.WORKERS == 1),
+        workers=env.WORKERS,
+        http=(
+            "src.util.sendfile_protocol:SendfileProtocol"
+            if find_spec("httptools")
+            else "auto"
+        ),
     )
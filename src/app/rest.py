@@ -1,6 +1,7 @@
+import uuid
 from logging import Logger
 from pathlib import Path
-from typing import Annotated, Union
+from typing import Annotated, Optional, Union
 
 from aiofiles import open
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
@@ -9,14 +10,19 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 
+from src.depends.cluster import Cluster
 from src.depends.logging import LoggingDepends
 from src.depends.sql import SQLDepends
+from src.job.task_queue import TaskQueue
 from src.models.file import FileModel
 from src.models.response import DirectoryResponseModel, FileResponseModel
+from src.models.upload import UploadStatusModel
 from src.service.api import FileService
+from src.service.thumbnail import ThumbnailCache
 from src.sql.file_crad import FileCRAD
+from src.sql.path_cache import PathCache
+from src.sql.path_lock import PathLock
 from src.util.file import FileResolver
-from src.util.stream import Stream
 
 router = APIRouter()
 
@@ -34,6 +40,14 @@ class ResponseStatus(BaseModel):
     status: str
 
 
+class StatsResponse(BaseModel):
+    cluster: dict
+    path_cache: dict
+    path_lock: dict
+    task_queue: dict
+    thumbnail: dict
+
+
 class FileServiceRest(FileService):
     def success_response(self):
         return ResponseStatus(status="success")
@@ -41,6 +55,9 @@ class FileServiceRest(FileService):
     def data_response(self, data: BaseModel):
         return data
 
+    def bad_request_response(self):
+        raise HTTPException(status_code=400)
+
     def conflict_response(self):
         raise HTTPException(status_code=409)
 
@@ -50,6 +67,9 @@ class FileServiceRest(FileService):
     def not_found_response(self):
         raise HTTPException(status_code=404)
 
+    def payload_too_large_response(self):
+        raise HTTPException(status_code=413)
+
     async def get_base(self, href: Path, path: Path) -> list:
         return []
 
@@ -61,30 +81,20 @@ class FileServiceRest(FileService):
         file.filename = file.filename.relative_to(FileResolver.base_path)
         file.pearent = file.pearent.relative_to(FileResolver.base_path)
 
-    async def get_dir(self, file_path: Path):
-        dir = await FileCRAD(self.session).getdir(file_path)
+    async def get_dir(self, dir: DirectoryResponseModel):
         res = []
-        for file in await FileCRAD(self.session).listdir(file_path):
-            if file.directory:
-                data = await FileCRAD(self.session).getdir(file.filename)
-                self.replace(data.file)
-                res.append(data)
-            else:
-                data = await FileCRAD(self.session).getfile(file.filename)
-                self.replace(data.file)
-                res.append(data)
+        for data in await FileCRAD(self.session).listdir_detailed(dir.file.filename):
+            self.replace(data.file)
+            res.append(data)
         model = FileResponse(dir=dir, child=res)
         return self.data_response(model)
 
-    async def get_file(self, file_path: Path):
+    async def get_file(self, file: FileResponseModel):
         return self.not_found_response()
 
 
-def stream(file: UploadFile):
-    while True:
-        chunk = file.file.read(1024)
-        if not chunk:
-            break
+async def stream(file: UploadFile, chunk_size: int = 1024 * 1024):
+    while chunk := await file.read(chunk_size):
         yield chunk
 
 
@@ -120,8 +130,117 @@ async def post_upload(
     session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
 ):
     path = FileResolver.base_path.joinpath(file_path)
-    stream = Stream.read(file, 0, None)
-    return await FileServiceRest(request, logger, session).upload(path, stream)
+    return await FileServiceRest(request, logger, session).upload(
+        path, stream(file), file.size
+    )
+
+
+@router.post(
+    "/ingest/{file_path:path}",
+    operation_id="post_ingest",
+    tags=["upload"],
+    description="extract tar/zip archive",
+    responses={200: {"model": ResponseStatus}},
+)
+async def post_ingest(
+    file_path: str,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+):
+    path = FileResolver.base_path.joinpath(file_path)
+    size = request.headers.get("Content-Length")
+    return await FileServiceRest(request, logger, session).ingest(
+        path, request.stream(), int(size) if size and size.isdigit() else None
+    )
+
+
+@router.post(
+    "/resumable/create/{file_path:path}",
+    operation_id="post_resumable_create",
+    tags=["upload"],
+    description="create resumable upload",
+    responses={200: {"model": UploadStatusModel}},
+)
+async def post_resumable_create(
+    file_path: str,
+    size: int,
+    chunk_size: int,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+):
+    path = FileResolver.base_path.joinpath(file_path)
+    return await FileServiceRest(request, logger, session).create_upload(
+        path, size, chunk_size
+    )
+
+
+@router.get(
+    "/resumable/{upload_id}",
+    operation_id="get_resumable",
+    tags=["upload"],
+    description="resumable upload status",
+    responses={200: {"model": UploadStatusModel}},
+)
+async def get_resumable(
+    upload_id: uuid.UUID,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+):
+    return await FileServiceRest(request, logger, session).upload_status(upload_id)
+
+
+@router.put(
+    "/resumable/{upload_id}/{number}",
+    operation_id="put_resumable",
+    tags=["upload"],
+    description="append resumable upload chunk",
+    responses={200: {"model": UploadStatusModel}},
+)
+async def put_resumable(
+    upload_id: uuid.UUID,
+    number: int,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+):
+    return await FileServiceRest(request, logger, session).append_upload(
+        upload_id, number, request.stream()
+    )
+
+
+@router.post(
+    "/resumable/{upload_id}/finalize",
+    operation_id="post_resumable_finalize",
+    tags=["upload"],
+    description="finalize resumable upload",
+    responses={200: {"model": ResponseStatus}},
+)
+async def post_resumable_finalize(
+    upload_id: uuid.UUID,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+):
+    return await FileServiceRest(request, logger, session).finalize_upload(upload_id)
+
+
+@router.delete(
+    "/resumable/{upload_id}",
+    operation_id="delete_resumable",
+    tags=["upload"],
+    description="abort resumable upload",
+    responses={200: {"model": ResponseStatus}},
+)
+async def delete_resumable(
+    upload_id: uuid.UUID,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+):
+    return await FileServiceRest(request, logger, session).abort_upload(upload_id)
 
 
 @router.get(
@@ -136,9 +255,29 @@ async def get_download(
     request: Request,
     logger: Annotated[Logger, Depends(LoggingDepends.depends)],
     session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+    archive: Optional[str] = None,
+):
+    path = FileResolver.base_path.joinpath(file_path)
+    return await FileServiceRest(request, logger, session).download(path, archive)
+
+
+@router.get(
+    "/thumbnail/{file_path:path}",
+    operation_id="get_thumbnail",
+    tags=["download"],
+    description="thumbnail",
+    responses={200: {"model": bytes}},
+)
+async def get_thumbnail(
+    file_path: str,
+    request: Request,
+    logger: Annotated[Logger, Depends(LoggingDepends.depends)],
+    session: Annotated[AsyncSession, Depends(SQLDepends.depends)],
+    size: int = 256,
+    format: str = "webp",
 ):
     path = FileResolver.base_path.joinpath(file_path)
-    return await FileServiceRest(request, logger, session).download(path)
+    return await FileServiceRest(request, logger, session).thumbnail(path, size, format)
 
 
 @router.delete(
@@ -211,3 +350,20 @@ async def post_copy(
     path = FileResolver.base_path.joinpath(file_path)
     copy = FileResolver.base_path.joinpath(copy_path)
     return await FileServiceRest(request, logger, session).copy(path, copy)
+
+
+@router.get(
+    "/stats",
+    operation_id="get_stats",
+    tags=["stats"],
+    description="stats",
+    responses={200: {"model": StatsResponse}},
+)
+async def get_stats():
+    return StatsResponse(
+        cluster=Cluster.stats(),
+        path_cache=PathCache.stats(),
+        path_lock=PathLock.stats(),
+        task_queue=TaskQueue.stats(),
+        thumbnail=ThumbnailCache.stats(),
+    )
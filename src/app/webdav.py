@@ -1,30 +1,39 @@
-from hashlib import md5
+from datetime import datetime, timedelta
 from logging import Logger
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 from urllib.parse import quote
+from xml.etree.ElementTree import ParseError
 
 from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 
 from src.depends.logging import LoggingDepends
 from src.depends.sql import SQLDepends
-from src.models.file import FileModel, FileORM
+from src.models.environ import Environ
+from src.models.file_lock import FileLockModel
+from src.models.propfind import PropFindModel
 from src.models.response import DirectoryResponseModel, FileResponseModel
 from src.service.api import FileService
 from src.sql.file_crad import FileCRAD
+from src.sql.file_lock_crad import FileLockCRAD, FileLockTransaction
+from src.util.dav_header import DAVHeader
+from src.util.etag import ETag
 from src.util.file import FileResolver
 from src.util.rfc1123 import RFC1123
-from src.util.xml import to_webdav
+from src.util.xml import from_lockinfo, from_propfind, to_webdav, to_webdav_stream
 
 router = APIRouter()
 
 
 class FileServiceWebDav(FileService):
+    propfind = PropFindModel()
+    lock_timeout = Environ().WEBDAV_LOCK_TIMEOUT
+
     def success_response(self):
         return Response(media_type="application/octet-stream")
 
@@ -38,6 +47,15 @@ class FileServiceWebDav(FileService):
         content = to_webdav(data)
         return Response(content=content, media_type="application/xml", status_code=207)
 
+    def stream_response(self, data):
+        content = to_webdav_stream(data)
+        return StreamingResponse(
+            content=content, media_type="application/xml", status_code=207
+        )
+
+    def bad_request_response(self):
+        return Response(media_type="application/octet-stream", status_code=400)
+
     def conflict_response(self):
         return Response(media_type="application/octet-stream", status_code=409)
 
@@ -47,72 +65,84 @@ class FileServiceWebDav(FileService):
     def not_found_response(self):
         return Response(media_type="application/octet-stream", status_code=404)
 
+    def get_href(self, file: Path):
+        baseurl = FileResolver.get_base_url(
+            Path(self.request.url.path), Path(self.request.path_params["file_path"])
+        )
+        return baseurl.joinpath(file.relative_to(FileResolver.base_path))
+
+    def to_response(self, href: str, prop: dict):
+        found = self.propfind.select(prop)
+        missing = self.propfind.missing(prop)
+        response: list[dict] = [{"href": href}]
+        if found or not missing:
+            response.append({"propstat": {"prop": found, "status": "HTTP/1.1 200 OK"}})
+        if missing:
+            response.append(
+                {"propstat": {"prop": missing, "status": "HTTP/1.1 404 Not Found"}}
+            )
+        return {"response": response}
+
     def dir_to_json(self, file: DirectoryResponseModel):
-        getetag = md5(file.file.filename.as_posix().encode()).hexdigest()
-        resolve = file.file.filename.relative_to(FileResolver.base_path)
-        baseurl = FileResolver.get_base_url(Path(self.request.url.path), resolve)
-        if Path(self.request.url.path).relative_to(baseurl) == resolve:
-            href = baseurl.joinpath(resolve)
-        else:
-            href = Path(self.request.url.path).joinpath(file.file.filename.name)
-
-        return {
-            "response": {
-                "href": quote(href.as_posix() + "/"),
-                "propstat": {
-                    "prop": {
-                        "getlastmodified": RFC1123(file.file.created_at).rfc_1123(),
-                        "resourcetype": {"collection": None},
-                        "quota-used-bytes": file.size,
-                        "quota-available-bytes": -3,
-                        "getetag": getetag,
-                    },
-                    "status": "HTTP/1.1 200 OK",
-                },
-            },
+        href = self.get_href(file.file.filename)
+        prop = {
+            "getlastmodified": lambda: RFC1123(file.last_update).rfc_1123(),
+            "resourcetype": lambda: {"collection": None},
+            "quota-used-bytes": lambda: file.size,
+            "quota-available-bytes": lambda: -3,
+            "getetag": lambda: ETag.directory(file),
         }
 
+        return self.to_response(quote(href.as_posix() + "/"), prop)
+
     def file_to_json(self, file: FileResponseModel):
-        getetag = md5(file.file.filename.as_posix().encode()).hexdigest()
-        resolve = file.file.filename.relative_to(FileResolver.base_path)
-        baseurl = FileResolver.get_base_url(Path(self.request.url.path), resolve)
-        if Path(self.request.url.path).relative_to(baseurl) == resolve:
-            href = baseurl.joinpath(resolve)
-        else:
-            href = Path(self.request.url.path).joinpath(file.file.filename.name)
-        return {
-            "response": {
-                "href": quote(href.as_posix()),
-                "propstat": {
-                    "prop": {
-                        "getlastmodified": RFC1123(file.file.created_at).rfc_1123(),
-                        "getcontentlength": file.metadata.size,
-                        "resourcetype": {},
-                        "getcontenttype": file.metadata.internet_media_type,
-                        "getetag": getetag,
-                    },
-                    "status": "HTTP/1.1 200 OK",
-                },
-            },
+        href = self.get_href(file.file.filename)
+        prop = {
+            "getlastmodified": lambda: RFC1123(file.file.created_at).rfc_1123(),
+            "getcontentlength": lambda: file.metadata.size,
+            "resourcetype": lambda: {},
+            "getcontenttype": lambda: file.metadata.internet_media_type,
+            "getetag": lambda: ETag.file(file),
         }
-
-    async def get_dir(self, file_path: Path):
-        dir = await FileCRAD(self.session).getdir(file_path)
-        res = [self.dir_to_json(dir)]
-        for file in await FileCRAD(self.session).listdir(file_path):
-            if file.directory:
-                data = await FileCRAD(self.session).getdir(file.filename)
-                res.append(self.dir_to_json(data))
+        return self.to_response(quote(href.as_posix()), prop)
+
+    async def get_dir(self, dir: DirectoryResponseModel):
+        depth = DAVHeader.depth(self.request.headers.get("Depth"))
+        if depth is None:
+            return self.bad_request_response()
+        elif depth == "0":
+            return self.data_response([self.dir_to_json(dir)])
+        else:
+            return self.stream_response(self.iter_dir(dir, depth == "infinity"))
+
+    async def iter_dir(self, dir: DirectoryResponseModel, recursive: bool = False):
+        yield self.dir_to_json(dir)
+        async with AsyncSession(SQLDepends.state) as session:
+            if recursive:
+                iterdir = FileCRAD(session).walk_detailed(
+                    dir.file.filename, with_data=False
+                )
             else:
-                data = await FileCRAD(self.session).getfile(file.filename)
-                res.append(self.file_to_json(data))
-
-        return self.data_response(res)
-
-    async def get_file(self, file_path: Path):
-        file = await FileCRAD(self.session).getfile(file_path)
+                iterdir = FileCRAD(session).iterdir_detailed(
+                    dir.file.filename, with_data=False
+                )
+            async for data in iterdir:
+                if isinstance(data, DirectoryResponseModel):
+                    yield self.dir_to_json(data)
+                else:
+                    yield self.file_to_json(data)
+
+    async def get_file(self, file: FileResponseModel):
         return self.data_response([self.file_to_json(file)])
 
+    @FileService.error_decorator
+    async def list(self, file_path: Path) -> Union[Response, BaseModel]:
+        try:
+            self.propfind = from_propfind(await self.request.body())
+        except ParseError:
+            return self.bad_request_response()
+        return await super().list(file_path)
+
     @FileService.error_decorator
     async def check(self, file_path: Path) -> Union[Response, BaseModel]:
         if await FileCRAD(self.session).exists(file_path):
@@ -120,44 +150,132 @@ class FileServiceWebDav(FileService):
         else:
             return self.not_found_response()
 
+    def locked_response(self):
+        return Response(media_type="application/octet-stream", status_code=423)
+
+    def precondition_failed_response(self):
+        return Response(media_type="application/octet-stream", status_code=412)
+
+    def lock_response(
+        self, lock: FileLockModel, token: bool = False, created: bool = False
+    ):
+        activelock = {
+            "locktype": {"write": None},
+            "lockscope": {lock.scope: None},
+            "depth": lock.depth,
+            "timeout": f"Second-{lock.timeout}",
+            "locktoken": {"href": lock.token},
+            "lockroot": {"href": quote(self.get_href(lock.filename).as_posix())},
+        }
+        if lock.owner is not None:
+            activelock["owner"] = lock.owner
+        content = to_webdav({"lockdiscovery": {"activelock": activelock}}, "prop")
+        return Response(
+            content=content,
+            media_type="application/xml",
+            headers={"Lock-Token": f"<{lock.token}>"} if token else None,
+            status_code=201 if created else 200,
+        )
+
+    async def submitted(self, file_path: Path, deep: bool = False) -> bool:
+        locks = await FileLockCRAD(self.session).lookup(file_path, deep)
+        if not locks:
+            return True
+        tokens = DAVHeader.tokens(self.request.headers.get("If"))
+        shared = [x for x in locks if x.scope == "shared"]
+        if any(x.token not in tokens for x in locks if x.scope == "exclusive"):
+            return False
+        elif shared and not any(x.token in tokens for x in shared):
+            return False
+        return True
+
     @FileService.error_decorator
     async def lock(self, file_path: Path) -> Union[Response, BaseModel]:
-        file_state = select(FileORM).where(FileORM.filename == str(file_path))
-        (file_orm,) = (await self.session.execute(file_state)).one().tuple()
-        file_model = FileModel.model_validate_orm(file_orm)
-        get_last_modified = RFC1123(file_model.created_at).rfc_1123()
-
-        response = {
-            "response": {
-                "href": quote(file_path.as_posix()),
-                "propstat": {
-                    "prop": {
-                        "lockdiscovery": {
-                            "activelock": {
-                                "locktype": "write",
-                                "lockscope": "exclusive",
-                                "depth": "0",
-                                "owner": "owner",
-                                "timeout": "Second-3600",
-                                "locktoken": {
-                                    "href": "urn:uuid:12345678-1234-1234-1234-123456789012"
-                                },
-                            }
-                        },
-                        "getlastmodified": get_last_modified,
-                        "resourcetype": {},
-                        "getetag": md5(file_path.as_posix().encode()).hexdigest(),
-                    },
-                    "status": "HTTP/1.1 200 OK",
-                },
-            },
-        }
-        return self.data_response(response)
+        try:
+            lockinfo = from_lockinfo(await self.request.body())
+        except ParseError:
+            return self.bad_request_response()
+        depth = DAVHeader.depth(self.request.headers.get("Depth"))
+        timeout = DAVHeader.timeout(
+            self.request.headers.get("Timeout"),
+            self.lock_timeout,
+            self.lock_timeout,
+        )
+        if FileResolver.base_path not in file_path.joinpath("..").parents:
+            return self.not_allowed_response()
+        elif depth not in ("0", "infinity"):
+            return self.bad_request_response()
+        elif lockinfo is None:
+            tokens = DAVHeader.tokens(self.request.headers.get("If"))
+            locks = await FileLockCRAD(self.session).lookup(file_path)
+            locks = [x for x in locks if x.token in tokens]
+            if not locks:
+                return self.precondition_failed_response()
+            lock = await FileLockCRAD(self.session).refresh(locks[0], timeout)
+            await self.session.commit()
+            return self.lock_response(lock)
+        elif not await FileCRAD(self.session).exists(file_path):
+            if not await FileCRAD(self.session).isdir(file_path.parent):
+                return self.conflict_response()
+            response = await self.upload(file_path, empty_stream())
+            if response.status_code != 201:
+                return response
+            created = True
+        else:
+            created = False
+
+        scope, owner = lockinfo
+        async with FileLockTransaction(file_path, session=self.session):
+            locks = await FileLockCRAD(self.session).lookup(
+                file_path, depth == "infinity"
+            )
+            if any(x.scope == "exclusive" or scope == "exclusive" for x in locks):
+                return self.locked_response()
+            lock = FileLockModel(
+                filename=file_path,
+                owner=owner,
+                scope=scope,
+                depth=depth,
+                timeout=timeout,
+                expires_at=datetime.now() + timedelta(seconds=timeout),
+            )
+            FileLockCRAD(self.session).add(lock)
+            await self.session.commit()
+        return self.lock_response(lock, token=True, created=created)
 
     @FileService.error_decorator
     async def unlock(self, file_path: Path) -> Union[Response, BaseModel]:
+        token = DAVHeader.lock_token(self.request.headers.get("Lock-Token"))
+        if token is None:
+            return self.bad_request_response()
+        locks = await FileLockCRAD(self.session).lookup(file_path)
+        locks = [x for x in locks if x.token == token]
+        if not locks:
+            return self.conflict_response()
+        await FileLockCRAD(self.session).delete(locks[0])
+        await self.session.commit()
         return self.no_content_response()
 
+    async def delete(self, file_path: Path) -> Union[Response, BaseModel]:
+        response = await super().delete(file_path)
+        if response.status_code < 300:
+            await FileLockCRAD(self.session).remove(file_path)
+            await self.session.commit()
+        return response
+
+    async def move(
+        self, file_path: Path, rename_path: Path
+    ) -> Union[Response, BaseModel]:
+        response = await super().move(file_path, rename_path)
+        if response.status_code < 300:
+            await FileLockCRAD(self.session).remove(file_path)
+            await self.session.commit()
+        return response
+
+
+async def empty_stream():
+    yield b""
+
 
 @router.api_route(
     "/webdav/{file_path:path}",
@@ -242,7 +360,10 @@ async def upload(
 ):
     path = FileResolver.get_file(file_path)
     stream = request.stream()
-    return await FileServiceWebDav(request, logger, session).upload(path, stream)
+    size = request.headers.get("Content-Length")
+    return await FileServiceWebDav(request, logger, session).upload(
+        path, stream, int(size) if size and size.isdigit() else None
+    )
 
 
 @router.api_route(
@@ -257,9 +378,10 @@ async def download(
     request: Request,
     logger: Logger = Depends(LoggingDepends.depends),
     session: AsyncSession = Depends(SQLDepends.depends),
+    archive: Optional[str] = None,
 ):
     path = FileResolver.get_file(file_path)
-    return await FileServiceWebDav(request, logger, session).download(path)
+    return await FileServiceWebDav(request, logger, session).download(path, archive)
 
 
 @router.api_route(
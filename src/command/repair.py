@@ -0,0 +1,18 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.depends.sql import SQLDepends
+from src.sql.directory_stat_crad import DirectoryStatCRAD
+
+
+async def repair():
+    await SQLDepends.start()
+    async with AsyncSession(SQLDepends.state) as session:
+        await DirectoryStatCRAD(session).repair()
+        await session.commit()
+    await SQLDepends.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(repair())
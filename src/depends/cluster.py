@@ -0,0 +1,117 @@
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+from os import close, getpid
+from pathlib import Path
+from typing import Callable, Optional
+
+from aiofiles import os
+
+from src.sql.cluster_event_crad import ClusterEventCRAD
+from src.sql.path_lock import PathLock
+from src.util import aioflock, flock
+from src.util.file import FileResolver
+
+
+class ClusterProtocol(asyncio.DatagramProtocol):
+    def __init__(self, callback: Callable[[], None]):
+        self.callback = callback
+
+    def datagram_received(self, data, addr):
+        self.callback()
+
+
+class Cluster:
+    enabled: bool = False
+    leader: bool = False
+    files: dict[str, int] = {}
+    transports: dict[str, asyncio.BaseTransport] = {}
+
+    @staticmethod
+    def path(name: str) -> Path:
+        return FileResolver.metadata_path.joinpath(".cluster", name)
+
+    @staticmethod
+    def init(enabled: bool):
+        Cluster.stop()
+        Cluster.enabled = enabled
+
+    @staticmethod
+    async def open(name: str) -> Optional[int]:
+        if not Cluster.enabled:
+            return None
+        elif name not in Cluster.files:
+            path = Cluster.path(f"{name}.lock")
+            await os.makedirs(path.parent, exist_ok=True)
+            Cluster.files[name] = await aioflock.open_lock(path)
+        return Cluster.files[name]
+
+    @staticmethod
+    @asynccontextmanager
+    async def exclusive(name: str):
+        file = await Cluster.open(name)
+        if file is not None:
+            await aioflock.lock(file, 0, "X", wait=True)
+        try:
+            yield
+        finally:
+            if file is not None:
+                flock.lock(file, 0, None)
+
+    @staticmethod
+    async def elect() -> bool:
+        file = await Cluster.open("leader")
+        if not Cluster.leader:
+            Cluster.leader = file is None or flock.lock(file, 0, "X")
+        return Cluster.leader
+
+    @staticmethod
+    async def listen(name: str, callback: Callable[[], None]):
+        if not Cluster.enabled:
+            return
+        path = Cluster.path(f"{name}.sock")
+        await os.makedirs(path.parent, exist_ok=True)
+        if await os.path.exists(path):
+            await os.remove(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(path))
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: ClusterProtocol(callback), sock=sock
+        )
+        Cluster.transports[name] = transport
+
+    @staticmethod
+    def send(name: str):
+        if not Cluster.enabled:
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            try:
+                sock.sendto(b"\0", str(Cluster.path(f"{name}.sock")))
+            except OSError:
+                pass
+
+    @staticmethod
+    def stop():
+        for transport in Cluster.transports.values():
+            transport.close()
+        for file in Cluster.files.values():
+            close(file)
+        if PathLock.file in Cluster.files.values():
+            PathLock.file = None
+            PathLock.applied = {}
+        Cluster.transports = {}
+        Cluster.files = {}
+        Cluster.leader = False
+
+    @staticmethod
+    def stats():
+        return {
+            "enabled": Cluster.enabled,
+            "leader": Cluster.leader,
+            "pid": getpid(),
+            "seen": ClusterEventCRAD.seen,
+            "missing": len(ClusterEventCRAD.missing),
+            "received": ClusterEventCRAD.received,
+        }
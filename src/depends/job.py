@@ -1,28 +1,47 @@
-from datetime import datetime
-
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from src.job.slow_task import slow_task
+from src.depends.cluster import Cluster
+from src.job.cluster import cluster_event_reaper
+from src.job.file_lock import file_lock_reaper
+from src.job.task_queue import TaskQueue
+from src.job.upload import upload_reaper
 from src.models.environ import Environ
 
 
 class Job:
     state: BackgroundScheduler
+    leader: bool = False
 
     @staticmethod
     async def start():
         env = Environ()
         state = AsyncIOScheduler()
-        state.add_job(slow_task, "interval", seconds=10, next_run_time=datetime.now())
         Job.state = state
+        Job.leader = False
+        TaskQueue.init(env.JOB_POLL_INTERVAL)
 
         if env.JOB_ENABLE:
+            await Job.elect()
+            if Cluster.enabled:
+                state.add_job(Job.elect, "interval", seconds=5)
             Job.state.start()
 
+    @staticmethod
+    async def elect():
+        if Job.leader or not await Cluster.elect():
+            return
+        Job.leader = True
+        await TaskQueue.start()
+        Job.state.add_job(file_lock_reaper, "interval", seconds=60)
+        Job.state.add_job(upload_reaper, "interval", seconds=60)
+        if Cluster.enabled:
+            Job.state.add_job(cluster_event_reaper, "interval", seconds=60)
+
     @staticmethod
     async def stop():
         Job.state.shutdown()
+        await TaskQueue.stop()
 
     @staticmethod
     async def depends():
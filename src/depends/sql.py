@@ -7,8 +7,15 @@ from sqlalchemy.ext.asyncio import (
 )
 from tenacity import retry, retry_if_exception_type, stop_after_attempt
 
+from src.depends.cluster import Cluster
 from src.models.environ import Environ
+from src.service.thumbnail import ThumbnailCache
+from src.sql.cluster_event_crad import ClusterEventCRAD
+from src.sql.directory_stat_crad import DirectoryStatCRAD
 from src.sql.file_crad import FileCRAD
+from src.sql.migration import migrate
+from src.sql.path_cache import PathCache
+from src.sql.path_lock import PathLock
 from src.sql.sql import SQLBase
 from src.util.file import FileResolver
 
@@ -33,30 +40,54 @@ class SQLDepends:
     async def start():
         env = Environ()
         SQLDepends.state = create_async_engine(env.DB_URL, echo=env.SQL_ECHO)
-        async with SQLDepends.state.begin() as conn:
-            await conn.run_sync(SQLBase.metadata.create_all)
-        async with AsyncSession(SQLDepends.state) as session:
-            await SQLDepends.init(session)
-            await session.commit()
+        Cluster.init(env.WORKERS > 1)
+        PathCache.init(env.PATH_CACHE_SIZE)
+        await ThumbnailCache.init(
+            env.THUMBNAIL_CACHE_SIZE, env.THUMBNAIL_PREGENERATE and env.JOB_ENABLE
+        )
+        PathLock.init(env.FILE_LOCK_TIMEOUT, await Cluster.open("path_lock"))
+        ClusterEventCRAD.init(Cluster.enabled)
+        async with Cluster.exclusive("startup"):
+            async with SQLDepends.state.begin() as conn:
+                await conn.run_sync(SQLBase.metadata.create_all)
+                await conn.run_sync(migrate)
+            async with AsyncSession(SQLDepends.state) as session:
+                if await DirectoryStatCRAD(session).isempty():
+                    await DirectoryStatCRAD(session).repair()
+                await SQLDepends.init(session)
+                await ClusterEventCRAD(session).start()
+                await session.commit()
 
     @staticmethod
     async def test(drop_all: bool = False):
         env = Environ()
         name = f"{env.DB_URL}_test"
         SQLDepends.state = create_async_engine(name, echo=env.SQL_ECHO)
-        async with SQLDepends.state.begin() as conn:
-            if drop_all:
-                await conn.run_sync(SQLBase.metadata.drop_all)
-            await conn.run_sync(SQLBase.metadata.create_all)
-        async with AsyncSession(SQLDepends.state) as session:
-            await SQLDepends.init(session)
-            await session.commit()
+        Cluster.init(env.WORKERS > 1)
+        PathCache.init(env.PATH_CACHE_SIZE)
+        await ThumbnailCache.init(
+            env.THUMBNAIL_CACHE_SIZE, env.THUMBNAIL_PREGENERATE and env.JOB_ENABLE
+        )
+        PathLock.init(env.FILE_LOCK_TIMEOUT, await Cluster.open("path_lock"))
+        ClusterEventCRAD.init(Cluster.enabled)
+        async with Cluster.exclusive("startup"):
+            async with SQLDepends.state.begin() as conn:
+                if drop_all:
+                    await conn.run_sync(SQLBase.metadata.drop_all)
+                await conn.run_sync(SQLBase.metadata.create_all)
+                await conn.run_sync(migrate)
+            async with AsyncSession(SQLDepends.state) as session:
+                await SQLDepends.init(session)
+                await ClusterEventCRAD(session).start()
+                await session.commit()
 
     @staticmethod
     async def stop():
         await SQLDepends.state.dispose()
+        Cluster.stop()
 
     @staticmethod
     async def depends():
         async with AsyncSession(SQLDepends.state) as session:
+            await ClusterEventCRAD(session).receive()
             yield session
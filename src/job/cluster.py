@@ -0,0 +1,14 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+
+from src.depends.sql import SQLDepends
+from src.sql.cluster_event_crad import ClusterEventCRAD
+
+
+async def cluster_event_reaper():
+    async with AsyncSession(SQLDepends.state) as session:
+        await ClusterEventCRAD(session).prune(datetime.now() - timedelta(minutes=10))
+        await session.commit()
@@ -0,0 +1,12 @@
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+
+from src.depends.sql import SQLDepends
+from src.sql.file_lock_crad import FileLockCRAD
+
+
+async def file_lock_reaper():
+    async with AsyncSession(SQLDepends.state) as session:
+        await FileLockCRAD(session).reap()
+        await session.commit()
@@ -17,6 +17,8 @@ from src.service.classification import (
     DeepDanbooruClassificationModel,
     ImageClassificationModel,
 )
+from src.service.thumbnail import ThumbnailCache
+from src.sql.cluster_event_crad import ClusterEventCRAD
 from src.sql.file_crad import FileCRAD
 from src.util.ffmpeg import FFmpegVideo
 from src.util.file import FileResolver
@@ -32,9 +34,19 @@ def all_classification(metadata_id: uuid.UUID, suffix: str = ""):
     return [SlowTaskORM.from_model(x) for x in models]
 
 
+def thumbnail_task(metadata_id: uuid.UUID):
+    if not ThumbnailCache.pregenerate:
+        return []
+    task_model = SlowTaskModel(type="thumbnail", metadata_id=metadata_id)
+    return [SlowTaskORM.from_model(task_model)]
+
+
 async def slow_task():
     async with AsyncSession(SQLDepends.state) as session:
+        await ClusterEventCRAD(session).receive()
+        await metadata_extract(session)
         await video_convert(session)
+        await thumbnail_generate(session)
         await classification(
             session,
             DeepDanbooruClassificationModel,
@@ -58,6 +70,34 @@ async def slow_task():
         )
 
 
+async def metadata_extract(session: AsyncSession):
+    task_state = (
+        select(SlowTaskORM, MetadataORM)
+        .join(MetadataORM, MetadataORM.id == SlowTaskORM.metadata_id)
+        .where(SlowTaskORM.type == "metadata_extract")
+    )
+
+    while res_orm := (await session.execute(task_state)).first():
+        (task_orm, metadata_orm) = res_orm.tuple()
+        metadata = MetadataModel.model_validate_orm(metadata_orm)
+        filename = FileResolver.get_metadata_from_uuid(metadata.id)
+
+        bin = filename.joinpath(f"bin{metadata.suffix}")
+        metadata_file = await FileCRAD(session).refresh(metadata.id, bin)
+        if metadata_file.is_video():
+            task_model = SlowTaskModel(
+                type="video_convert",
+                metadata_id=metadata.id,
+            )
+            session.add(SlowTaskORM.from_model(task_model))
+        if metadata_file.is_image():
+            session.add_all(all_classification(metadata.id))
+        session.add_all(thumbnail_task(metadata.id))
+
+        await session.delete(task_orm)
+        await session.commit()
+
+
 async def video_convert(session: AsyncSession):
     task_state = (
         select(SlowTaskORM, MetadataORM)
@@ -98,6 +138,31 @@ async def video_convert(session: AsyncSession):
         _ = await FileCRAD(session).put(res_path)
 
         session.add_all(all_classification(metadata.id, "_thumbnail"))
+        session.add_all(thumbnail_task(metadata.id))
+        await session.delete(task_orm)
+        await session.commit()
+
+
+async def thumbnail_generate(session: AsyncSession):
+    task_state = (
+        select(SlowTaskORM, MetadataORM)
+        .join(MetadataORM, MetadataORM.id == SlowTaskORM.metadata_id)
+        .where(SlowTaskORM.type == "thumbnail")
+    )
+
+    while res_orm := (await session.execute(task_state)).first():
+        (task_orm, metadata_orm) = res_orm.tuple()
+        metadata = MetadataModel.model_validate_orm(metadata_orm)
+        source = await ThumbnailCache.source(metadata)
+        if source is not None:
+            size = ThumbnailCache.size
+            format = ThumbnailCache.format
+            dst = ThumbnailCache.path(metadata.id, size, format)
+            try:
+                await ThumbnailCache.get(source, dst, size, format)
+            except (OSError, ValueError):
+                pass
+
         await session.delete(task_orm)
         await session.commit()
 
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+from src.depends.cluster import Cluster
+from src.job.slow_task import slow_task
+from src.models.slow_task import SlowTaskORM
+
+
+@event.listens_for(Session, "before_flush")
+def before_flush(session: Session, flush_context, instances):
+    if any(isinstance(x, SlowTaskORM) for x in session.new):
+        session.info["slow_task"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def after_commit(session: Session):
+    if session.info.pop("slow_task", False):
+        TaskQueue.notify()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def after_transaction_end(session: Session, transaction: SessionTransaction):
+    if transaction.parent is None:
+        session.info.pop("slow_task", None)
+
+
+class TaskQueue:
+    logger = logging.getLogger(__name__)
+    event: Optional[asyncio.Event] = None
+    task: Optional[asyncio.Task] = None
+    interval: float = 300.0
+    notified_at: Optional[float] = None
+    notified: int = 0
+    runs: int = 0
+    errors: int = 0
+    latency: float = 0.0
+
+    @staticmethod
+    def init(interval: float):
+        TaskQueue.interval = interval
+        TaskQueue.notified_at = None
+        TaskQueue.notified = 0
+        TaskQueue.runs = 0
+        TaskQueue.errors = 0
+        TaskQueue.latency = 0.0
+
+    @staticmethod
+    def notify():
+        TaskQueue.notified += 1
+        if TaskQueue.event is None:
+            Cluster.send("task_queue")
+        elif not TaskQueue.event.is_set():
+            TaskQueue.notified_at = time.monotonic()
+            TaskQueue.event.set()
+
+    @staticmethod
+    async def start():
+        TaskQueue.event = asyncio.Event()
+        TaskQueue.event.set()
+        TaskQueue.task = asyncio.ensure_future(TaskQueue.run())
+        await Cluster.listen("task_queue", TaskQueue.notify)
+
+    @staticmethod
+    async def stop():
+        task = TaskQueue.task
+        TaskQueue.task = None
+        TaskQueue.event = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    @staticmethod
+    async def run():
+        while TaskQueue.event is not None:
+            try:
+                await asyncio.wait_for(TaskQueue.event.wait(), TaskQueue.interval)
+            except asyncio.TimeoutError:
+                pass
+            TaskQueue.event.clear()
+            if TaskQueue.notified_at is not None:
+                TaskQueue.latency = time.monotonic() - TaskQueue.notified_at
+                TaskQueue.notified_at = None
+            TaskQueue.runs += 1
+            try:
+                await slow_task()
+            except Exception:
+                TaskQueue.errors += 1
+                TaskQueue.logger.exception("slow_task failed")
+
+    @staticmethod
+    def stats():
+        return {
+            "running": TaskQueue.task is not None,
+            "notified": TaskQueue.notified,
+            "runs": TaskQueue.runs,
+            "errors": TaskQueue.errors,
+            "latency": TaskQueue.latency,
+        }
@@ -0,0 +1,46 @@
+import time
+
+from aiofiles import os
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+
+from src.depends.sql import SQLDepends
+from src.models.environ import Environ
+from src.service.upload import UploadDigest
+from src.sql.file_lock_crad import FileLockCRADError, FileLockTransaction
+from src.sql.upload_crad import UploadCRAD
+from src.util.file import FileResolver
+
+
+async def upload_reaper():
+    expire = Environ().UPLOAD_EXPIRE
+    async with AsyncSession(SQLDepends.state) as session:
+        for upload in await UploadCRAD(session).expired(expire):
+            temp = FileResolver.get_upload_from_uuid(upload.id)
+            try:
+                async with FileLockTransaction(temp, timeout=0, session=session):
+                    if not await UploadCRAD(session).expired(expire, upload.id):
+                        continue
+                    await UploadCRAD(session).delete(upload.id)
+                    await session.commit()
+                    UploadDigest.discard(upload.id)
+                    if await os.path.isfile(temp):
+                        await os.remove(temp)
+            except FileLockCRADError:
+                continue
+
+        upload_path = FileResolver.metadata_path.joinpath(".upload")
+        if not await os.path.isdir(upload_path):
+            return
+        ids = await UploadCRAD(session).ids()
+        for name in await os.listdir(upload_path):
+            temp = upload_path.joinpath(name)
+            if name in ids or await os.path.getmtime(temp) > time.time() - expire:
+                continue
+            try:
+                async with FileLockTransaction(temp, timeout=0):
+                    if await os.path.isfile(temp):
+                        await os.remove(temp)
+            except FileLockCRADError:
+                continue
@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+from pydantic import Field
+from sqlalchemy import CHAR, DateTime, Integer
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from src.sql.sql import ModelBase, ORMMixin, SQLBase
+
+
+class BlobORM(SQLBase, ORMMixin):
+    __tablename__ = "blob"
+    sha256: Mapped[str] = mapped_column(CHAR(64), primary_key=True)
+    metadata_id: Mapped[str] = mapped_column(CHAR(36), nullable=False, index=True)
+    refcount: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class BlobModel(ModelBase):
+    sha256: str = Field()
+    metadata_id: uuid.UUID = Field()
+    refcount: int = Field(default=1)
+    created_at: datetime = Field(default_factory=datetime.now)
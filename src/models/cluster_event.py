@@ -0,0 +1,25 @@
+from datetime import datetime
+from pathlib import Path
+
+from pydantic import Field
+from sqlalchemy import DateTime, Integer, Text
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from src.sql.sql import ModelBase, ORMMixin, SQLBase
+
+
+class ClusterEventORM(SQLBase, ORMMixin):
+    __tablename__ = "cluster_event"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    filename: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class ClusterEventModel(ModelBase):
+    id: int = Field()
+    filename: Path = Field()
+    created_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+from pydantic import Field
+from sqlalchemy import CHAR, BigInteger, DateTime, Integer
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from src.sql.sql import ModelBase, ORMMixin, SQLBase
+
+
+class DirectoryStatORM(SQLBase, ORMMixin):
+    __tablename__ = "directory_stat"
+    file_id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_update: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class DirectoryStatModel(ModelBase):
+    file_id: uuid.UUID = Field()
+    size: int = Field(default=0)
+    count: int = Field(default=1)
+    last_update: datetime = Field(default_factory=datetime.now)
@@ -34,6 +34,11 @@ class Environ(BaseSettings):
         description="ポート",
     )
 
+    WORKERS: int = Field(
+        default=1,
+        description="ワーカープロセス数, 2以上でプロセス間の協調を有効にする (Unixのみ)",
+    )
+
     TESTING: bool = Field(
         default=False,
         description="Pytest用",
@@ -57,7 +62,67 @@ class Environ(BaseSettings):
         description="SQLのログを出力するか",
     )
 
+    PATH_CACHE_SIZE: int = Field(
+        default=4096,
+        description="パスキャッシュの最大件数, 0で無効",
+    )
+
+    FILE_LOCK_TIMEOUT: float = Field(
+        default=10.0,
+        description="パスロックの最大待機秒数, 0で待機しない",
+    )
+
     JOB_ENABLE: bool = Field(
         default=True,
         description="ジョブを有効にするか",
     )
+
+    JOB_POLL_INTERVAL: float = Field(
+        default=300.0,
+        description="ジョブキューが通知なしでタスクを再確認する間隔秒数",
+    )
+
+    METADATA_DEFERRED: bool = Field(
+        default=False,
+        description="メタデータの抽出をジョブで後から行うか, ジョブが無効の場合は無視",
+    )
+
+    THUMBNAIL_CACHE_SIZE: int = Field(
+        default=1024 * 1024 * 1024,
+        description="サムネイルキャッシュの最大バイト数",
+    )
+
+    THUMBNAIL_PREGENERATE: bool = Field(
+        default=False,
+        description="アップロード時にサムネイルを生成するか, ジョブが無効の場合は無視",
+    )
+
+    INGEST_MAX_ARCHIVE_SIZE: int = Field(
+        default=16 * 1024 * 1024 * 1024,
+        description="受信するアーカイブの最大バイト数",
+    )
+
+    INGEST_MAX_SIZE: int = Field(
+        default=16 * 1024 * 1024 * 1024,
+        description="アーカイブ展開後の最大合計バイト数",
+    )
+
+    INGEST_MAX_ENTRIES: int = Field(
+        default=100000,
+        description="アーカイブの最大エントリ数",
+    )
+
+    UPLOAD_MAX_SIZE: int = Field(
+        default=0,
+        description="アップロードの最大バイト数, 0で空き容量のみ確認",
+    )
+
+    UPLOAD_EXPIRE: int = Field(
+        default=86400,
+        description="再開可能アップロードが最後の受信から破棄されるまでの秒数",
+    )
+
+    WEBDAV_LOCK_TIMEOUT: int = Field(
+        default=3600,
+        description="WebDAVロックの最大有効秒数",
+    )
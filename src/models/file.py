@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from pydantic import Field
-from sqlalchemy import CHAR, Boolean, DateTime, String
+from sqlalchemy import CHAR, Boolean, DateTime, ForeignKey, String
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -15,15 +16,22 @@ from src.sql.sql import ModelBase, ORMMixin, SQLBase
 class FileORM(SQLBase, ORMMixin):
     __tablename__ = "file"
     id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
+    parent_id: Mapped[Optional[str]] = mapped_column(
+        CHAR(36),
+        ForeignKey("file.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
     metadata_id: Mapped[str] = mapped_column(CHAR(36), nullable=False)
     directory: Mapped[bool] = mapped_column(Boolean, nullable=False)
-    filename: Mapped[str] = mapped_column(String(255), nullable=False)
-    pearent: Mapped[str] = mapped_column(String(255), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    pearent: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
 
 class FileModel(ModelBase):
     id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    parent_id: Optional[uuid.UUID] = Field(default=None)
     metadata_id: uuid.UUID = Field()
     directory: bool = Field()
     filename: Path = Field()
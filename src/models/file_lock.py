@@ -1,8 +1,10 @@
 import uuid
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from pydantic import Field
-from sqlalchemy import CHAR, String
+from sqlalchemy import CHAR, DateTime, Integer, String, Text
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -14,9 +16,23 @@ from src.sql.sql import ModelBase, ORMMixin, SQLBase
 class FileLockORM(SQLBase, ORMMixin):
     __tablename__ = "file_lock"
     id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
-    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    owner: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    scope: Mapped[str] = mapped_column(String(16), nullable=False)
+    depth: Mapped[str] = mapped_column(String(16), nullable=False)
+    timeout: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
 
 
 class FileLockModel(ModelBase):
     id: uuid.UUID = Field(default_factory=uuid.uuid4)
     filename: Path = Field()
+    owner: Optional[str] = Field(default=None)
+    scope: str = Field(default="exclusive")
+    depth: str = Field(default="infinity")
+    timeout: int = Field()
+    expires_at: datetime = Field()
+
+    @property
+    def token(self) -> str:
+        return f"urn:uuid:{self.id}"
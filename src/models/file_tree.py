@@ -0,0 +1,23 @@
+import uuid
+
+from pydantic import Field
+from sqlalchemy import CHAR, Integer
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from src.sql.sql import ModelBase, ORMMixin, SQLBase
+
+
+class FileTreeORM(SQLBase, ORMMixin):
+    __tablename__ = "file_tree"
+    ancestor_id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
+    descendant_id: Mapped[str] = mapped_column(CHAR(36), primary_key=True, index=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class FileTreeModel(ModelBase):
+    ancestor_id: uuid.UUID = Field()
+    descendant_id: uuid.UUID = Field()
+    depth: int = Field()
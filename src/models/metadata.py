@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import Optional
 
 from pydantic import Field
 from sqlalchemy import CHAR, JSON, Boolean, DateTime, Integer, String
@@ -16,6 +17,7 @@ class MetadataORM(SQLBase, ORMMixin):
     id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
     suffix: Mapped[str] = mapped_column(String(255), nullable=False)
     size: Mapped[int] = mapped_column(Integer, nullable=False)
+    sha256: Mapped[Optional[str]] = mapped_column(CHAR(64), nullable=True)
     data: Mapped[str] = mapped_column(JSON, nullable=False)
     video: Mapped[bool] = mapped_column(Boolean, nullable=False)
     image: Mapped[bool] = mapped_column(Boolean, nullable=False)
@@ -27,6 +29,7 @@ class MetadataModel(ModelBase):
     id: uuid.UUID = Field(default_factory=uuid.uuid4)
     suffix: str = Field()
     size: int = Field()
+    sha256: Optional[str] = Field(default=None)
     data: dict = Field(default_factory=dict)
     video: bool = Field()
     image: bool = Field()
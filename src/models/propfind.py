@@ -0,0 +1,23 @@
+from typing import Any, Callable
+
+from pydantic import BaseModel, Field
+
+
+class PropFindModel(BaseModel):
+    allprop: bool = Field(default=True)
+    propname: bool = Field(default=False)
+    prop: list[str] = Field(default_factory=list)
+
+    def select(self, props: dict[str, Callable[[], Any]]) -> dict[str, Any]:
+        if self.propname:
+            return {key: None for key in props}
+        elif self.allprop:
+            return {key: value() for key, value in props.items()}
+        else:
+            return {key: value() for key, value in props.items() if key in self.prop}
+
+    def missing(self, props: dict[str, Callable[[], Any]]) -> dict[str, Any]:
+        if self.propname or self.allprop:
+            return {}
+        else:
+            return {key: None for key in self.prop if key not in props}
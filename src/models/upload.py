@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from pydantic import Field
+from sqlalchemy import CHAR, BigInteger, DateTime, Integer, String
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from src.sql.sql import ModelBase, ORMMixin, SQLBase
+
+
+class UploadORM(SQLBase, ORMMixin):
+    __tablename__ = "upload"
+    id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class UploadModel(ModelBase):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    filename: Path = Field()
+    size: int = Field()
+    chunk_size: int = Field()
+    created_at: datetime = Field(default_factory=datetime.now)
+    expires_at: Optional[datetime] = Field(default=None)
+
+    @property
+    def chunks(self) -> int:
+        return -(-self.size // self.chunk_size)
+
+    def chunk(self, number: int) -> tuple[int, int]:
+        start = number * self.chunk_size
+        return start, min(start + self.chunk_size, self.size)
+
+
+class UploadChunkORM(SQLBase, ORMMixin):
+    __tablename__ = "upload_chunk"
+    upload_id: Mapped[str] = mapped_column(CHAR(36), primary_key=True)
+    number: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sha256: Mapped[Optional[str]] = mapped_column(CHAR(64), nullable=True)
+
+
+class UploadChunkModel(ModelBase):
+    upload_id: uuid.UUID = Field()
+    number: int = Field()
+    sha256: Optional[str] = Field(default=None)
+
+
+class UploadStatusModel(ModelBase):
+    upload: UploadModel = Field()
+    received: list[int] = Field()
@@ -1,19 +1,30 @@
+import hashlib
+import time
 import uuid
+from datetime import datetime, timedelta
 from logging import Logger
-from pathlib import Path
-from typing import AsyncGenerator, Union
+from pathlib import Path, PurePosixPath
+from typing import AsyncGenerator, Mapping, Optional, Sequence, Union
+from urllib.parse import quote
 
-from aiofiles import open, os
+from aiofiles import os
 from fastapi import Request, Response
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 
-from src.depends.sql import SQLDepends
-from src.job.slow_task import all_classification
+from src.job.slow_task import all_classification, thumbnail_task
+from src.models.environ import Environ
+from src.models.metadata import MetadataModel
+from src.models.response import DirectoryResponseModel, FileResponseModel
 from src.models.slow_task import SlowTaskModel, SlowTaskORM
+from src.models.upload import UploadModel
+from src.service.metadata import MetadataFile
+from src.service.thumbnail import ThumbnailCache
+from src.service.upload import UploadDigest
+from src.sql.blob_crad import BlobCRAD
 from src.sql.file_crad import FileCRAD
 from src.sql.file_lock_crad import (
     FileGuard,
@@ -21,9 +32,24 @@ from src.sql.file_lock_crad import (
     FileLockTransaction,
     FileMoveGuard,
 )
+from src.sql.upload_crad import UploadCRAD
+from src.util import aioarchive
+from src.util import aioclone as clone
+from src.util import aiodigest
 from src.util import aioshutils as shutil
+from src.util.archive import ArchiveLimitError
+from src.util.etag import ETag
 from src.util.file import FileResolver
-from src.util.stream import Stream
+from src.util.range import ByteRange
+from src.util.rfc1123 import RFC1123
+from src.util.stream import (
+    MultipartSendfileResponse,
+    SendfileResponse,
+    Stream,
+    StreamLimitError,
+)
+from src.util.thumbnail import THUMBNAIL_FORMATS, bucket
+from src.util.zipstream import ZipStream
 
 
 class SuccessResponse(BaseModel):
@@ -31,6 +57,12 @@ class SuccessResponse(BaseModel):
 
 
 class FileService:
+    upload_expire = Environ().UPLOAD_EXPIRE
+    upload_max_size = Environ().UPLOAD_MAX_SIZE
+    ingest_max_archive_size = Environ().INGEST_MAX_ARCHIVE_SIZE
+    ingest_max_size = Environ().INGEST_MAX_SIZE
+    ingest_max_entries = Environ().INGEST_MAX_ENTRIES
+
     def __init__(
         self,
         request: Request,
@@ -53,6 +85,9 @@ class FileService:
     def data_response(self, data) -> Union[Response, BaseModel]:
         return JSONResponse(content=data, status_code=200)
 
+    def bad_request_response(self) -> Union[Response, BaseModel]:
+        return JSONResponse(content={}, status_code=400)
+
     def conflict_response(self) -> Union[Response, BaseModel]:
         return JSONResponse(content={}, status_code=409)
 
@@ -65,29 +100,64 @@ class FileService:
     def locked_response(self) -> Union[Response, BaseModel]:
         return JSONResponse(content={}, status_code=423)
 
+    def payload_too_large_response(self) -> Union[Response, BaseModel]:
+        return JSONResponse(content={}, status_code=413)
+
+    def not_modified_response(self, etag: str) -> Union[Response, BaseModel]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    def range_not_satisfiable_response(self, size: int) -> Union[Response, BaseModel]:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
     @staticmethod
     def error_decorator(func):
         async def wrapper(self: "FileService", *args, **kwargs):
-            return await func(self, *args, **kwargs)
-
             try:
                 return await func(self, *args, **kwargs)
             except FileLockCRADError as e:
                 self.logger.error(e)
                 return self.locked_response()
-            except FileNotFoundError as e:
-                self.logger.error(e)
-                return self.not_found_response()
-            except Exception as e:
-                self.logger.error(e)
-                return self.not_found_response()
 
         return wrapper
 
-    async def get_dir(self, file_path: Path) -> Union[Response, BaseModel]:
+    async def submitted(self, file_path: Path, deep: bool = False) -> bool:
+        return True
+
+    async def oversized(self, size: int) -> bool:
+        if self.upload_max_size and size > self.upload_max_size:
+            return True
+        return size > await Stream.available(FileResolver.base_path)
+
+    def not_modified(self, etag: str, last_modified: datetime) -> bool:
+        if_none_match = self.request.headers.get("If-None-Match")
+        if_modified_since = self.request.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            return ETag.match(if_none_match, etag)
+        elif if_modified_since is not None:
+            try:
+                since = RFC1123.fromrfc1123(if_modified_since).dt
+            except ValueError:
+                return False
+            modified = last_modified.astimezone(since.tzinfo)
+            return modified.replace(microsecond=0) <= since
+        else:
+            return False
+
+    def if_range(self, etag: str, last_modified: str) -> bool:
+        if_range = self.request.headers.get("If-Range")
+        if if_range is None:
+            return True
+        elif if_range.startswith('"'):
+            return if_range == etag
+        elif if_range.startswith("W/"):
+            return False
+        else:
+            return if_range == last_modified
+
+    async def get_dir(self, dir: DirectoryResponseModel) -> Union[Response, BaseModel]:
         raise NotImplementedError
 
-    async def get_file(self, file_path: Path) -> Union[Response, BaseModel]:
+    async def get_file(self, file: FileResponseModel) -> Union[Response, BaseModel]:
         raise NotImplementedError
 
     @error_decorator
@@ -95,15 +165,26 @@ class FileService:
         if FileResolver.base_path not in file_path.joinpath("..").parents:
             return self.not_allowed_response()
         elif await FileCRAD(self.session).isdir(file_path):
-            return await self.get_dir(file_path)
+            dir = await FileCRAD(self.session).getdir(file_path)
+            etag = ETag.directory(dir)
+            if self.not_modified(etag, dir.last_update):
+                return self.not_modified_response(etag)
+            return await self.get_dir(dir)
         elif await FileCRAD(self.session).isfile(file_path):
-            return await self.get_file(file_path)
+            file = await FileCRAD(self.session).getfile(file_path, with_data=False)
+            etag = ETag.file(file)
+            if self.not_modified(etag, file.file.created_at):
+                return self.not_modified_response(etag)
+            return await self.get_file(file)
         else:
             return self.not_found_response()
 
     @error_decorator
     async def upload(
-        self, file_path: Path, stream: AsyncGenerator[bytes, None]
+        self,
+        file_path: Path,
+        stream: AsyncGenerator[bytes, None],
+        size: Optional[int] = None,
     ) -> Union[Response, BaseModel]:
         if FileResolver.base_path not in file_path.joinpath("..").parents:
             return self.not_allowed_response()
@@ -113,64 +194,508 @@ class FileService:
             return self.not_allowed_response()
         elif await FileCRAD(self.session).exists(file_path):
             return self.conflict_response()
+        elif size and await self.oversized(size):
+            return self.payload_too_large_response()
         else:
-            id = uuid.uuid4()
-            metadata = FileResolver.get_metadata_from_uuid(id)
-            await os.makedirs(metadata)
+            async with FileLockTransaction(file_path, session=self.session):
+                if await FileCRAD(self.session).exists(file_path):
+                    return self.conflict_response()
+                elif not await self.submitted(file_path):
+                    return self.locked_response()
+                async with FileGuard(file_path):
+                    start = time.perf_counter()
+                    digest, size = await Stream.write_file(file_path, stream, size)
+                    elapsed = time.perf_counter() - start
+                self.logger.info(
+                    f"Uploaded {file_path} {size} bytes "
+                    f"{size / max(elapsed, 1e-6) / 1e6:.1f} MB/s"
+                )
+                return await self.register(file_path, digest)
+
+    async def register(
+        self, file_path: Path, digest: str
+    ) -> Union[Response, BaseModel]:
+        async with FileGuard(file_path):
+            metadata_id = await BlobCRAD(self.session).acquire(digest)
+            if metadata_id is not None:
+                await FileCRAD(self.session).attach(file_path, metadata_id)
+                await self.session.commit()
+                return self.created_response()
+
+        id = uuid.uuid4()
+        metadata = FileResolver.get_metadata_from_uuid(id)
+        await os.makedirs(metadata)
+        bin = metadata.joinpath(f"bin{file_path.suffix}")
+        async with FileGuard(file_path, metadata):
+            await clone.clonefile(file_path, bin)
             await FileCRAD(self.session).mkdir(metadata)
-            bin = metadata.joinpath(f"bin{file_path.suffix}")
-            async with FileLockTransaction(SQLDepends.state, file_path):
-                async with FileGuard(file_path, bin):
-                    async with open(file_path, "wb") as f:
-                        async with open(bin, "wb") as t:
-                            async for chunk in stream:
-                                await f.write(chunk)
-                                await t.write(chunk)
-
-            async with FileGuard(file_path, bin):
-                model = await FileCRAD(self.session).put(file_path, id)
-                _ = await FileCRAD(self.session).put(bin)
-                if model.video:
+            deferred = MetadataFile.deferred
+            model = await FileCRAD(self.session).put(
+                file_path, id, digest, deferred=deferred
+            )
+            _ = await FileCRAD(self.session).put(bin, sha256=digest, source=model)
+            if await BlobCRAD(self.session).add(digest, model.id) != str(model.id):
+                await self.session.rollback()
+                await shutil.rmtree(metadata)
+                return await self.register(file_path, digest)
+            if deferred:
+                task_model = SlowTaskModel(
+                    type="metadata_extract",
+                    metadata_id=model.id,
+                )
+                self.session.add(SlowTaskORM.from_model(task_model))
+            if model.video:
+                task_model = SlowTaskModel(
+                    type="video_convert",
+                    metadata_id=model.id,
+                )
+                self.session.add(SlowTaskORM.from_model(task_model))
+            if model.image:
+                self.session.add_all(all_classification(model.id))
+            if not deferred:
+                self.session.add_all(thumbnail_task(model.id))
+
+            await self.session.commit()
+        return self.created_response()
+
+    @error_decorator
+    async def ingest(
+        self,
+        directory: Path,
+        stream: AsyncGenerator[bytes, None],
+        size: Optional[int] = None,
+    ) -> Union[Response, BaseModel]:
+        if FileResolver.base_path not in directory.joinpath("..").parents:
+            return self.not_allowed_response()
+        elif FileResolver.metadata_path in directory.parents:
+            return self.not_allowed_response()
+        elif FileResolver.trashbin_path in directory.parents:
+            return self.not_allowed_response()
+        elif not await FileCRAD(self.session).isdir(directory):
+            return self.conflict_response()
+        elif size and size > self.ingest_max_archive_size:
+            return self.payload_too_large_response()
+        elif size and await self.oversized(size):
+            return self.payload_too_large_response()
+        else:
+            archive = FileResolver.get_upload_from_uuid(uuid.uuid4())
+            await os.makedirs(archive.parent, exist_ok=True)
+            try:
+                try:
+                    await Stream.write_file(
+                        archive, stream, size, max_size=self.ingest_max_archive_size
+                    )
+                except StreamLimitError as e:
+                    self.logger.warning(e)
+                    return self.payload_too_large_response()
+                try:
+                    members = await aioarchive.list_archive(
+                        archive, self.ingest_max_entries, self.ingest_max_size
+                    )
+                except ArchiveLimitError as e:
+                    self.logger.warning(e)
+                    return self.payload_too_large_response()
+                except (ValueError, OSError) as e:
+                    self.logger.warning(e)
+                    return self.bad_request_response()
+
+                top = [
+                    directory.joinpath(*x.parts)
+                    for x, _ in members
+                    if len(x.parts) == 1
+                ]
+                files = [directory.joinpath(*x.parts) for x, _ in members]
+                async with FileLockTransaction(directory, session=self.session):
+                    if await FileCRAD(self.session).existing(files):
+                        return self.conflict_response()
+                    for file in top:
+                        if await os.path.exists(file):
+                            return self.conflict_response()
+                    try:
+                        async with FileGuard(*top):
+                            start = time.perf_counter()
+                            entries = await aioarchive.extract_archive(
+                                archive, directory, max_size=self.ingest_max_size
+                            )
+                            await self.ingest_entries(directory, members, entries)
+                            elapsed = time.perf_counter() - start
+                    except ArchiveLimitError as e:
+                        self.logger.warning(e)
+                        return self.payload_too_large_response()
+                self.logger.info(
+                    f"Ingested {directory} {len(entries)} files "
+                    f"{len(members) - len(entries)} directories {elapsed:.2f}s"
+                )
+                return self.created_response()
+            finally:
+                await os.remove(archive)
+
+    async def ingest_entries(
+        self,
+        directory: Path,
+        members: Sequence[tuple[PurePosixPath, bool]],
+        entries: Mapping[PurePosixPath, tuple[int, str, str]],
+        chunk: int = 1000,
+    ):
+        try:
+            for i in range(0, len(members), chunk):
+                await self.ingest_batch(directory, members[i : i + chunk], entries)
+        except Exception:
+            await self.session.rollback()
+            top = [
+                directory.joinpath(*x.parts) for x, _ in members if len(x.parts) == 1
+            ]
+            blobs: list[Path] = []
+            for file in await FileCRAD(self.session).existing(top):
+                blobs.extend(await FileCRAD(self.session).delete(file))
+            await self.session.commit()
+            for blob in blobs:
+                ThumbnailCache.discard(blob)
+                await shutil.rmtree(blob, ignore_errors=True)
+            raise
+
+    async def ingest_batch(
+        self,
+        directory: Path,
+        members: Sequence[tuple[PurePosixPath, bool]],
+        entries: Mapping[PurePosixPath, tuple[int, str, str]],
+    ):
+        deferred = MetadataFile.deferred
+        paths = [x for x, is_dir in members if not is_dir]
+        digests = sorted({entries[x][1] for x in paths})
+        refcounts = {x: 0 for x in digests}
+        for path in paths:
+            refcounts[entries[path][1]] += 1
+        candidates = {x: uuid.uuid4() for x in digests}
+        claimed = await BlobCRAD(self.session).add_all(
+            [(x, candidates[x], refcounts[x]) for x in digests]
+        )
+        blobs = {x: uuid.UUID(str(claimed[x])) for x in digests}
+        created = [x for x in digests if blobs[x] == candidates[x]]
+
+        nodes: list[tuple[Path, Optional[uuid.UUID], int]] = []
+        metadata_models: list[MetadataModel] = []
+        blob_models: list[MetadataModel] = []
+        for path, is_dir in members:
+            file = directory.joinpath(*path.parts)
+            if is_dir:
+                nodes.append((file, None, 0))
+            else:
+                size, sha256, _ = entries[path]
+                nodes.append((file, blobs[sha256], size))
+
+        sources = {entries[x][1]: x for x in reversed(paths)}
+        metadata = [FileResolver.get_metadata_from_uuid(blobs[x]) for x in created]
+        async with FileGuard(*metadata):
+            for sha256 in created:
+                file = directory.joinpath(*sources[sha256].parts)
+                size, _, media_type = entries[sources[sha256]]
+                metadata_model = MetadataModel(
+                    id=blobs[sha256],
+                    suffix=file.suffix,
+                    size=size,
+                    sha256=sha256,
+                    video=False,
+                    image=False,
+                    internet_media_type=media_type,
+                )
+                if not deferred:
+                    metadata_file = await MetadataFile.factory(file)
+                    metadata_model = metadata_model.model_copy(
+                        update={
+                            "data": metadata_file.to_dict(),
+                            "video": metadata_file.is_video(),
+                            "image": metadata_file.is_image(),
+                            "internet_media_type": (
+                                metadata_file.get_internet_media_type()
+                            ),
+                        }
+                    )
+                bin_model = metadata_model.model_copy(update={"id": uuid.uuid4()})
+                blob = FileResolver.get_metadata_from_uuid(metadata_model.id)
+                bin = blob.joinpath(f"bin{file.suffix}")
+                await os.makedirs(blob)
+                await clone.clonefile(file, bin)
+                metadata_models.extend([metadata_model, bin_model])
+                blob_models.append(metadata_model)
+                nodes.extend([(blob, None, 0), (bin, bin_model.id, size)])
+
+            await FileCRAD(self.session).bulk_insert(nodes, metadata_models)
+            for metadata_model in blob_models:
+                if deferred:
+                    task_model = SlowTaskModel(
+                        type="metadata_extract",
+                        metadata_id=metadata_model.id,
+                    )
+                    self.session.add(SlowTaskORM.from_model(task_model))
+                if metadata_model.video:
                     task_model = SlowTaskModel(
                         type="video_convert",
-                        metadata_id=model.id,
+                        metadata_id=metadata_model.id,
                     )
                     self.session.add(SlowTaskORM.from_model(task_model))
-                if model.image:
-                    self.session.add_all(all_classification(model.id))
+                if metadata_model.image:
+                    self.session.add_all(all_classification(metadata_model.id))
+                if not deferred:
+                    self.session.add_all(thumbnail_task(metadata_model.id))
+            await self.session.commit()
 
+    @error_decorator
+    async def create_upload(
+        self, file_path: Path, size: int, chunk_size: int
+    ) -> Union[Response, BaseModel]:
+        if FileResolver.base_path not in file_path.joinpath("..").parents:
+            return self.not_allowed_response()
+        elif FileResolver.metadata_path in file_path.parents:
+            return self.not_allowed_response()
+        elif FileResolver.trashbin_path in file_path.parents:
+            return self.not_allowed_response()
+        elif size < 0 or chunk_size <= 0:
+            return self.bad_request_response()
+        elif await FileCRAD(self.session).exists(file_path):
+            return self.conflict_response()
+        elif not await FileCRAD(self.session).isdir(file_path.parent):
+            return self.conflict_response()
+        elif await self.oversized(size):
+            return self.payload_too_large_response()
+        else:
+            upload = UploadModel(
+                filename=file_path,
+                size=size,
+                chunk_size=chunk_size,
+                expires_at=datetime.now() + timedelta(seconds=self.upload_expire),
+            )
+            temp = FileResolver.get_upload_from_uuid(upload.id)
+            await os.makedirs(temp.parent, exist_ok=True)
+            await Stream.allocate_file(temp, size)
+            UploadCRAD(self.session).add(upload)
+            await self.session.commit()
+            UploadDigest.start(upload.id, upload.expires_at)
+            return self.data_response(await UploadCRAD(self.session).status(upload))
+
+    @error_decorator
+    async def upload_status(self, id: uuid.UUID) -> Union[Response, BaseModel]:
+        upload = await UploadCRAD(self.session).get(id)
+        if upload is None:
+            return self.not_found_response()
+        return self.data_response(await UploadCRAD(self.session).status(upload))
+
+    @error_decorator
+    async def append_upload(
+        self, id: uuid.UUID, number: int, stream: AsyncGenerator[bytes, None]
+    ) -> Union[Response, BaseModel]:
+        upload = await UploadCRAD(self.session).get(id)
+        if upload is None:
+            return self.not_found_response()
+        elif number < 0 or number >= upload.chunks:
+            return self.bad_request_response()
+        else:
+            temp = FileResolver.get_upload_from_uuid(id)
+            async with FileLockTransaction(
+                temp.joinpath(str(number)), session=self.session
+            ):
+                if await UploadCRAD(self.session).get(id) is None:
+                    return self.not_found_response()
+                start, end = upload.chunk(number)
+                sha256 = hashlib.sha256()
+                running = UploadDigest.get(id, number)
+                hashes = [sha256] if running is None else [sha256, running]
+                if not await Stream.write_range(temp, start, end, stream, *hashes):
+                    return self.bad_request_response()
+                expires_at = datetime.now() + timedelta(seconds=self.upload_expire)
+                digest = sha256.hexdigest()
+                await UploadCRAD(self.session).receive(id, number, digest, expires_at)
                 await self.session.commit()
-            return self.created_response()
+                if running is not None:
+                    UploadDigest.advance(id, number, running, digest, expires_at)
+                upload.expires_at = expires_at
+                return self.data_response(await UploadCRAD(self.session).status(upload))
+
+    @error_decorator
+    async def finalize_upload(self, id: uuid.UUID) -> Union[Response, BaseModel]:
+        upload = await UploadCRAD(self.session).get(id)
+        if upload is None:
+            return self.not_found_response()
+        elif len(await UploadCRAD(self.session).received(id)) != upload.chunks:
+            return self.conflict_response()
+        elif await FileCRAD(self.session).exists(upload.filename):
+            return self.conflict_response()
+        else:
+            temp = FileResolver.get_upload_from_uuid(id)
+            async with FileLockTransaction(upload.filename, temp, session=self.session):
+                if await UploadCRAD(self.session).get(id) is None:
+                    return self.not_found_response()
+                digests = await UploadCRAD(self.session).digests(id)
+                if len(digests) != upload.chunks:
+                    return self.conflict_response()
+                elif await FileCRAD(self.session).exists(upload.filename):
+                    return self.conflict_response()
+                digest = UploadDigest.digest(id, digests)
+                if digest is None:
+                    digest = await aiodigest.sha256sum(temp)
+                await UploadCRAD(self.session).delete(id)
+                await self.session.commit()
+                async with FileGuard(temp):
+                    await os.rename(temp, upload.filename)
+                return await self.register(upload.filename, digest)
+
+    @error_decorator
+    async def abort_upload(self, id: uuid.UUID) -> Union[Response, BaseModel]:
+        upload = await UploadCRAD(self.session).get(id)
+        if upload is None:
+            return self.not_found_response()
+        temp = FileResolver.get_upload_from_uuid(id)
+        async with FileLockTransaction(temp, session=self.session):
+            if await UploadCRAD(self.session).get(id) is None:
+                return self.not_found_response()
+            await UploadCRAD(self.session).delete(id)
+            await self.session.commit()
+            UploadDigest.discard(id)
+            if await os.path.isfile(temp):
+                await os.remove(temp)
+        return self.success_response()
 
     @error_decorator
     async def download(
-        self, file_path: Path
-    ) -> Union[Response, BaseModel, StreamingResponse]:
+        self, file_path: Path, archive: Optional[str] = None
+    ) -> Union[Response, BaseModel, SendfileResponse]:
         if FileResolver.base_path not in file_path.joinpath("..").parents:
             return self.not_allowed_response()
+        elif archive is not None:
+            return await self.download_archive(file_path, archive)
         elif not await FileCRAD(self.session).isfile(file_path):
             return self.not_found_response()
         else:
-            if self.request.headers.get("Range"):
-                file = await FileCRAD(self.session).getfile(file_path)
-                start, end = self.request.headers["Range"].split("=")[1].split("-")
-                start = int(start) if start else 0
-                e = min(file.metadata.size, start + FileResponse.chunk_size * 2)
-                end = int(end) if end else e
+            file = await FileCRAD(self.session).getfile(file_path, with_data=False)
+            etag = ETag.file(file)
+            if self.not_modified(etag, file.file.created_at):
+                return self.not_modified_response(etag)
+
+            size = file.metadata.size
+            last_modified = RFC1123(file.file.created_at).rfc_1123()
+            headers = {
+                "Accept-Ranges": "bytes",
+                "Content-Type": file.metadata.internet_media_type,
+                "ETag": etag,
+                "Last-Modified": last_modified,
+            }
+
+            value = self.request.headers.get("Range")
+            if value is None or not self.if_range(etag, last_modified):
+                ranges = None
             else:
-                file = await FileCRAD(self.session).getfile(file_path)
-                start = 0
-                end = min(file.metadata.size, start + FileResponse.chunk_size * 2)
-
-            return StreamingResponse(
-                Stream.read_file(file_path, start, end),
-                headers={
-                    "Content-Range": f"bytes {start}-{end }/{file.metadata.size}",
-                    "Accept-Ranges": "bytes",
-                    "Content-Length": str(end - start),
-                    "Content-Type": file.metadata.internet_media_type,
-                },
-            )
+                ranges = ByteRange.parse(value, size)
+
+            if ranges is None:
+                return SendfileResponse(
+                    file_path,
+                    0,
+                    size,
+                    headers={**headers, "Content-Length": str(size)},
+                )
+            elif len(ranges) == 0:
+                return self.range_not_satisfiable_response(size)
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                return SendfileResponse(
+                    file_path,
+                    start,
+                    end,
+                    status_code=206,
+                    headers={
+                        **headers,
+                        "Content-Range": ByteRange.content_range(start, end, size),
+                        "Content-Length": str(end - start),
+                    },
+                )
+            else:
+                return MultipartSendfileResponse(
+                    file_path,
+                    ranges,
+                    size,
+                    file.metadata.internet_media_type,
+                    headers=headers,
+                )
+
+    async def download_archive(
+        self, directory: Path, archive: str
+    ) -> Union[Response, BaseModel, StreamingResponse]:
+        if archive != "zip":
+            return self.bad_request_response()
+        elif not await FileCRAD(self.session).isdir(directory):
+            return self.not_found_response()
+
+        hidden = [
+            x
+            for x in [FileResolver.metadata_path, FileResolver.trashbin_path]
+            if x != directory and x not in directory.parents
+        ]
+        members = []
+        async for data in FileCRAD(self.session).walk_detailed(
+            directory, with_data=False
+        ):
+            file = data.file.filename
+            if any(x == file or x in file.parents for x in hidden):
+                continue
+            name = file.relative_to(directory).as_posix()
+            if isinstance(data, DirectoryResponseModel):
+                members.append((f"{name}/", None, 0, data.file.created_at))
+            else:
+                size = data.metadata.size
+                members.append((name, file, size, data.file.created_at))
+        members.sort(key=lambda x: x[0])
+
+        stream = ZipStream(members)
+        filename = quote(f"{directory.name or 'archive'}.zip")
+        return StreamingResponse(
+            stream.generate(),
+            media_type="application/zip",
+            headers={
+                "Content-Length": str(stream.length),
+                "Content-Disposition": f"attachment; filename*=UTF-8''{filename}",
+            },
+        )
+
+    @error_decorator
+    async def thumbnail(
+        self, file_path: Path, size: int, format: str
+    ) -> Union[Response, BaseModel, SendfileResponse]:
+        if FileResolver.base_path not in file_path.joinpath("..").parents:
+            return self.not_allowed_response()
+        elif format not in THUMBNAIL_FORMATS or size <= 0:
+            return self.bad_request_response()
+        elif not await FileCRAD(self.session).isfile(file_path):
+            return self.not_found_response()
+
+        file = await FileCRAD(self.session).getfile(file_path, with_data=False)
+        size = bucket(size)
+        etag = f'"{file.metadata.sha256 or file.metadata.id}-{size}.{format}"'
+        if self.not_modified(etag, file.file.created_at):
+            return self.not_modified_response(etag)
+
+        source = await ThumbnailCache.source(file.metadata)
+        if source is None:
+            return self.not_found_response()
+        dst = ThumbnailCache.path(file.metadata.id, size, format)
+        try:
+            await ThumbnailCache.get(source, dst, size, format)
+        except (OSError, ValueError) as e:
+            self.logger.warning(e)
+            return self.not_found_response()
+
+        length = (await os.stat(dst)).st_size
+        return SendfileResponse(
+            dst,
+            0,
+            length,
+            headers={
+                "Content-Type": THUMBNAIL_FORMATS[format][1],
+                "Content-Length": str(length),
+                "ETag": etag,
+                "Last-Modified": RFC1123(file.file.created_at).rfc_1123(),
+                "Cache-Control": "private, max-age=86400",
+            },
+        )
 
     @error_decorator
     async def delete(self, file_path: Path) -> Union[Response, BaseModel]:
@@ -183,34 +708,42 @@ class FileService:
         elif not await FileCRAD(self.session).exists(file_path):
             return self.not_found_response()
         else:
-            async with FileLockTransaction(SQLDepends.state, file_path):
-                if FileResolver.trashbin_path == file_path:
-                    await FileCRAD(self.session).empty(file_path)
+            blobs: list[Path] = []
+            async with FileLockTransaction(file_path, session=self.session):
+                if not await FileCRAD(self.session).exists(file_path):
+                    return self.not_found_response()
+                elif not await self.submitted(file_path, deep=True):
+                    return self.locked_response()
+                elif FileResolver.trashbin_path == file_path:
+                    blobs = await FileCRAD(self.session).empty(file_path)
                     await self.session.commit()
                     await shutil.rmtree(file_path)
                     await os.makedirs(file_path)
                 elif await FileCRAD(self.session).isempty(file_path):
-                    await FileCRAD(self.session).delete(file_path)
+                    blobs = await FileCRAD(self.session).delete(file_path)
                     await self.session.commit()
                     await shutil.rmtree(file_path)
                 elif FileResolver.trashbin_path in file_path.parents:
                     if await FileCRAD(self.session).isdir(file_path):
-                        await FileCRAD(self.session).delete(file_path)
+                        blobs = await FileCRAD(self.session).delete(file_path)
                         await self.session.commit()
                         await shutil.rmtree(file_path)
                     else:
-                        await FileCRAD(self.session).delete(file_path)
+                        blobs = await FileCRAD(self.session).delete(file_path)
                         await self.session.commit()
                         await os.remove(file_path)
                 else:
                     exists = FileCRAD(self.session).exists
                     trash = await FileResolver.get_trashbin_from_data(file_path, exists)
                     await os.makedirs(trash.parent)
-                    await FileCRAD(self.session).mkdir(trash.parent)
+                    await FileCRAD(self.session).makedirs(trash.parent)
                     await shutil.move(file_path, trash)
                     async with FileMoveGuard(file_path, trash):
                         await FileCRAD(self.session).move(file_path, trash)
                         await self.session.commit()
+            for blob in blobs:
+                ThumbnailCache.discard(blob)
+                await shutil.rmtree(blob, ignore_errors=True)
             return self.success_response()
 
     @error_decorator
@@ -227,10 +760,15 @@ class FileService:
             elif not await FileCRAD(self.session).isdir(file_path.parent):
                 return self.not_allowed_response()
             else:
-                async with FileGuard(file_path):
-                    await os.makedirs(file_path)
-                    await FileCRAD(self.session).mkdir(file_path)
-                    await self.session.commit()
+                async with FileLockTransaction(file_path, session=self.session):
+                    if await FileCRAD(self.session).exists(file_path):
+                        return self.conflict_response()
+                    elif not await self.submitted(file_path):
+                        return self.locked_response()
+                    async with FileGuard(file_path):
+                        await os.makedirs(file_path)
+                        await FileCRAD(self.session).mkdir(file_path)
+                        await self.session.commit()
             return self.success_response()
 
     @error_decorator
@@ -252,12 +790,21 @@ class FileService:
         elif await FileCRAD(self.session).exists(rename_path):
             return self.conflict_response()
         else:
-            async with FileLockTransaction(SQLDepends.state, file_path):
-                async with FileLockTransaction(SQLDepends.state, rename_path):
-                    await shutil.move(file_path, rename_path)
-                    async with FileMoveGuard(file_path, rename_path):
-                        await FileCRAD(self.session).move(file_path, rename_path)
-                        await self.session.commit()
+            async with FileLockTransaction(
+                file_path, rename_path, session=self.session
+            ):
+                if not await FileCRAD(self.session).exists(file_path):
+                    return self.conflict_response()
+                elif await FileCRAD(self.session).exists(rename_path):
+                    return self.conflict_response()
+                elif not await self.submitted(file_path, deep=True):
+                    return self.locked_response()
+                elif not await self.submitted(rename_path, deep=True):
+                    return self.locked_response()
+                await shutil.move(file_path, rename_path)
+                async with FileMoveGuard(file_path, rename_path):
+                    await FileCRAD(self.session).move(file_path, rename_path)
+                    await self.session.commit()
             return self.success_response()
 
     @error_decorator
@@ -279,10 +826,20 @@ class FileService:
         elif await FileCRAD(self.session).exists(copy_path):
             return self.conflict_response()
         else:
-            async with FileLockTransaction(SQLDepends.state, file_path):
-                async with FileLockTransaction(SQLDepends.state, copy_path):
-                    async with FileGuard(copy_path):
+            async with FileLockTransaction(
+                copy_path, shared=[file_path], session=self.session
+            ):
+                if not await FileCRAD(self.session).exists(file_path):
+                    return self.conflict_response()
+                elif await FileCRAD(self.session).exists(copy_path):
+                    return self.conflict_response()
+                elif not await self.submitted(copy_path, deep=True):
+                    return self.locked_response()
+                async with FileGuard(copy_path):
+                    if await os.path.isdir(file_path):
+                        await shutil.copytree(file_path, copy_path)
+                    else:
                         await shutil.copy2(file_path, copy_path)
-                        await FileCRAD(self.session).copy(file_path, copy_path)
-                        await self.session.commit()
+                    await FileCRAD(self.session).copy(file_path, copy_path)
+                    await self.session.commit()
             return self.success_response()
@@ -1,15 +1,14 @@
+import asyncio
 from pathlib import Path
 
-from src.util.aiometadata import (
-    get_iptc_info,
-    get_media_info,
-    get_mutagen_metadata,
-    get_pillow_metadata,
-)
+from src.models.environ import Environ
+from src.util.aiometadata import executor, get_media_info, get_metadata, semaphore
 from src.util.ffmpeg import FFmpegWrapper
 
 
 class MetadataFile:
+    deferred = Environ().METADATA_DEFERRED and Environ().JOB_ENABLE
+
     def __init__(
         self,
         path: Path,
@@ -46,11 +45,20 @@ class MetadataFile:
 
     @classmethod
     async def factory(cls, path: Path):
+        (kind, mutagen, pillow, iptc_info), media_info = await asyncio.gather(
+            get_metadata(path, executor=executor),
+            get_media_info(path, executor=executor),
+        )
+        if kind in ["media", "animation", "unknown"]:
+            async with semaphore:
+                ffmpeg = await FFmpegWrapper.from_file(path)
+        else:
+            ffmpeg = FFmpegWrapper.empty(path)
         return cls(
             path=path,
-            ffmpeg=await FFmpegWrapper.from_file(path),
-            media_info=await get_media_info(path),
-            mutagen=await get_mutagen_metadata(path),
-            pillow=await get_pillow_metadata(path),
-            iptc_info=await get_iptc_info(path),
+            ffmpeg=ffmpeg,
+            media_info=media_info,
+            mutagen=mutagen,
+            pillow=pillow,
+            iptc_info=iptc_info,
         )
@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from os import sep
+from pathlib import Path
+from typing import Optional
+
+from aiofiles import os
+
+from src.models.metadata import MetadataModel
+from src.util import aiothumbnail
+from src.util.file import FileResolver
+
+
+class ThumbnailCache:
+    budget: int = 0
+    pregenerate: bool = False
+    size: int = 256
+    format: str = "webp"
+    data: OrderedDict[str, int] = OrderedDict()
+    total: int = 0
+    pending: dict[str, asyncio.Task] = {}
+    hits: int = 0
+    misses: int = 0
+
+    @staticmethod
+    async def init(budget: int, pregenerate: bool = False):
+        ThumbnailCache.budget = budget
+        ThumbnailCache.pregenerate = pregenerate
+        ThumbnailCache.data = OrderedDict()
+        ThumbnailCache.total = 0
+        ThumbnailCache.pending = {}
+        ThumbnailCache.hits = 0
+        ThumbnailCache.misses = 0
+        for file, size in await aiothumbnail.scan_thumbnails(
+            FileResolver.metadata_path
+        ):
+            ThumbnailCache.data[str(file)] = size
+            ThumbnailCache.total += size
+        await ThumbnailCache.evict()
+
+    @staticmethod
+    def path(metadata_id: uuid.UUID, size: int, format: str) -> Path:
+        metadata = FileResolver.get_metadata_from_uuid(metadata_id)
+        return metadata.joinpath(f"thumbnail_{size}.{format}")
+
+    @staticmethod
+    async def source(metadata: MetadataModel) -> Optional[Path]:
+        directory = FileResolver.get_metadata_from_uuid(metadata.id)
+        if metadata.video:
+            source = directory.joinpath("thumbnail_normal.png")
+        elif metadata.image or metadata.internet_media_type.startswith("image/"):
+            source = directory.joinpath(f"bin{metadata.suffix}")
+        else:
+            return None
+        return source if await os.path.isfile(source) else None
+
+    @staticmethod
+    async def get(source: Path, dst: Path, size: int, format: str) -> Path:
+        key = str(dst)
+        if key in ThumbnailCache.data and await ThumbnailCache.fresh(source, dst):
+            ThumbnailCache.hits += 1
+            ThumbnailCache.data.move_to_end(key)
+            return dst
+
+        ThumbnailCache.misses += 1
+        task = ThumbnailCache.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                ThumbnailCache.generate(source, dst, size, format)
+            )
+            ThumbnailCache.pending[key] = task
+            task.add_done_callback(lambda _: ThumbnailCache.pending.pop(key, None))
+        await asyncio.shield(task)
+        return dst
+
+    @staticmethod
+    async def fresh(source: Path, dst: Path) -> bool:
+        try:
+            stat = await os.stat(dst)
+        except FileNotFoundError:
+            ThumbnailCache.total -= ThumbnailCache.data.pop(str(dst), 0)
+            return False
+        return stat.st_mtime >= (await os.stat(source)).st_mtime
+
+    @staticmethod
+    async def generate(source: Path, dst: Path, size: int, format: str):
+        written = await aiothumbnail.make_thumbnail(
+            source, dst, size, format, executor=aiothumbnail.executor
+        )
+        key = str(dst)
+        ThumbnailCache.total += written - ThumbnailCache.data.get(key, 0)
+        ThumbnailCache.data[key] = written
+        ThumbnailCache.data.move_to_end(key)
+        await ThumbnailCache.evict(keep=key)
+
+    @staticmethod
+    async def evict(keep: str = ""):
+        while ThumbnailCache.total > ThumbnailCache.budget:
+            key = next((x for x in ThumbnailCache.data if x != keep), None)
+            if key is None:
+                break
+            ThumbnailCache.total -= ThumbnailCache.data.pop(key)
+            try:
+                await os.remove(key)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def discard(directory: Path):
+        prefix = str(directory) + sep
+        for x in [x for x in ThumbnailCache.data if x.startswith(prefix)]:
+            ThumbnailCache.total -= ThumbnailCache.data.pop(x)
+
+    @staticmethod
+    def stats():
+        return {
+            "size": ThumbnailCache.total,
+            "budget": ThumbnailCache.budget,
+            "count": len(ThumbnailCache.data),
+            "hits": ThumbnailCache.hits,
+            "misses": ThumbnailCache.misses,
+        }
@@ -0,0 +1,51 @@
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Optional
+
+
+class UploadDigest:
+    state: dict[uuid.UUID, tuple[int, "hashlib._Hash", list[str], datetime]] = {}
+
+    @staticmethod
+    def start(id: uuid.UUID, expires_at: datetime):
+        now = datetime.now()
+        for key, (_, _, _, deadline) in list(UploadDigest.state.items()):
+            if deadline <= now:
+                del UploadDigest.state[key]
+        UploadDigest.state[id] = (0, hashlib.sha256(), [], expires_at)
+
+    @staticmethod
+    def get(id: uuid.UUID, number: int) -> Optional["hashlib._Hash"]:
+        state = UploadDigest.state.get(id)
+        if state is None or state[0] != number:
+            return None
+        return state[1].copy()
+
+    @staticmethod
+    def advance(
+        id: uuid.UUID,
+        number: int,
+        sha256: "hashlib._Hash",
+        digest: str,
+        expires_at: datetime,
+    ):
+        state = UploadDigest.state.get(id)
+        if state is not None and state[0] == number:
+            UploadDigest.state[id] = (
+                number + 1,
+                sha256,
+                [*state[2], digest],
+                expires_at,
+            )
+
+    @staticmethod
+    def digest(id: uuid.UUID, digests: list[Optional[str]]) -> Optional[str]:
+        state = UploadDigest.state.pop(id, None)
+        if state is None or state[2] != digests:
+            return None
+        return state[1].hexdigest()
+
+    @staticmethod
+    def discard(id: uuid.UUID):
+        UploadDigest.state.pop(id, None)
@@ -0,0 +1,134 @@
+import uuid
+from typing import Optional
+
+from sqlalchemy import Select, and_, bindparam, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+from sqlalchemy.sql import delete, select, update
+
+from src.models.blob import BlobModel, BlobORM
+from src.models.file import FileORM
+
+
+class BlobCRAD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def upsert(self):
+        table = BlobORM.__table__
+        dialect = self.session.bind.dialect.name
+        if dialect in ("mysql", "mariadb"):
+            blob_state = mysql.insert(table)
+            return blob_state.on_duplicate_key_update(
+                refcount=table.c.refcount + blob_state.inserted.refcount
+            )
+        elif dialect == "sqlite":
+            blob_state = sqlite.insert(table)
+            return blob_state.on_conflict_do_update(
+                index_elements=[table.c.sha256],
+                set_={"refcount": table.c.refcount + blob_state.excluded.refcount},
+            )
+        elif dialect == "postgresql":
+            blob_state = postgresql.insert(table)
+            return blob_state.on_conflict_do_update(
+                index_elements=[table.c.sha256],
+                set_={"refcount": table.c.refcount + blob_state.excluded.refcount},
+            )
+        else:
+            raise NotImplementedError(f"Unsupported dialect: {dialect}")
+
+    async def add(self, sha256: str, metadata_id: uuid.UUID, refcount: int = 1) -> str:
+        blobs = await self.add_all([(sha256, metadata_id, refcount)])
+        return blobs[sha256]
+
+    async def add_all(
+        self, blobs: list[tuple[str, uuid.UUID, int]], chunk: int = 1000
+    ) -> dict[str, str]:
+        rows = [
+            BlobModel(sha256=sha256, metadata_id=metadata_id, refcount=refcount)
+            for sha256, metadata_id, refcount in blobs
+        ]
+        for i in range(0, len(rows), chunk):
+            await self.session.execute(
+                self.upsert(),
+                [
+                    {**x.model_dump(mode="json"), "created_at": x.created_at}
+                    for x in rows[i : i + chunk]
+                ],
+            )
+        return await self.lookup([x.sha256 for x in rows], chunk)
+
+    async def lookup(self, digests: list[str], chunk: int = 1000) -> dict[str, str]:
+        blobs: dict[str, str] = {}
+        for i in range(0, len(digests), chunk):
+            blob_state = (
+                select(BlobORM.sha256, BlobORM.metadata_id)
+                .where(BlobORM.sha256.in_(digests[i : i + chunk]))
+                .where(BlobORM.refcount > 0)
+            )
+            blobs.update((await self.session.execute(blob_state)).tuples().all())
+        return blobs
+
+    async def acquire(self, sha256: str) -> Optional[str]:
+        blob_state = (
+            update(BlobORM)
+            .where(BlobORM.sha256 == sha256)
+            .where(BlobORM.refcount > 0)
+            .values(refcount=BlobORM.refcount + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if (await self.session.execute(blob_state)).rowcount == 0:
+            return None
+        blob_state = select(BlobORM.metadata_id).where(BlobORM.sha256 == sha256)
+        return (await self.session.execute(blob_state)).scalar()
+
+    async def count(self, subtree: Select):
+        file_state = (
+            select(BlobORM.metadata_id, BlobORM.refcount, func.count(FileORM.id))
+            .join(BlobORM, BlobORM.metadata_id == FileORM.metadata_id)
+            .where(FileORM.id.in_(subtree))
+            .group_by(BlobORM.metadata_id, BlobORM.refcount)
+        )
+        return (await self.session.execute(file_state)).all()
+
+    async def adjust(self, counts: list[tuple[str, int]]):
+        if not counts:
+            return
+        table = BlobORM.__table__
+        blob_state = (
+            update(table)
+            .where(table.c.metadata_id == bindparam("_metadata_id"))
+            .values(refcount=table.c.refcount + bindparam("_count"))
+        )
+        await self.session.execute(
+            blob_state,
+            [{"_metadata_id": x, "_count": count} for x, count in counts],
+        )
+
+    async def retain(self, subtree: Select):
+        counts = await self.count(subtree)
+        await self.adjust([(x, count) for x, _, count in counts])
+
+    async def release(self, subtree: Select, chunk: int = 1000) -> list[str]:
+        counts = await self.count(subtree)
+        await self.adjust([(x, -count) for x, _, count in counts])
+        orphans: list[str] = []
+        ids = [x for x, _, _ in counts]
+        for i in range(0, len(ids), chunk):
+            condition = and_(
+                BlobORM.metadata_id.in_(ids[i : i + chunk]), BlobORM.refcount <= 0
+            )
+            if self.session.bind.dialect.delete_returning:
+                blob_state = (
+                    delete(BlobORM).where(condition).returning(BlobORM.metadata_id)
+                )
+                orphans.extend((await self.session.execute(blob_state)).scalars())
+            else:
+                blob_state = select(BlobORM.metadata_id).where(condition)
+                data = (await self.session.execute(blob_state)).scalars().all()
+                blob_state = delete(BlobORM).where(BlobORM.metadata_id.in_(data))
+                await self.session.execute(blob_state)
+                orphans.extend(data)
+        return orphans
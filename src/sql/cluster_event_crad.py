@@ -0,0 +1,95 @@
+import time
+from datetime import datetime
+from os import sep
+from pathlib import Path
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import delete, insert, select
+
+from src.models.cluster_event import ClusterEventModel, ClusterEventORM
+from src.sql.path_cache import PathCache
+
+
+@event.listens_for(Session, "before_commit")
+def before_commit(session: Session):
+    files = session.info.get("path_cache")
+    if ClusterEventCRAD.enabled and files:
+        data = ClusterEventCRAD.collapse(files)
+        created_at = datetime.now()
+        rows = [{"filename": str(x), "created_at": created_at} for x in data]
+        session.execute(insert(ClusterEventORM), rows)
+
+
+class ClusterEventCRAD:
+    enabled: bool = False
+    seen: int = 0
+    missing: dict[int, float] = {}
+    expire: float = 60.0
+    received: int = 0
+
+    @staticmethod
+    def init(enabled: bool):
+        ClusterEventCRAD.enabled = enabled
+        ClusterEventCRAD.seen = 0
+        ClusterEventCRAD.missing = {}
+        ClusterEventCRAD.received = 0
+
+    @staticmethod
+    def collapse(files: list[Path]) -> list[Path]:
+        res: list[Path] = []
+        for file in sorted(set(files), key=str):
+            if not res or not str(file).startswith(str(res[-1]) + sep):
+                res.append(file)
+        return res
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def start(self):
+        if not ClusterEventCRAD.enabled:
+            return
+        event_state = select(func.max(ClusterEventORM.id))
+        ClusterEventCRAD.seen = (await self.session.execute(event_state)).scalar() or 0
+
+    async def receive(self):
+        if not ClusterEventCRAD.enabled:
+            return
+        now = time.monotonic()
+        missing = ClusterEventCRAD.missing
+        for id in [k for k, v in missing.items() if now - v > ClusterEventCRAD.expire]:
+            del missing[id]
+
+        event_state = (
+            select(ClusterEventORM)
+            .where(
+                or_(
+                    ClusterEventORM.id > ClusterEventCRAD.seen,
+                    ClusterEventORM.id.in_(list(missing)),
+                )
+            )
+            .order_by(ClusterEventORM.id)
+        )
+        data = (await self.session.execute(event_state)).scalars().all()
+        for event_model in [ClusterEventModel.model_validate_orm(x) for x in data]:
+            missing.pop(event_model.id, None)
+            if event_model.id > ClusterEventCRAD.seen:
+                for id in range(ClusterEventCRAD.seen + 1, event_model.id):
+                    missing[id] = now
+                ClusterEventCRAD.seen = event_model.id
+            PathCache.invalidate(event_model.filename)
+            ClusterEventCRAD.received += 1
+
+    async def prune(self, before: datetime):
+        event_state = select(func.max(ClusterEventORM.id))
+        last = (await self.session.execute(event_state)).scalar()
+        if last is None:
+            return
+        event_state = delete(ClusterEventORM).where(
+            ClusterEventORM.created_at < before,
+            ClusterEventORM.id < last,
+        )
+        await self.session.execute(event_state)
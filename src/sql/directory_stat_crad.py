@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import delete, insert, select, update
+
+from src.models.directory_stat import DirectoryStatModel, DirectoryStatORM
+from src.models.file import FileORM
+from src.models.file_tree import FileTreeORM
+from src.models.metadata import MetadataORM
+from src.sql.file_tree_crad import FileTreeCRAD
+
+
+class DirectoryStatCRAD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def isempty(self):
+        stat_state = select(DirectoryStatORM)
+        return (await self.session.execute(stat_state)).scalar() is None
+
+    async def total(self, file: Path) -> tuple[int, int]:
+        file_state = (
+            select(MetadataORM.size, DirectoryStatORM.size, DirectoryStatORM.count)
+            .select_from(FileORM)
+            .join(MetadataORM, MetadataORM.id == FileORM.metadata_id)
+            .outerjoin(DirectoryStatORM, DirectoryStatORM.file_id == FileORM.id)
+            .where(FileORM.filename == str(file))
+        )
+        size, stat_size, stat_count = (await self.session.execute(file_state)).one()
+        if stat_count is None:
+            return size, 1
+        return stat_size, stat_count
+
+    def add(self, file_id: uuid.UUID, last_update: datetime):
+        stat_model = DirectoryStatModel(file_id=file_id, last_update=last_update)
+        self.session.add(DirectoryStatORM.from_model(stat_model))
+
+    async def propagate(
+        self,
+        file: Path,
+        size: int,
+        count: int,
+        last_update: Optional[datetime] = None,
+        include_self: bool = False,
+    ):
+        pearent = file if include_self else file.parent
+        values = {
+            "size": DirectoryStatORM.size + size,
+            "count": DirectoryStatORM.count + count,
+        }
+        if last_update is not None:
+            values["last_update"] = case(
+                (DirectoryStatORM.last_update < last_update, last_update),
+                else_=DirectoryStatORM.last_update,
+            )
+
+        stat_state = (
+            update(DirectoryStatORM)
+            .where(
+                DirectoryStatORM.file_id.in_(
+                    FileTreeCRAD(self.session).ancestors_of(pearent)
+                )
+            )
+            .values(**values)
+        )
+        await self.session.execute(stat_state)
+
+    async def touch(self, directory: Path, last_update: datetime):
+        stat_state = (
+            update(DirectoryStatORM)
+            .where(
+                DirectoryStatORM.file_id.in_(
+                    FileTreeCRAD(self.session).subtree_of(directory)
+                )
+            )
+            .values(last_update=last_update)
+        )
+        await self.session.execute(stat_state)
+
+    async def clone(self, src: Path, ids: dict[str, str], last_update: datetime):
+        stat_state = select(
+            DirectoryStatORM.file_id, DirectoryStatORM.size, DirectoryStatORM.count
+        ).where(
+            DirectoryStatORM.file_id.in_(FileTreeCRAD(self.session).subtree_of(src))
+        )
+        stats = [
+            {
+                "file_id": ids[file_id],
+                "size": size,
+                "count": count,
+                "last_update": last_update,
+            }
+            for file_id, size, count in (await self.session.execute(stat_state)).all()
+        ]
+        if stats:
+            await self.session.execute(insert(DirectoryStatORM.__table__), stats)
+
+    async def remove(self, directory: Path, include_self: bool = True):
+        stat_state = delete(DirectoryStatORM).where(
+            DirectoryStatORM.file_id.in_(
+                FileTreeCRAD(self.session).subtree_of(directory, include_self)
+            )
+        )
+        await self.session.execute(stat_state)
+
+    async def repair(self):
+        await self.session.execute(delete(DirectoryStatORM))
+
+        directory = aliased(FileORM)
+        subtree = aliased(FileORM)
+        file_state = (
+            select(
+                directory.id,
+                func.coalesce(func.sum(MetadataORM.size), 0),
+                func.count(subtree.id),
+                func.max(subtree.created_at),
+            )
+            .select_from(directory)
+            .join(FileTreeORM, FileTreeORM.ancestor_id == directory.id)
+            .join(subtree, subtree.id == FileTreeORM.descendant_id)
+            .outerjoin(MetadataORM, MetadataORM.id == subtree.metadata_id)
+            .where(directory.directory == True)  # noqa
+            .group_by(directory.id)
+        )
+        stat_state = insert(DirectoryStatORM).from_select(
+            ["file_id", "size", "count", "last_update"],
+            file_state,
+        )
+        await self.session.execute(stat_state)
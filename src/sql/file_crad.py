@@ -1,20 +1,31 @@
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 from aiofiles import os
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, bindparam, case, or_
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
-from sqlalchemy.sql import delete, select
+from sqlalchemy.orm import defer
+from sqlalchemy.sql import delete, insert, select, update
 
+from src.models.directory_stat import DirectoryStatORM
 from src.models.file import FileModel, FileORM
+from src.models.file_tree import FileTreeORM
 from src.models.metadata import MetadataModel, MetadataORM
 from src.models.response import DirectoryResponseModel, FileResponseModel
+from src.models.slow_task import SlowTaskORM
+from src.models.tag import TagORM
 from src.service.metadata import MetadataFile
-from src.sql.sql import escape_path, sep
+from src.sql.blob_crad import BlobCRAD
+from src.sql.directory_stat_crad import DirectoryStatCRAD
+from src.sql.file_tree_crad import FileTreeCRAD
+from src.sql.path_cache import PathCache
+from src.sql.sql import rebase
+from src.util import aiodigest, aiometadata
+from src.util.file import FileResolver
 
 
 class FileCRAD:
@@ -25,64 +36,75 @@ class FileCRAD:
         file_state = select(FileORM).where(
             and_(
                 FileORM.directory == False,  # noqa
-                or_(
-                    FileORM.filename == str(directory),
-                    FileORM.filename.like(f"{escape_path(directory)}{sep}%"),
-                ),
+                FileORM.id.in_(FileTreeCRAD(self.session).subtree_of(directory)),
             )
         )
         return (await self.session.execute(file_state)).scalar() is None
 
+    async def lookup(self, file: Path) -> Optional[FileResponseModel]:
+        hit, data = PathCache.get(file)
+        if hit:
+            return data and data.model_copy(deep=True)
+
+        version = PathCache.version
+        file_state = (
+            select(FileORM, MetadataORM)
+            .join(MetadataORM, MetadataORM.id == FileORM.metadata_id)
+            .where(FileORM.filename == str(file))
+            .options(defer(MetadataORM.data))
+            .execution_options(populate_existing=True)
+        )
+        res = (await self.session.execute(file_state)).one_or_none()
+        if res is not None:
+            data = FileResponseModel(
+                file=FileModel.model_validate_orm(res[0]),
+                metadata=MetadataModel.model_validate_orm(res[1]),
+            )
+        if not self.session.info.get("path_cache"):
+            PathCache.set(file, data and data.model_copy(deep=True), version)
+        return data
+
+    def invalidate(self, file: Path):
+        PathCache.invalidate(file)
+        self.session.info.setdefault("path_cache", []).append(file)
+
     async def exists(self, file: Path):
-        file_state = select(FileORM).where(FileORM.filename == str(file))
-        return (await self.session.execute(file_state)).scalar() is not None
+        return await self.lookup(file) is not None
 
     async def isfile(self, file: Path):
-        file_state = select(FileORM).where(
-            and_(
-                FileORM.filename == str(file),
-                FileORM.directory == False,  # noqa
-            )
-        )
-        return (await self.session.execute(file_state)).scalar() is not None
+        data = await self.lookup(file)
+        return data is not None and not data.file.directory
 
     async def isdir(self, directory: Path):
-        file_state = select(FileORM).where(
-            and_(
-                FileORM.filename == str(directory),
-                FileORM.directory == True,  # noqa
-            )
-        )
-        return (await self.session.execute(file_state)).scalar() is not None
+        data = await self.lookup(directory)
+        return data is not None and data.file.directory
 
     async def getdir(self, file: Path):
-        file_state = select(FileORM).where(
-            and_(
-                FileORM.filename == str(file),
-                FileORM.directory == True,  # noqa
-            )
-        )
-        data = (await self.session.execute(file_state)).one()
-
         file_state = (
-            select(
-                func.max(FileORM.created_at),
-                func.sum(MetadataORM.size),
-                func.count(FileORM.id),
+            select(FileORM, DirectoryStatORM)
+            .join(DirectoryStatORM, DirectoryStatORM.file_id == FileORM.id)
+            .where(
+                and_(
+                    FileORM.filename == str(file),
+                    FileORM.directory == True,  # noqa
+                )
             )
-            .join(MetadataORM, MetadataORM.id == FileORM.metadata_id)
-            .where(FileORM.filename.like(f"{escape_path(file)}%"))
         )
-        metadata = (await self.session.execute(file_state)).one()
+        file_orm, stat_orm = (await self.session.execute(file_state)).one().tuple()
 
         return DirectoryResponseModel(
-            last_update=metadata[0],
-            size=metadata[1],
-            count=metadata[2],
-            file=FileModel.model_validate_orm(data.tuple()[0]),
+            last_update=stat_orm.last_update,
+            size=stat_orm.size,
+            count=stat_orm.count,
+            file=FileModel.model_validate_orm(file_orm),
         )
 
-    async def getfile(self, file: Path):
+    async def getfile(self, file: Path, with_data: bool = True):
+        if not with_data:
+            data = await self.lookup(file)
+            if data is not None:
+                return data
+
         file_state = (
             select(FileORM, MetadataORM)
             .join(MetadataORM, MetadataORM.id == FileORM.metadata_id)
@@ -99,20 +121,127 @@ class FileCRAD:
         data = (await self.session.execute(file_state)).all()
         return [FileModel.model_validate_orm(file_orm) for (file_orm,) in data]
 
-    async def put(self, file: Path, id: Optional[uuid.UUID] = None):
-        metadata = await MetadataFile.factory(file)
-        size = await os.stat(file)
+    async def listdir_detailed(self, directory: Path):
+        res: list[Union[DirectoryResponseModel, FileResponseModel]] = []
+        async for data in self.iterdir_detailed(directory):
+            res.append(data)
+        return res
 
-        metadata_model = MetadataModel(
-            id=id or uuid.uuid4(),
-            suffix=file.suffix,
-            size=size.st_size,
-            data=metadata.to_dict(),
-            video=metadata.is_video(),
-            image=metadata.is_image(),
-            internet_media_type=metadata.get_internet_media_type(),
-            created_at=datetime.now(),
+    async def iterdir_detailed(
+        self, directory: Path, yield_per: int = 1000, with_data: bool = True
+    ):
+        file_state = (
+            select(FileORM, MetadataORM, DirectoryStatORM)
+            .join(MetadataORM, MetadataORM.id == FileORM.metadata_id)
+            .outerjoin(DirectoryStatORM, DirectoryStatORM.file_id == FileORM.id)
+            .where(FileORM.pearent == str(directory))
+            .execution_options(yield_per=yield_per)
         )
+        if not with_data:
+            file_state = file_state.options(defer(MetadataORM.data))
+        async for file_orm, metadata_orm, stat_orm in await self.session.stream(
+            file_state
+        ):
+            yield self.to_response(file_orm, metadata_orm, stat_orm)
+
+    async def walk_detailed(
+        self, directory: Path, page_size: int = 1000, with_data: bool = True
+    ):
+        id = await FileTreeCRAD(self.session).getid(directory)
+        file_state = (
+            select(FileORM, MetadataORM, DirectoryStatORM)
+            .join(FileTreeORM, FileTreeORM.descendant_id == FileORM.id)
+            .join(MetadataORM, MetadataORM.id == FileORM.metadata_id)
+            .outerjoin(DirectoryStatORM, DirectoryStatORM.file_id == FileORM.id)
+            .where(
+                and_(
+                    FileTreeORM.ancestor_id == id,
+                    FileTreeORM.depth > 0,
+                )
+            )
+            .order_by(FileTreeORM.descendant_id)
+            .limit(page_size)
+        )
+        if not with_data:
+            file_state = file_state.options(defer(MetadataORM.data))
+        last = None
+        while True:
+            page_state = file_state
+            if last is not None:
+                page_state = page_state.where(FileTreeORM.descendant_id > last)
+            data = (await self.session.execute(page_state)).all()
+            for file_orm, metadata_orm, stat_orm in data:
+                yield self.to_response(file_orm, metadata_orm, stat_orm)
+            if len(data) < page_size:
+                break
+            last = data[-1][0].id
+
+    @staticmethod
+    def to_response(
+        file_orm: FileORM,
+        metadata_orm: MetadataORM,
+        stat_orm: Optional[DirectoryStatORM],
+    ):
+        if file_orm.directory:
+            return DirectoryResponseModel(
+                last_update=stat_orm.last_update,
+                size=stat_orm.size,
+                count=stat_orm.count,
+                file=FileModel.model_validate_orm(file_orm),
+            )
+        else:
+            return FileResponseModel(
+                file=FileModel.model_validate_orm(file_orm),
+                metadata=MetadataModel.model_validate_orm(metadata_orm),
+            )
+
+    async def put(
+        self,
+        file: Path,
+        id: Optional[uuid.UUID] = None,
+        sha256: Optional[str] = None,
+        source: Optional[MetadataModel] = None,
+        deferred: bool = False,
+    ):
+        size = await os.stat(file)
+        if source is None and deferred:
+            _, media_type = await aiometadata.sniff_type(
+                file, executor=aiometadata.executor
+            )
+            metadata_model = MetadataModel(
+                id=id or uuid.uuid4(),
+                suffix=file.suffix,
+                size=size.st_size,
+                sha256=sha256 or await aiodigest.sha256sum(file),
+                video=False,
+                image=False,
+                internet_media_type=media_type,
+                created_at=datetime.now(),
+            )
+        elif source is None:
+            metadata = await MetadataFile.factory(file)
+            metadata_model = MetadataModel(
+                id=id or uuid.uuid4(),
+                suffix=file.suffix,
+                size=size.st_size,
+                sha256=sha256 or await aiodigest.sha256sum(file),
+                data=metadata.to_dict(),
+                video=metadata.is_video(),
+                image=metadata.is_image(),
+                internet_media_type=metadata.get_internet_media_type(),
+                created_at=datetime.now(),
+            )
+        else:
+            metadata_model = source.model_copy(
+                update={
+                    "id": id or uuid.uuid4(),
+                    "suffix": file.suffix,
+                    "size": size.st_size,
+                    "sha256": sha256 or source.sha256,
+                    "created_at": datetime.now(),
+                },
+                deep=True,
+            )
 
         file_model = FileModel(
             metadata_id=metadata_model.id,
@@ -120,11 +249,173 @@ class FileCRAD:
             pearent=file.parent,
             directory=False,
         )
+        file_model.parent_id = await FileTreeCRAD(self.session).link(
+            file_model.id, file.parent
+        )
 
         self.session.add(FileORM.from_model(file_model))
         self.session.add(MetadataORM.from_model(metadata_model))
+        await DirectoryStatCRAD(self.session).propagate(
+            file, metadata_model.size, 1, file_model.created_at
+        )
+        self.invalidate(file)
         return metadata_model
 
+    async def refresh(self, metadata_id: uuid.UUID, file: Path) -> MetadataFile:
+        metadata = await MetadataFile.factory(file)
+        file_state = select(FileORM.filename, FileORM.metadata_id).where(
+            or_(
+                FileORM.metadata_id == str(metadata_id),
+                FileORM.filename == str(file),
+            )
+        )
+        files = (await self.session.execute(file_state)).all()
+
+        metadata_state = (
+            update(MetadataORM)
+            .where(
+                MetadataORM.id.in_([str(metadata_id), *(x for _, x in files)]),
+            )
+            .values(
+                data=metadata.to_dict(),
+                video=metadata.is_video(),
+                image=metadata.is_image(),
+                internet_media_type=metadata.get_internet_media_type(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(metadata_state)
+        for filename, _ in files:
+            self.invalidate(Path(filename))
+        return metadata
+
+    async def attach(self, file: Path, metadata_id: str):
+        metadata_state = select(MetadataORM.size).where(MetadataORM.id == metadata_id)
+        size = (await self.session.execute(metadata_state)).scalar_one()
+
+        file_model = FileModel(
+            metadata_id=uuid.UUID(metadata_id),
+            filename=file,
+            pearent=file.parent,
+            directory=False,
+        )
+        file_model.parent_id = await FileTreeCRAD(self.session).link(
+            file_model.id, file.parent
+        )
+
+        self.session.add(FileORM.from_model(file_model))
+        await DirectoryStatCRAD(self.session).propagate(
+            file, size, 1, file_model.created_at
+        )
+        self.invalidate(file)
+
+    async def existing(self, files: list[Path], chunk: int = 1000) -> list[Path]:
+        res: list[Path] = []
+        for i in range(0, len(files), chunk):
+            file_state = select(FileORM.filename).where(
+                FileORM.filename.in_([str(x) for x in files[i : i + chunk]])
+            )
+            res.extend(
+                Path(x) for x in (await self.session.execute(file_state)).scalars()
+            )
+        return res
+
+    async def bulk_insert(
+        self,
+        nodes: list[tuple[Path, Optional[uuid.UUID], int]],
+        metadata_models: list[MetadataModel],
+    ):
+        now = datetime.now()
+        nodes = sorted(nodes, key=lambda x: len(x[0].parts))
+        created = {str(file) for file, _, _ in nodes}
+        pearents = {str(file.parent) for file, _, _ in nodes} - created
+        tree_state = (
+            select(FileORM.filename, FileTreeORM.ancestor_id, FileTreeORM.depth)
+            .join(FileTreeORM, FileTreeORM.descendant_id == FileORM.id)
+            .where(FileORM.filename.in_(pearents))
+        )
+        ancestors: dict[str, list[tuple[str, int]]] = {}
+        for filename, ancestor_id, depth in (
+            await self.session.execute(tree_state)
+        ).all():
+            ancestors.setdefault(filename, []).append((ancestor_id, depth))
+
+        metadata_models = list(metadata_models)
+        files = []
+        trees = []
+        stats = []
+        delta: dict[str, list[int]] = {}
+        for file, metadata_id, size in nodes:
+            id = str(uuid.uuid4())
+            pearent = str(file.parent)
+            directory = metadata_id is None
+            if directory:
+                metadata_model = MetadataModel(
+                    suffix="", size=0, video=False, image=False, created_at=now
+                )
+                metadata_models.append(metadata_model)
+                metadata_id = metadata_model.id
+                stats.append({"file_id": id, "size": 0, "count": 1, "last_update": now})
+            files.append(
+                {
+                    "id": id,
+                    "parent_id": next(
+                        x for x, depth in ancestors[pearent] if depth == 0
+                    ),
+                    "metadata_id": str(metadata_id),
+                    "directory": directory,
+                    "filename": str(file),
+                    "pearent": pearent,
+                    "created_at": now,
+                }
+            )
+            ancestors[str(file)] = [(id, 0)]
+            ancestors[str(file)].extend(
+                (x, depth + 1) for x, depth in ancestors[pearent]
+            )
+            for ancestor_id, depth in ancestors[str(file)]:
+                trees.append(
+                    {"ancestor_id": ancestor_id, "descendant_id": id, "depth": depth}
+                )
+                if depth > 0:
+                    total = delta.setdefault(ancestor_id, [0, 0])
+                    total[0] += size
+                    total[1] += 1
+
+        metadata = [
+            {**x.model_dump(mode="json"), "created_at": x.created_at}
+            for x in metadata_models
+        ]
+        if metadata:
+            await self.session.execute(insert(MetadataORM.__table__), metadata)
+        await self.session.execute(insert(FileORM.__table__), files)
+        await self.session.execute(insert(FileTreeORM.__table__), trees)
+        if stats:
+            await self.session.execute(insert(DirectoryStatORM.__table__), stats)
+
+        table = DirectoryStatORM.__table__
+        stat_state = (
+            update(table)
+            .where(table.c.file_id == bindparam("_file_id"))
+            .values(
+                size=table.c.size + bindparam("_size"),
+                count=table.c.count + bindparam("_count"),
+                last_update=case(
+                    (table.c.last_update < now, now),
+                    else_=table.c.last_update,
+                ),
+            )
+        )
+        await self.session.execute(
+            stat_state,
+            [
+                {"_file_id": x, "_size": size, "_count": count}
+                for x, (size, count) in delta.items()
+            ],
+        )
+        for pearent in pearents:
+            self.invalidate(Path(pearent))
+
     async def mkdir(self, directory: Path, id: Optional[uuid.UUID] = None):
         metadata_model = MetadataModel(
             id=id or uuid.uuid4(),
@@ -143,54 +434,161 @@ class FileCRAD:
             pearent=directory.parent,
             directory=True,
         )
+        file_model.parent_id = await FileTreeCRAD(self.session).link(
+            file_model.id, directory.parent
+        )
 
         self.session.add(FileORM.from_model(file_model))
         self.session.add(MetadataORM.from_model(metadata_model))
+        DirectoryStatCRAD(self.session).add(file_model.id, file_model.created_at)
+        await DirectoryStatCRAD(self.session).propagate(
+            directory, 0, 1, file_model.created_at
+        )
+        self.invalidate(directory)
         return metadata_model
 
-    async def delete(self, file: Path):
+    async def makedirs(self, directory: Path):
+        missing: list[Path] = []
+        for pearent in [directory, *directory.parents]:
+            if await self.exists(pearent):
+                break
+            missing.append(pearent)
+        for pearent in reversed(missing):
+            await self.mkdir(pearent)
+
+    async def delete(self, file: Path) -> list[Path]:
+        now = datetime.now()
+        id = await FileTreeCRAD(self.session).getid(file)
+        size, count = await DirectoryStatCRAD(self.session).total(file)
+        orphans = await BlobCRAD(self.session).release(
+            FileTreeCRAD(self.session).subtree(id)
+        )
+        await DirectoryStatCRAD(self.session).remove(file)
         file_state = delete(FileORM).where(
-            or_(
-                FileORM.filename == str(file),
-                FileORM.filename.like(f"{escape_path(file)}{sep}%"),
-            )
+            FileORM.id.in_(FileTreeCRAD(self.session).subtree(id)),
         )
         await self.session.execute(file_state)
+        await FileTreeCRAD(self.session).unlink(id)
+        await DirectoryStatCRAD(self.session).propagate(file, -size, -count, now)
+        self.invalidate(file)
+        return await self.collect(orphans)
 
-    async def empty(self, directory: Path):
+    async def empty(self, directory: Path) -> list[Path]:
+        now = datetime.now()
+        id = await FileTreeCRAD(self.session).getid(directory)
+        size, count = await DirectoryStatCRAD(self.session).total(directory)
+        orphans = await BlobCRAD(self.session).release(
+            FileTreeCRAD(self.session).subtree(id, False)
+        )
+        await DirectoryStatCRAD(self.session).remove(directory, include_self=False)
         file_state = delete(FileORM).where(
-            FileORM.filename.like(f"{escape_path(directory)}{sep}%"),
+            FileORM.id.in_(FileTreeCRAD(self.session).subtree(id, False)),
         )
         await self.session.execute(file_state)
+        await FileTreeCRAD(self.session).unlink(id, include_self=False)
+        await DirectoryStatCRAD(self.session).propagate(
+            directory, -size, -(count - 1), now, include_self=True
+        )
+        self.invalidate(directory)
+        return await self.collect(orphans)
+
+    async def collect(self, metadata_ids: list[str]) -> list[Path]:
+        blobs: list[Path] = []
+        for metadata_id in metadata_ids:
+            blob = FileResolver.get_metadata_from_uuid(uuid.UUID(metadata_id))
+            unused = [metadata_id]
+            if await self.exists(blob):
+                id = await FileTreeCRAD(self.session).getid(blob)
+                file_state = select(FileORM.metadata_id).where(
+                    FileORM.id.in_(FileTreeCRAD(self.session).subtree(id))
+                )
+                unused.extend((await self.session.execute(file_state)).scalars())
+                blobs.extend([blob, *await self.delete(blob)])
+
+            metadata_state = delete(MetadataORM).where(MetadataORM.id.in_(unused))
+            await self.session.execute(metadata_state)
+            tag_state = delete(TagORM).where(TagORM.metadata_id == metadata_id)
+            await self.session.execute(tag_state)
+            task_state = delete(SlowTaskORM).where(
+                SlowTaskORM.metadata_id == metadata_id
+            )
+            await self.session.execute(task_state)
+        return blobs
 
     async def move(self, src: Path, dst: Path):
-        file_state = select(FileORM).where(
-            or_(
-                FileORM.filename == str(src),
-                FileORM.filename.like(f"{escape_path(src)}{sep}%"),
+        now = datetime.now()
+        id = await FileTreeCRAD(self.session).getid(src)
+        parent_id = await FileTreeCRAD(self.session).getid(dst.parent)
+        size, count = await DirectoryStatCRAD(self.session).total(src)
+        await DirectoryStatCRAD(self.session).propagate(src, -size, -count, now)
+        file_state = (
+            update(FileORM)
+            .where(FileORM.id.in_(FileTreeCRAD(self.session).subtree(id)))
+            .values(
+                filename=rebase(FileORM.filename, src, dst),
+                pearent=case(
+                    (FileORM.id == id, str(dst.parent)),
+                    else_=rebase(FileORM.pearent, src, dst),
+                ),
+                created_at=now,
             )
+            .execution_options(synchronize_session=False)
         )
-        for all in (await self.session.execute(file_state)).all():
-            (file_orm,) = all.tuple()
-            file_model = FileModel.model_validate_orm(file_orm)
-            dst_path = dst.joinpath(file_model.filename.relative_to(src))
-            file_orm.created_at = datetime.now()
-            file_orm.filename = str(dst_path)
-            file_orm.pearent = str(dst_path.parent)
+        await self.session.execute(file_state)
+        file_state = (
+            update(FileORM)
+            .where(FileORM.id == id)
+            .values(parent_id=parent_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(file_state)
+        await FileTreeCRAD(self.session).relink(id, parent_id)
+        await DirectoryStatCRAD(self.session).touch(dst, now)
+        await DirectoryStatCRAD(self.session).propagate(dst, size, count, now)
+        self.invalidate(src)
+        self.invalidate(dst)
 
     async def copy(self, src: Path, dst: Path):
-        file_state = select(FileORM).where(
-            or_(
-                FileORM.filename == str(src),
-                FileORM.filename.like(f"{escape_path(src)}{sep}%"),
-            )
-        )
-        for all in (await self.session.execute(file_state)).all():
-            (file_orm,) = all.tuple()
-            file_model = FileModel.model_validate_orm(file_orm)
-            dst_path = dst.joinpath(file_model.filename.relative_to(src))
-            file_model.filename = dst_path
-            file_model.pearent = dst_path.parent
-            file_model.id = uuid.uuid4()
-            file_model.created_at = datetime.now()
-            self.session.add(FileORM.from_model(file_model))
+        now = datetime.now()
+        id = await FileTreeCRAD(self.session).getid(src)
+        parent_id = await FileTreeCRAD(self.session).getid(dst.parent)
+        size, count = await DirectoryStatCRAD(self.session).total(src)
+        file_state = (
+            select(
+                FileORM.id,
+                FileORM.parent_id,
+                FileORM.metadata_id,
+                FileORM.directory,
+                rebase(FileORM.filename, src, dst),
+                case(
+                    (FileORM.id == id, str(dst.parent)),
+                    else_=rebase(FileORM.pearent, src, dst),
+                ),
+            )
+            .join(FileTreeORM, FileTreeORM.descendant_id == FileORM.id)
+            .where(FileTreeORM.ancestor_id == id)
+            .order_by(FileTreeORM.depth)
+        )
+        ids: dict[str, str] = {}
+        files = []
+        for file_id, file_parent_id, metadata_id, directory, filename, pearent in (
+            await self.session.execute(file_state)
+        ).all():
+            ids[file_id] = str(uuid.uuid4())
+            files.append(
+                {
+                    "id": ids[file_id],
+                    "parent_id": parent_id if file_id == id else ids[file_parent_id],
+                    "metadata_id": metadata_id,
+                    "directory": directory,
+                    "filename": filename,
+                    "pearent": pearent,
+                    "created_at": now,
+                }
+            )
+        await self.session.execute(insert(FileORM.__table__), files)
+        await FileTreeCRAD(self.session).clone(id, ids, parent_id)
+        await BlobCRAD(self.session).retain(FileTreeCRAD(self.session).subtree(id))
+        await DirectoryStatCRAD(self.session).clone(src, ids, now)
+        await DirectoryStatCRAD(self.session).propagate(dst, size, count, now)
+        self.invalidate(dst)
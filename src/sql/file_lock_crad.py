@@ -1,15 +1,18 @@
+from datetime import datetime, timedelta
+from os import sep
 from pathlib import Path
+from typing import Optional, Sequence
 
 from aiofiles import os
-from sqlalchemy import or_
+from sqlalchemy import and_, or_
 from sqlalchemy.ext.asyncio import (
-    AsyncEngine,
     AsyncSession,
 )
-from sqlalchemy.sql import select
+from sqlalchemy.sql import delete, select, update
 
 from src.models.file_lock import FileLockModel, FileLockORM
-from src.sql.sql import escape_path, sep
+from src.sql.cluster_event_crad import ClusterEventCRAD
+from src.sql.path_lock import PathLock
 from src.util import aioshutils as shutil
 
 
@@ -18,26 +21,32 @@ class FileLockCRADError(Exception):
 
 
 class FileLockTransaction:
-    def __init__(self, engine: AsyncEngine, file: Path):
-        self.file = file
-        self.session = AsyncSession(engine)
+    def __init__(
+        self,
+        *file: Path,
+        shared: Sequence[Path] = (),
+        timeout: Optional[float] = None,
+        session: Optional[AsyncSession] = None,
+    ):
+        self.targets = [(x, "X") for x in file] + [(x, "S") for x in shared]
+        self.plan = PathLock.plan(self.targets)
+        self.timeout = timeout
+        self.session = session
 
     async def __aenter__(self):
-        self.file_lock = FileLockCRAD(self.session, self.file)
-        if await self.file_lock.is_lock():
-            raise FileLockCRADError(f"{self.file} is locked")
-        else:
-            await self.file_lock.lock()
-            await self.session.commit()
-
+        if not await PathLock.wait(self.plan, self.timeout):
+            files = ", ".join(str(x) for x, _ in self.targets)
+            raise FileLockCRADError(f"{files} is locked")
+        if self.session is not None:
+            try:
+                await ClusterEventCRAD(self.session).receive()
+            except BaseException:
+                PathLock.release(self.plan)
+                raise
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        try:
-            await self.file_lock.unlock()
-            await self.session.commit()
-        finally:
-            await self.session.close()
+        PathLock.release(self.plan)
 
 
 class FileGuard:
@@ -71,22 +80,76 @@ class FileMoveGuard:
 
 
 class FileLockCRAD:
-    def __init__(self, session: AsyncSession, file: Path):
+    def __init__(self, session: AsyncSession):
         self.session = session
-        self.file = file
-
-    async def is_lock(self):
-        equal = FileLockORM.filename == str(self.file)
-        like = FileLockORM.filename.like(f"{escape_path(self.file)}{sep}%")
-        file_state = select(FileLockORM).where(or_(equal, like))
-        return (await self.session.execute(file_state)).scalar() is not None
 
-    async def lock(self):
-        lock_model = FileLockModel(filename=self.file)
+    @staticmethod
+    def subtree(file: Path):
+        prefix = f"{file}{sep}"
+        return and_(
+            FileLockORM.filename >= prefix,
+            FileLockORM.filename < f"{file}{chr(ord(sep) + 1)}",
+        )
+
+    async def get(self, token: str) -> Optional[FileLockModel]:
+        lock_state = (
+            select(FileLockORM)
+            .where(FileLockORM.id == token.removeprefix("urn:uuid:"))
+            .where(FileLockORM.expires_at > datetime.now())
+        )
+        lock_orm = (await self.session.execute(lock_state)).scalar()
+        if lock_orm is None:
+            return None
+        return FileLockModel.model_validate_orm(lock_orm)
+
+    async def lookup(self, file: Path, deep: bool = False) -> list[FileLockModel]:
+        conditions = [
+            FileLockORM.filename == str(file),
+            and_(
+                FileLockORM.filename.in_([str(x) for x in file.parents]),
+                FileLockORM.depth == "infinity",
+            ),
+        ]
+        if deep:
+            conditions.append(self.subtree(file))
+        lock_state = (
+            select(FileLockORM)
+            .where(or_(*conditions))
+            .where(FileLockORM.expires_at > datetime.now())
+        )
+        data = (await self.session.execute(lock_state)).scalars().all()
+        return [FileLockModel.model_validate_orm(x) for x in data]
+
+    def add(self, lock_model: FileLockModel):
         self.session.add(FileLockORM.from_model(lock_model))
 
-    async def unlock(self):
-        equal = FileLockORM.filename == str(self.file)
-        file_state = select(FileLockORM).where(equal)
-        (file_rock_orm,) = (await self.session.execute(file_state)).one()
-        await self.session.delete(file_rock_orm)
+    async def refresh(self, lock_model: FileLockModel, timeout: int):
+        expires_at = datetime.now() + timedelta(seconds=timeout)
+        lock_state = (
+            update(FileLockORM)
+            .where(FileLockORM.id == str(lock_model.id))
+            .values(timeout=timeout, expires_at=expires_at)
+        )
+        await self.session.execute(lock_state)
+        return lock_model.model_copy(
+            update={"timeout": timeout, "expires_at": expires_at}
+        )
+
+    async def delete(self, lock_model: FileLockModel):
+        lock_state = delete(FileLockORM).where(FileLockORM.id == str(lock_model.id))
+        await self.session.execute(lock_state)
+
+    async def remove(self, file: Path):
+        lock_state = delete(FileLockORM).where(
+            or_(FileLockORM.filename == str(file), self.subtree(file))
+        )
+        await self.session.execute(lock_state)
+
+    async def reap(self) -> int:
+        lock_state = delete(FileLockORM).where(
+            or_(
+                FileLockORM.expires_at <= datetime.now(),
+                FileLockORM.expires_at.is_(None),
+            )
+        )
+        return (await self.session.execute(lock_state)).rowcount
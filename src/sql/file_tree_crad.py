@@ -0,0 +1,145 @@
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import delete, insert, select
+
+from src.models.file import FileORM
+from src.models.file_tree import FileTreeModel, FileTreeORM
+
+
+class FileTreeCRAD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def getid(self, file: Path) -> Optional[str]:
+        file_state = select(FileORM.id).where(FileORM.filename == str(file))
+        return (await self.session.execute(file_state)).scalar()
+
+    def subtree(self, id: str, include_self: bool = True):
+        tree_state = select(FileTreeORM.descendant_id).where(
+            FileTreeORM.ancestor_id == id
+        )
+        if not include_self:
+            tree_state = tree_state.where(FileTreeORM.depth > 0)
+        return tree_state
+
+    def subtree_of(self, file: Path, include_self: bool = True):
+        ancestor = aliased(FileORM)
+        tree_state = (
+            select(FileTreeORM.descendant_id)
+            .join(ancestor, ancestor.id == FileTreeORM.ancestor_id)
+            .where(ancestor.filename == str(file))
+        )
+        if not include_self:
+            tree_state = tree_state.where(FileTreeORM.depth > 0)
+        return tree_state
+
+    def ancestors_of(self, file: Path, include_self: bool = True):
+        descendant = aliased(FileORM)
+        tree_state = (
+            select(FileTreeORM.ancestor_id)
+            .join(descendant, descendant.id == FileTreeORM.descendant_id)
+            .where(descendant.filename == str(file))
+        )
+        if not include_self:
+            tree_state = tree_state.where(FileTreeORM.depth > 0)
+        return tree_state
+
+    async def link(self, file_id: uuid.UUID, pearent: Path) -> Optional[uuid.UUID]:
+        tree_state = (
+            select(FileTreeORM.ancestor_id, FileTreeORM.depth)
+            .join(FileORM, FileORM.id == FileTreeORM.descendant_id)
+            .where(FileORM.filename == str(pearent))
+        )
+        ancestors = (await self.session.execute(tree_state)).all()
+
+        tree_models = [
+            FileTreeModel(ancestor_id=file_id, descendant_id=file_id, depth=0)
+        ]
+        for ancestor_id, depth in ancestors:
+            tree_models.append(
+                FileTreeModel(
+                    ancestor_id=ancestor_id,
+                    descendant_id=file_id,
+                    depth=depth + 1,
+                )
+            )
+        self.session.add_all(FileTreeORM.from_model(x) for x in tree_models)
+        return next((uuid.UUID(x) for x, depth in ancestors if depth == 0), None)
+
+    async def unlink(self, id: str, include_self: bool = True):
+        subtree = self.subtree(id, include_self).subquery()
+        tree_state = delete(FileTreeORM).where(
+            FileTreeORM.descendant_id.in_(select(subtree.c.descendant_id))
+        )
+        await self.session.execute(tree_state)
+
+    async def relink(self, id: str, parent_id: Optional[str]):
+        subtree = self.subtree(id).subquery()
+        ancestors = (
+            select(FileTreeORM.ancestor_id)
+            .where(FileTreeORM.descendant_id == id)
+            .where(FileTreeORM.depth > 0)
+            .subquery()
+        )
+        tree_state = delete(FileTreeORM).where(
+            FileTreeORM.descendant_id.in_(select(subtree.c.descendant_id)),
+            FileTreeORM.ancestor_id.in_(select(ancestors.c.ancestor_id)),
+        )
+        await self.session.execute(tree_state)
+        if parent_id is None:
+            return
+
+        pearent = aliased(FileTreeORM)
+        child = aliased(FileTreeORM)
+        tree_state = insert(FileTreeORM).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(
+                pearent.ancestor_id,
+                child.descendant_id,
+                pearent.depth + child.depth + 1,
+            )
+            .select_from(pearent)
+            .join(child, child.ancestor_id == id)
+            .where(pearent.descendant_id == parent_id),
+        )
+        await self.session.execute(tree_state)
+
+    async def clone(self, id: str, ids: dict[str, str], parent_id: Optional[str]):
+        subtree = self.subtree(id).subquery()
+        tree_state = select(
+            FileTreeORM.ancestor_id, FileTreeORM.descendant_id, FileTreeORM.depth
+        ).where(FileTreeORM.ancestor_id.in_(select(subtree.c.descendant_id)))
+        tree = [
+            {
+                "ancestor_id": ids[ancestor_id],
+                "descendant_id": ids[descendant_id],
+                "depth": depth,
+            }
+            for ancestor_id, descendant_id, depth in (
+                await self.session.execute(tree_state)
+            ).all()
+        ]
+        await self.session.execute(insert(FileTreeORM.__table__), tree)
+        if parent_id is None:
+            return
+
+        pearent = aliased(FileTreeORM)
+        child = aliased(FileTreeORM)
+        tree_state = insert(FileTreeORM).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(
+                pearent.ancestor_id,
+                child.descendant_id,
+                pearent.depth + child.depth + 1,
+            )
+            .select_from(pearent)
+            .join(child, child.ancestor_id == ids[id])
+            .where(pearent.descendant_id == parent_id),
+        )
+        await self.session.execute(tree_state)
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from sqlalchemy import Column, Connection, bindparam, inspect, text
+from sqlalchemy.schema import AddConstraint
+from sqlalchemy.sql import insert, select, update
+
+from src.models.file import FileORM
+from src.models.file_lock import FileLockORM
+from src.models.file_tree import FileTreeORM
+from src.models.metadata import MetadataORM
+from src.models.upload import UploadChunkORM, UploadORM
+
+
+def migrate(conn: Connection):
+    add_column(conn, FileORM.__table__.c.parent_id)
+    add_column(conn, MetadataORM.__table__.c.sha256)
+    for column in ["owner", "scope", "depth", "timeout", "expires_at"]:
+        add_column(conn, FileLockORM.__table__.c[column])
+    add_column(conn, UploadORM.__table__.c.expires_at)
+    add_column(conn, UploadChunkORM.__table__.c.sha256)
+    for table in [FileORM.__table__, FileLockORM.__table__, UploadORM.__table__]:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    build_file_tree(conn)
+
+
+def add_column(conn: Connection, column: Column):
+    columns = inspect(conn).get_columns(column.table.name)
+    if any(x["name"] == column.name for x in columns):
+        return
+
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(
+        text(
+            f"ALTER TABLE {column.table.name} "
+            f"ADD COLUMN {column.name} {column_type} NULL"
+        )
+    )
+    if conn.dialect.name != "sqlite":
+        for constraint in column.foreign_keys:
+            conn.execute(AddConstraint(constraint.constraint))
+
+
+def build_file_tree(conn: Connection, chunk: int = 1000):
+    if conn.execute(select(FileTreeORM.ancestor_id).limit(1)).first() is not None:
+        return
+
+    file_state = select(FileORM.id, FileORM.filename)
+    ids = {filename: id for id, filename in conn.execute(file_state).all()}
+
+    parents = []
+    tree = []
+    for filename, id in ids.items():
+        path = Path(filename)
+        parents.append({"_id": id, "_parent_id": ids.get(str(path.parent))})
+        tree.append({"ancestor_id": id, "descendant_id": id, "depth": 0})
+        for depth, pearent in enumerate(path.parents, 1):
+            if str(pearent) in ids:
+                tree.append(
+                    {
+                        "ancestor_id": ids[str(pearent)],
+                        "descendant_id": id,
+                        "depth": depth,
+                    }
+                )
+
+    file_state = (
+        update(FileORM.__table__)
+        .where(FileORM.__table__.c.id == bindparam("_id"))
+        .values(parent_id=bindparam("_parent_id"))
+    )
+    for i in range(0, len(parents), chunk):
+        conn.execute(file_state, parents[i : i + chunk])
+    for i in range(0, len(tree), chunk):
+        conn.execute(insert(FileTreeORM.__table__), tree[i : i + chunk])
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from os import sep
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+from src.models.response import FileResponseModel
+
+
+@event.listens_for(Session, "after_transaction_end")
+def after_transaction_end(session: Session, transaction: SessionTransaction):
+    if transaction.parent is None:
+        for file in session.info.pop("path_cache", []):
+            PathCache.invalidate(file)
+
+
+class PathCache:
+    maxsize: int = 0
+    data: OrderedDict[str, Optional[FileResponseModel]] = OrderedDict()
+    version: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    @staticmethod
+    def init(maxsize: int):
+        PathCache.maxsize = maxsize
+        PathCache.data = OrderedDict()
+        PathCache.version += 1
+        PathCache.hits = 0
+        PathCache.misses = 0
+
+    @staticmethod
+    def get(file: Path) -> tuple[bool, Optional[FileResponseModel]]:
+        key = str(file)
+        if key in PathCache.data:
+            PathCache.hits += 1
+            PathCache.data.move_to_end(key)
+            return True, PathCache.data[key]
+        else:
+            PathCache.misses += 1
+            return False, None
+
+    @staticmethod
+    def set(file: Path, value: Optional[FileResponseModel], version: int):
+        if PathCache.maxsize <= 0 or version != PathCache.version:
+            return
+        PathCache.data[str(file)] = value
+        PathCache.data.move_to_end(str(file))
+        while len(PathCache.data) > PathCache.maxsize:
+            PathCache.data.popitem(last=False)
+
+    @staticmethod
+    def invalidate(file: Path):
+        PathCache.version += 1
+        key = str(file)
+        prefix = key + sep
+        for x in [x for x in PathCache.data if x == key or x.startswith(prefix)]:
+            del PathCache.data[x]
+
+    @staticmethod
+    def stats():
+        return {
+            "size": len(PathCache.data),
+            "maxsize": PathCache.maxsize,
+            "hits": PathCache.hits,
+            "misses": PathCache.misses,
+        }
@@ -0,0 +1,258 @@
+import asyncio
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Optional
+
+from src.util import flock
+
+COMPATIBLE = {
+    "IS": {"IS", "IX", "S"},
+    "IX": {"IS", "IX"},
+    "S": {"IS", "S"},
+    "X": set(),
+}
+
+INTENT = {"S": "IS", "X": "IX"}
+
+RANK = {None: 0, "S": 1, "X": 2}
+
+WAIT_BUCKETS = [0.001, 0.01, 0.1, 1.0, 10.0, float("inf")]
+
+
+class PathLock:
+    held: dict[str, Counter[str]] = {}
+    waiters: deque[tuple[dict[str, str], asyncio.Future]] = deque()
+    timeout: float = 0.0
+    file: Optional[int] = None
+    applied: dict[str, tuple[Optional[str], Optional[str], Optional[str]]] = {}
+    poll: float = 0.01
+    acquired: int = 0
+    conflicts: int = 0
+    timeouts: int = 0
+    max_waiting: int = 0
+    wait_count: list[int] = [0] * len(WAIT_BUCKETS)
+    wait_sum: float = 0.0
+
+    @staticmethod
+    def init(timeout: float = 0.0, file: Optional[int] = None):
+        PathLock.held = {}
+        PathLock.waiters = deque()
+        PathLock.timeout = timeout
+        PathLock.file = file
+        PathLock.applied = {}
+        PathLock.acquired = 0
+        PathLock.conflicts = 0
+        PathLock.timeouts = 0
+        PathLock.max_waiting = 0
+        PathLock.wait_count = [0] * len(WAIT_BUCKETS)
+        PathLock.wait_sum = 0.0
+
+    @staticmethod
+    def combine(a: Optional[str], b: str) -> str:
+        if a is None or a == b or a == "IS":
+            return b
+        elif b == "IS":
+            return a
+        else:
+            return "X"
+
+    @staticmethod
+    def plan(targets: list[tuple[Path, str]]) -> dict[str, str]:
+        res: dict[str, str] = {}
+        for file, mode in targets:
+            for pearent in file.parents:
+                res[str(pearent)] = PathLock.combine(
+                    res.get(str(pearent)), INTENT[mode]
+                )
+        for file, mode in targets:
+            res[str(file)] = PathLock.combine(res.get(str(file)), mode)
+        return res
+
+    @staticmethod
+    def available(plan: dict[str, str]) -> bool:
+        for key, mode in plan.items():
+            held = PathLock.held.get(key)
+            if held and any(x not in COMPATIBLE[mode] for x in held):
+                return False
+        return True
+
+    @staticmethod
+    def overlap(a: dict[str, str], b: dict[str, str]) -> bool:
+        return any(
+            mode not in COMPATIBLE[b[key]] for key, mode in a.items() if key in b
+        )
+
+    @staticmethod
+    def ready(plan: dict[str, str]) -> bool:
+        if not PathLock.available(plan):
+            return False
+        return not any(PathLock.overlap(plan, x) for x, _ in PathLock.waiters)
+
+    @staticmethod
+    def grant(plan: dict[str, str]):
+        for key, mode in plan.items():
+            PathLock.held.setdefault(key, Counter())[mode] += 1
+
+    @staticmethod
+    def level(
+        held: Optional[Counter[str]],
+    ) -> tuple[Optional[str], Optional[str], Optional[str]]:
+        if not held:
+            return None, None, None
+        elif "X" in held:
+            return "X", "S", "S"
+        elif "S" in held:
+            return "S", "S", None
+        elif "IX" in held:
+            return "S", None, "S"
+        else:
+            return "S", None, None
+
+    @staticmethod
+    def sync(plan: dict[str, str], release: bool = False) -> bool:
+        if PathLock.file is None:
+            return True
+        synced = True
+        for key in sorted(plan):
+            level = PathLock.level(PathLock.held.get(key))
+            applied = PathLock.applied.get(key, (None, None, None))
+            start = flock.offset(key)
+            for i in range(3):
+                if level[i] == applied[i]:
+                    continue
+                elif release and RANK[level[i]] > RANK[applied[i]]:
+                    continue
+                elif not flock.lock(PathLock.file, start + i, level[i]):
+                    if not release:
+                        return False
+                    synced = False
+                    continue
+                applied = applied[:i] + (level[i],) + applied[i + 1 :]
+                if applied == (None, None, None):
+                    PathLock.applied.pop(key, None)
+                else:
+                    PathLock.applied[key] = applied
+            if release:
+                continue
+            for i, j in ((1, 2), (2, 1)):
+                if level[i] == "S" and level[j] is None:
+                    if not flock.probe(PathLock.file, start + j):
+                        return False
+        return synced
+
+    @staticmethod
+    def acquire(plan: dict[str, str]) -> bool:
+        if not PathLock.ready(plan):
+            PathLock.conflicts += 1
+            return False
+        PathLock.grant(plan)
+        if not PathLock.sync(plan):
+            PathLock.conflicts += 1
+            PathLock.release(plan)
+            return False
+        PathLock.acquired += 1
+        return True
+
+    @staticmethod
+    async def wait(plan: dict[str, str], timeout: Optional[float] = None) -> bool:
+        timeout = PathLock.timeout if timeout is None else timeout
+        start = time.monotonic()
+        while True:
+            if await PathLock.enqueue(plan, start + timeout - time.monotonic()):
+                if PathLock.sync(plan):
+                    PathLock.acquired += 1
+                    PathLock.observe(time.monotonic() - start)
+                    return True
+                PathLock.conflicts += 1
+                PathLock.release(plan)
+            remaining = start + timeout - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(PathLock.poll, remaining))
+
+        if timeout > 0:
+            PathLock.observe(time.monotonic() - start)
+        PathLock.timeouts += 1
+        return False
+
+    @staticmethod
+    async def enqueue(plan: dict[str, str], timeout: float) -> bool:
+        if PathLock.ready(plan):
+            PathLock.grant(plan)
+            return True
+        PathLock.conflicts += 1
+        if timeout <= 0:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (plan, future)
+        PathLock.waiters.append(waiter)
+        PathLock.max_waiting = max(PathLock.max_waiting, len(PathLock.waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if future.done():
+                PathLock.release(plan)
+            raise
+        finally:
+            if not future.done():
+                PathLock.waiters.remove(waiter)
+                PathLock.wakeup()
+        return future.done()
+
+    @staticmethod
+    def wakeup():
+        waiters = PathLock.waiters
+        PathLock.waiters = deque()
+        for plan, future in waiters:
+            if PathLock.ready(plan):
+                PathLock.grant(plan)
+                future.set_result(True)
+            else:
+                PathLock.waiters.append((plan, future))
+
+    @staticmethod
+    def release(plan: dict[str, str]):
+        for key, mode in plan.items():
+            held = PathLock.held[key]
+            held[mode] -= 1
+            if held[mode] <= 0:
+                del held[mode]
+            if not held:
+                del PathLock.held[key]
+        PathLock.sync(plan, release=True)
+        if PathLock.waiters:
+            PathLock.wakeup()
+
+    @staticmethod
+    def observe(seconds: float):
+        PathLock.wait_sum += seconds
+        for i, bucket in enumerate(WAIT_BUCKETS):
+            if seconds <= bucket:
+                PathLock.wait_count[i] += 1
+                break
+
+    @staticmethod
+    def histogram() -> dict[str, int]:
+        res: dict[str, int] = {}
+        total = 0
+        for bucket, count in zip(WAIT_BUCKETS, PathLock.wait_count):
+            total += count
+            res["+Inf" if bucket == float("inf") else str(bucket)] = total
+        return res
+
+    @staticmethod
+    def stats():
+        return {
+            "held": len(PathLock.held),
+            "acquired": PathLock.acquired,
+            "conflicts": PathLock.conflicts,
+            "timeouts": PathLock.timeouts,
+            "waiting": len(PathLock.waiters),
+            "max_waiting": PathLock.max_waiting,
+            "wait_seconds": PathLock.histogram(),
+            "wait_sum": PathLock.wait_sum,
+        }
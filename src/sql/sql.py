@@ -2,6 +2,7 @@ from os import sep as _sep
 from pathlib import Path
 
 from pydantic import BaseModel, ConfigDict
+from sqlalchemy import ColumnElement, func, literal
 from sqlalchemy.orm import (
     DeclarativeBase,
 )
@@ -11,6 +12,15 @@ def escape_path(path: Path) -> str:
     return str(path).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
+def is_subpath(column: ColumnElement[str], pearent: ColumnElement[str]):
+    prefix = pearent + _sep
+    return func.substr(column, 1, func.length(prefix)) == prefix
+
+
+def rebase(column: ColumnElement[str], src: Path, dst: Path):
+    return literal(str(dst)) + func.substr(column, len(str(src)) + 1)
+
+
 sep = _sep.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
@@ -0,0 +1,92 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+)
+from sqlalchemy.sql import delete, select, update
+
+from src.models.upload import (
+    UploadChunkModel,
+    UploadChunkORM,
+    UploadModel,
+    UploadORM,
+    UploadStatusModel,
+)
+
+
+class UploadCRAD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def add(self, upload: UploadModel):
+        self.session.add(UploadORM.from_model(upload))
+
+    async def get(self, id: uuid.UUID) -> Optional[UploadModel]:
+        upload_state = select(UploadORM).where(UploadORM.id == str(id))
+        upload_orm = (await self.session.execute(upload_state)).scalar()
+        if upload_orm is None:
+            return None
+        return UploadModel.model_validate_orm(upload_orm)
+
+    async def received(self, id: uuid.UUID) -> list[int]:
+        chunk_state = (
+            select(UploadChunkORM.number)
+            .where(UploadChunkORM.upload_id == str(id))
+            .order_by(UploadChunkORM.number)
+        )
+        return list((await self.session.execute(chunk_state)).scalars())
+
+    async def digests(self, id: uuid.UUID) -> list[Optional[str]]:
+        chunk_state = (
+            select(UploadChunkORM.sha256)
+            .where(UploadChunkORM.upload_id == str(id))
+            .order_by(UploadChunkORM.number)
+        )
+        return list((await self.session.execute(chunk_state)).scalars())
+
+    async def expired(
+        self, expire: int, id: Optional[uuid.UUID] = None
+    ) -> list[UploadModel]:
+        now = datetime.now()
+        upload_state = select(UploadORM).where(
+            or_(
+                UploadORM.expires_at <= now,
+                and_(
+                    UploadORM.expires_at.is_(None),
+                    UploadORM.created_at <= now - timedelta(seconds=expire),
+                ),
+            )
+        )
+        if id is not None:
+            upload_state = upload_state.where(UploadORM.id == str(id))
+        upload_orm = (await self.session.execute(upload_state)).scalars()
+        return [UploadModel.model_validate_orm(x) for x in upload_orm]
+
+    async def ids(self) -> set[str]:
+        upload_state = select(UploadORM.id)
+        return set((await self.session.execute(upload_state)).scalars())
+
+    async def status(self, upload: UploadModel) -> UploadStatusModel:
+        received = await self.received(upload.id)
+        return UploadStatusModel(upload=upload, received=received)
+
+    async def receive(
+        self, id: uuid.UUID, number: int, sha256: str, expires_at: datetime
+    ):
+        chunk_model = UploadChunkModel(upload_id=id, number=number, sha256=sha256)
+        await self.session.merge(UploadChunkORM.from_model(chunk_model))
+        upload_state = (
+            update(UploadORM)
+            .where(UploadORM.id == str(id))
+            .values(expires_at=expires_at)
+        )
+        await self.session.execute(upload_state)
+
+    async def delete(self, id: uuid.UUID):
+        chunk_state = delete(UploadChunkORM).where(UploadChunkORM.upload_id == str(id))
+        await self.session.execute(chunk_state)
+        upload_state = delete(UploadORM).where(UploadORM.id == str(id))
+        await self.session.execute(upload_state)
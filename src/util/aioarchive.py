@@ -0,0 +1,6 @@
+from aiofiles.ospath import wrap
+
+from src.util import archive
+
+list_archive = wrap(archive.list_archive)
+extract_archive = wrap(archive.extract_archive)
@@ -0,0 +1,5 @@
+from aiofiles.ospath import wrap
+
+from src.util import clone
+
+clonefile = wrap(clone.clonefile)
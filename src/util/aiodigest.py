@@ -0,0 +1,5 @@
+from aiofiles.ospath import wrap
+
+from src.util import digest
+
+sha256sum = wrap(digest.sha256sum)
@@ -0,0 +1,6 @@
+from aiofiles.ospath import wrap
+
+from src.util import flock
+
+open_lock = wrap(flock.open_lock)
+lock = wrap(flock.lock)
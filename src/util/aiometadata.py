@@ -1,7 +1,18 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from aiofiles.ospath import wrap
 
 from src.util import metadata
 
+workers = min(4, os.cpu_count() or 1)
+executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata")
+semaphore = asyncio.Semaphore(workers)
+
+sniff = wrap(metadata.sniff)
+sniff_type = wrap(metadata.sniff_type)
+get_metadata = wrap(metadata.get_metadata)
 get_media_info = wrap(metadata.get_media_info)
 get_mutagen_metadata = wrap(metadata.get_mutagen_metadata)
 get_pillow_metadata = wrap(metadata.get_pillow_metadata)
@@ -0,0 +1,14 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aiofiles.ospath import wrap
+
+from src.util import thumbnail
+
+executor = ThreadPoolExecutor(
+    max_workers=min(2, os.cpu_count() or 1),
+    thread_name_prefix="thumbnail",
+)
+
+make_thumbnail = wrap(thumbnail.make_thumbnail)
+scan_thumbnails = wrap(thumbnail.scan_thumbnails)
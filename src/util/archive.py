@@ -0,0 +1,115 @@
+import hashlib
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Callable, Iterator, Optional
+
+from src.util.metadata import sniff_head
+
+
+class ArchiveLimitError(ValueError):
+    pass
+
+
+def normalize(name: str) -> PurePosixPath:
+    path = PurePosixPath(name.replace("\\", "/"))
+    parts = [x for x in path.parts if x not in ["", "."]]
+    if not parts or path.is_absolute() or ".." in parts:
+        raise ValueError(f"Invalid archive member: {name}")
+    return PurePosixPath(*parts)
+
+
+def iter_archive(
+    archive: Path,
+) -> Iterator[tuple[PurePosixPath, Optional[Callable[[], IO[bytes]]], int]]:
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    yield normalize(info.filename), None, 0
+                else:
+                    yield (
+                        normalize(info.filename),
+                        lambda x=info: zf.open(x),
+                        info.file_size,
+                    )
+    elif tarfile.is_tarfile(archive):
+        with tarfile.open(archive, "r:*") as tf:
+            for member in tf:
+                if member.isdir():
+                    yield normalize(member.name), None, 0
+                elif member.isfile():
+                    yield (
+                        normalize(member.name),
+                        lambda x=member: tf.extractfile(x),
+                        member.size,
+                    )
+    else:
+        raise ValueError("Unsupported archive")
+
+
+def check_limit(
+    count: int, size: int, max_entries: Optional[int], max_size: Optional[int]
+):
+    if max_entries is not None and count > max_entries:
+        raise ArchiveLimitError(f"Archive has more than {max_entries} members")
+    if max_size is not None and size > max_size:
+        raise ArchiveLimitError(f"Archive is larger than {max_size} bytes")
+
+
+def list_archive(
+    archive: Path,
+    max_entries: Optional[int] = None,
+    max_size: Optional[int] = None,
+) -> list[tuple[PurePosixPath, bool]]:
+    files: set[PurePosixPath] = set()
+    directories: set[PurePosixPath] = set()
+    total = 0
+    for path, reader, size in iter_archive(archive):
+        total += size
+        check_limit(len(files) + len(directories), total, max_entries, max_size)
+        if reader is None:
+            directories.add(path)
+        elif path in files:
+            raise ValueError(f"Duplicate archive member: {path}")
+        else:
+            files.add(path)
+        directories.update(x for x in path.parents if x != PurePosixPath("."))
+    check_limit(len(files) + len(directories), total, max_entries, max_size)
+
+    if files & directories:
+        raise ValueError("Archive member is both a file and a directory")
+    members = [(x, False) for x in files] + [(x, True) for x in directories]
+    return sorted(members, key=lambda x: (len(x[0].parts), str(x[0])))
+
+
+def extract_archive(
+    archive: Path,
+    dst: Path,
+    chunk_size: int = 1024 * 1024,
+    max_size: Optional[int] = None,
+) -> dict[PurePosixPath, tuple[int, str, str]]:
+    entries: dict[PurePosixPath, tuple[int, str, str]] = {}
+    total = 0
+    for path, reader, _ in iter_archive(archive):
+        file = dst.joinpath(*path.parts)
+        if reader is None:
+            file.mkdir(parents=True, exist_ok=True)
+            continue
+
+        file.parent.mkdir(parents=True, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        head = b""
+        with reader() as src, file.open("xb") as f:
+            while chunk := src.read(chunk_size):
+                if size == 0:
+                    head = chunk[:16]
+                total += len(chunk)
+                check_limit(0, total, None, max_size)
+                sha256.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        _, media_type = sniff_head(head, file.name)
+        entries[path] = (size, sha256.hexdigest(), media_type)
+    return entries
@@ -0,0 +1,38 @@
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+
+
+def reflink(src: Path, dst: Path):
+    if fcntl is None:
+        raise OSError("reflink is not supported")
+    with open(src, "rb") as s:
+        with open(dst, "xb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                os.remove(dst)
+                raise
+
+
+def clonefile(src: Path, dst: Path) -> str:
+    try:
+        reflink(src, dst)
+        return "reflink"
+    except OSError:
+        pass
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    shutil.copyfile(src, dst)
+    return "copy"
@@ -0,0 +1,49 @@
+import re
+from typing import Optional
+
+LIST_PATTERN = re.compile(r"\(([^)]*)\)")
+CONDITION_PATTERN = re.compile(r"(Not\s+)?(<[^>]*>|\[[^\]]*\])", re.IGNORECASE)
+
+
+class DAVHeader:
+    @staticmethod
+    def tokens(value: Optional[str]) -> set[str]:
+        res: set[str] = set()
+        if value is None:
+            return res
+        for conditions in LIST_PATTERN.findall(value):
+            for negate, condition in CONDITION_PATTERN.findall(conditions):
+                if not negate and condition.startswith("<"):
+                    res.add(condition[1:-1].strip())
+        return res
+
+    @staticmethod
+    def lock_token(value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        value = value.strip()
+        if value.startswith("<") and value.endswith(">"):
+            value = value[1:-1].strip()
+        return value or None
+
+    @staticmethod
+    def timeout(value: Optional[str], default: int, maximum: int) -> int:
+        if value is None:
+            return min(default, maximum)
+        for item in value.split(","):
+            item = item.strip()
+            if item.lower() == "infinite":
+                return maximum
+            elif item.lower().startswith("second-"):
+                seconds = item[len("second-") :]
+                if seconds.isdigit():
+                    return max(1, min(int(seconds), maximum))
+        return min(default, maximum)
+
+    @staticmethod
+    def depth(value: Optional[str]) -> Optional[str]:
+        if value is None or value.strip().lower() == "infinity":
+            return "infinity"
+        elif value.strip() in ("0", "1"):
+            return value.strip()
+        return None
@@ -0,0 +1,10 @@
+import hashlib
+from pathlib import Path
+
+
+def sha256sum(file: Path, chunk_size: int = 1024 * 1024) -> str:
+    hash = hashlib.sha256()
+    with open(file, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hash.update(chunk)
+    return hash.hexdigest()
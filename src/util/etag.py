@@ -0,0 +1,24 @@
+from hashlib import md5
+
+from src.models.response import DirectoryResponseModel, FileResponseModel
+
+
+class ETag:
+    @staticmethod
+    def file(file: FileResponseModel) -> str:
+        if file.metadata.sha256:
+            return f'"{file.metadata.sha256}"'
+        state = f"{file.metadata.id}-{file.metadata.size}-{file.file.created_at}"
+        return f'W/"{md5(state.encode()).hexdigest()}"'
+
+    @staticmethod
+    def directory(dir: DirectoryResponseModel) -> str:
+        state = f"{dir.file.id}-{dir.size}-{dir.count}-{dir.last_update}"
+        return f'W/"{md5(state.encode()).hexdigest()}"'
+
+    @staticmethod
+    def match(header: str, etag: str) -> bool:
+        if header.strip() == "*":
+            return True
+        tags = [x.strip().removeprefix("W/") for x in header.split(",")]
+        return etag.removeprefix("W/") in tags
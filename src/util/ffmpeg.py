@@ -41,13 +41,18 @@ class FFmpegWrapper:
             data = await cls.execute(stream)
             ffprobe = json.loads(data)
         except Exception:
-            ffprobe = {
-                "format": {},
-                "streams": [],
-            }
+            return cls.empty(input_file)
 
         return cls(input_file, ffprobe)
 
+    @classmethod
+    def empty(cls, input_file: Path):
+        ffprobe = {
+            "format": {},
+            "streams": [],
+        }
+        return cls(input_file, ffprobe)
+
     def is_video(self) -> bool:
         return float(self.ffprobe["format"].get("duration", 0)) > 0.1
 
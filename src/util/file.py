@@ -27,6 +27,11 @@ class FileResolver:
         temp = FileResolver.metadata_path.joinpath(str(uuid))
         return temp
 
+    @staticmethod
+    def get_upload_from_uuid(uuid: uuid.UUID) -> Path:
+        temp = FileResolver.metadata_path.joinpath(".upload", str(uuid))
+        return temp
+
     @staticmethod
     async def __get_trashbin(
         file_path: Union[str, Path], exists: Callable[[Path], Awaitable[bool]]
@@ -0,0 +1,37 @@
+import fcntl
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+FLOCK_MODES = {
+    None: fcntl.LOCK_UN,
+    "S": fcntl.LOCK_SH,
+    "X": fcntl.LOCK_EX,
+}
+
+
+def open_lock(path: Path) -> int:
+    return os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def offset(key: str) -> int:
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return (int.from_bytes(digest, "big") >> 3) * 3
+
+
+def lock(file: int, start: int, mode: Optional[str], wait: bool = False) -> bool:
+    flags = FLOCK_MODES[mode]
+    if mode is not None and not wait:
+        flags |= fcntl.LOCK_NB
+    try:
+        fcntl.lockf(file, flags, 1, start, os.SEEK_SET)
+    except (BlockingIOError, PermissionError):
+        return False
+    return True
+
+
+def probe(file: int, start: int) -> bool:
+    if not lock(file, start, "X"):
+        return False
+    return lock(file, start, None)
@@ -1,7 +1,8 @@
 import json
+import mimetypes
 from functools import reduce
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Union
 
 from iptcinfo3 import IPTCInfo
 from mutagen._file import File as MutagenFile
@@ -32,6 +33,38 @@ IMAGE_EXTENSIONS = [
     ".webp",
     ".ico",
 ]
+SIGNATURES = [
+    (b"\xff\xd8\xff", "image", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image", "image/png"),
+    (b"II*\x00", "image", "image/tiff"),
+    (b"MM\x00*", "image", "image/tiff"),
+    (b"BM", "image", "image/bmp"),
+    (b"\x00\x00\x01\x00", "image", "image/vnd.microsoft.icon"),
+    (b"GIF87a", "animation", "image/gif"),
+    (b"GIF89a", "animation", "image/gif"),
+    (b"\x1a\x45\xdf\xa3", "media", "video/x-matroska"),
+    (b"ID3", "media", "audio/mpeg"),
+    (b"fLaC", "media", "audio/flac"),
+    (b"OggS", "media", "audio/ogg"),
+    (b"FLV", "media", "video/x-flv"),
+    (b"\x00\x00\x01\xba", "media", "video/mpeg"),
+    (b"\x00\x00\x01\xb3", "media", "video/mpeg"),
+    (b"\x30\x26\xb2\x75", "media", "video/x-ms-asf"),
+]
+HEIF_BRANDS = {
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"heim": "image/heic",
+    b"heis": "image/heic",
+    b"mif1": "image/heif",
+    b"avif": "image/avif",
+}
+RIFF_FORMATS = {
+    b"WEBP": ("animation", "image/webp"),
+    b"AVI ": ("media", "video/x-msvideo"),
+    b"WAVE": ("media", "audio/wav"),
+}
+
 IPTC_TAGS = {
     5: "ObjectName",
     7: "EditStatus",
@@ -107,6 +140,35 @@ def json_or_str(obj: Any) -> str:
         return str(obj)
 
 
+def sniff_type(file_path: Path) -> tuple[str, str]:
+    with open(file_path, "rb") as f:
+        head = f.read(16)
+    return sniff_head(head, file_path.name)
+
+
+def sniff_head(head: bytes, name: str) -> tuple[str, str]:
+    if head[4:8] == b"ftyp":
+        if head[8:12] in HEIF_BRANDS:
+            return "image", HEIF_BRANDS[head[8:12]]
+        elif head[8:12] == b"qt  ":
+            return "media", "video/quicktime"
+        else:
+            return "media", "video/mp4"
+    elif head[:4] == b"RIFF":
+        return RIFF_FORMATS.get(head[8:12], ("media", "application/octet-stream"))
+
+    for signature, kind, media_type in SIGNATURES:
+        if head.startswith(signature):
+            return kind, media_type
+    media_type, _ = mimetypes.guess_type(name)
+    return "unknown", media_type or "application/octet-stream"
+
+
+def sniff(file_path: Path) -> str:
+    kind, _ = sniff_type(file_path)
+    return kind
+
+
 def get_media_info(file_path: Path) -> dict:
     media_info = MediaInfo.parse(file_path)
     assert isinstance(media_info, MediaInfo)
@@ -114,7 +176,21 @@ def get_media_info(file_path: Path) -> dict:
     return {k: json_or_str(v) for k, v in res.items()}
 
 
-def get_mutagen_metadata(file_path: Path) -> dict:
+def get_metadata(file_path: Path) -> tuple[str, dict, dict, dict]:
+    with open(file_path, "rb") as f:
+        kind, _ = sniff_head(f.read(16), file_path.name)
+        image = kind in ["image", "animation", "unknown"]
+        audio = kind in ["media", "unknown"]
+        f.seek(0)
+        mutagen = get_mutagen_metadata(f) if audio else {}
+        f.seek(0)
+        pillow = get_pillow_metadata(f) if image else {}
+        f.seek(0)
+        iptc_info = get_iptc_info(f) if image else {}
+    return kind, mutagen, pillow, iptc_info
+
+
+def get_mutagen_metadata(file_path: Union[Path, BinaryIO]) -> dict:
     try:
         audio: FileType = MutagenFile(file_path)  # type: ignore
     except Exception:
@@ -128,7 +204,7 @@ def get_mutagen_metadata(file_path: Path) -> dict:
         return {k: json_or_str(v) for k, v in items if not k.startswith("_")}
 
 
-def get_pillow_metadata(file_path: Path) -> dict:
+def get_pillow_metadata(file_path: Union[Path, BinaryIO]) -> dict:
     res = {}
     try:
         with Image.open(file_path) as img:
@@ -150,6 +226,6 @@ def get_pillow_metadata(file_path: Path) -> dict:
     return res
 
 
-def get_iptc_info(file_path: Path) -> dict:
+def get_iptc_info(file_path: Union[Path, BinaryIO]) -> dict:
     iptc = IPTCInfo(file_path)._data.items()
     return {x: json_or_str(v) for k, v in iptc if (x := IPTC_TAGS.get(k))}
@@ -0,0 +1,52 @@
+import re
+from typing import Optional
+
+_range_spec = re.compile(r"^(\d*)-(\d*)$")
+
+
+class ByteRange:
+    @staticmethod
+    def parse(
+        value: str, size: int, limit: int = 16
+    ) -> Optional[list[tuple[int, int]]]:
+        unit, sep, range_set = value.partition("=")
+        if not sep or unit.strip().lower() != "bytes":
+            return None
+
+        specs = [x.strip() for x in range_set.split(",") if x.strip()]
+        if not specs:
+            return None
+
+        ranges: list[tuple[int, int]] = []
+        for spec in specs:
+            match = _range_spec.match(spec)
+            if match is None:
+                return None
+            first, last = match.groups()
+            if not first and not last:
+                return None
+            elif not first:
+                suffix = int(last)
+                if suffix > 0 and size > 0:
+                    ranges.append((max(size - suffix, 0), size))
+            elif not last:
+                if int(first) < size:
+                    ranges.append((int(first), size))
+            elif int(last) < int(first):
+                return None
+            elif int(first) < size:
+                ranges.append((int(first), min(int(last) + 1, size)))
+
+        merged: list[tuple[int, int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        if len(merged) > limit:
+            return None
+        return merged
+
+    @staticmethod
+    def content_range(start: int, end: int, size: int) -> str:
+        return f"bytes {start}-{end - 1}/{size}"
@@ -12,6 +12,11 @@ class RFC1123:
     def fromtimestamp(cls, timestamp: Union[int, float]) -> "RFC1123":
         return cls(datetime.fromtimestamp(timestamp))
 
+    @classmethod
+    def fromrfc1123(cls, value: str) -> "RFC1123":
+        dt = datetime.strptime(value.strip(), "%a, %d %b %Y %H:%M:%S GMT")
+        return cls(pytz.utc.localize(dt))
+
     def rfc_1123(self) -> str:
         dt_utc = self.dt.astimezone(pytz.utc)
         return dt_utc.strftime("%a, %d %b %Y %H:%M:%S GMT")
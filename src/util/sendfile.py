@@ -0,0 +1,94 @@
+import asyncio
+import os
+from typing import BinaryIO
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+async def writable(loop: asyncio.AbstractEventLoop, fd: int):
+    future = loop.create_future()
+    loop.add_writer(fd, lambda: future.done() or future.set_result(None))
+    try:
+        await future
+    finally:
+        loop.remove_writer(fd)
+
+
+async def sendfile(
+    transport: asyncio.Transport, file: BinaryIO, offset: int, count: int
+) -> int:
+    loop = asyncio.get_running_loop()
+    fd = os.dup(transport.get_extra_info("socket").fileno())
+    total = 0
+    try:
+        while transport.get_write_buffer_size():
+            await writable(loop, fd)
+        while count > 0:
+            try:
+                sent = os.sendfile(fd, file.fileno(), offset, count)
+            except BlockingIOError:
+                await writable(loop, fd)
+                continue
+            if sent == 0:
+                raise EOFError("file is shorter than count")
+            offset += sent
+            count -= sent
+            total += sent
+    finally:
+        os.close(fd)
+    return total
+
+
+class ZeroCopySend:
+    def __init__(self, app: ASGIApp, cycle):
+        self.app = app
+        self.cycle = cycle
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        async def wrapper(message: Message):
+            if message["type"] == "http.response.zerocopysend":
+                await self.zerocopysend(message, send)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, wrapper)
+
+    async def zerocopysend(self, message: Message, send: Send):
+        cycle = self.cycle
+        more_body = message.get("more_body", False)
+        if cycle.disconnected:
+            return
+        elif not cycle.response_started or cycle.response_complete:
+            raise RuntimeError("Unexpected ASGI message 'http.response.zerocopysend'")
+
+        file: BinaryIO = message["file"]
+        offset = message.get("offset")
+        if offset is None:
+            offset = file.tell()
+        count = message.get("count")
+        if count is None:
+            count = os.fstat(file.fileno()).st_size - offset
+
+        if cycle.scope["method"] == "HEAD" or count == 0:
+            pass
+        elif cycle.chunked_encoding:
+            cycle.transport.write(b"%x\r\n" % count)
+            await self.sendfile(file, offset, count)
+            cycle.transport.write(b"\r\n")
+        elif count > cycle.expected_content_length:
+            raise RuntimeError("Response content longer than Content-Length")
+        else:
+            await self.sendfile(file, offset, count)
+            cycle.expected_content_length -= count
+
+        if not cycle.disconnected:
+            await send(
+                {"type": "http.response.body", "body": b"", "more_body": more_body}
+            )
+
+    async def sendfile(self, file: BinaryIO, offset: int, count: int):
+        try:
+            await sendfile(self.cycle.transport, file, offset, count)
+        except ConnectionError:
+            self.cycle.transport.abort()
+            self.cycle.disconnected = True
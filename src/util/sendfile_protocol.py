@@ -0,0 +1,12 @@
+from uvicorn.protocols.http.httptools_impl import HttpToolsProtocol
+
+from src.util.sendfile import ZeroCopySend
+
+
+class SendfileProtocol(HttpToolsProtocol):
+    def _start_asgi_task(self, cycle, app):
+        if self.transport.get_extra_info("sslcontext") is None:
+            extensions = cycle.scope.setdefault("extensions", {})
+            extensions["http.response.zerocopysend"] = {}
+            app = ZeroCopySend(app, cycle)
+        super()._start_asgi_task(cycle, app)
@@ -1,8 +1,26 @@
 import asyncio
+import errno
+import hashlib
+import io
+import os
+import uuid
 from pathlib import Path
+from typing import AsyncIterable, BinaryIO, Mapping, Optional
 
+import anyio
 from aiofiles import open
+from fastapi import Response
 from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from starlette.types import Receive, Scope, Send
+
+from src.util.range import ByteRange
+
+CRLF = "\r\n"
+
+
+class StreamLimitError(ValueError):
+    pass
 
 
 class Stream:
@@ -25,3 +43,230 @@ class Stream:
 
         except asyncio.CancelledError:
             pass
+
+    @staticmethod
+    async def write_file(
+        file: Path,
+        stream: AsyncIterable[bytes],
+        size: Optional[int] = None,
+        buffer_size: int = 8 * 1024 * 1024,
+        max_size: Optional[int] = None,
+    ) -> tuple[str, int]:
+        sha256 = hashlib.sha256()
+        written = 0
+        pending: Optional[asyncio.Future] = None
+        f = await anyio.to_thread.run_sync(io.open, file, "wb")
+        try:
+            if size:
+                await anyio.to_thread.run_sync(Stream.fallocate, f, size)
+            buffer = bytearray()
+            async for chunk in stream:
+                buffer += chunk
+                if max_size is not None and written + len(buffer) > max_size:
+                    raise StreamLimitError(f"Stream is larger than {max_size} bytes")
+                if len(buffer) >= buffer_size:
+                    if pending is not None:
+                        await pending
+                    pending = asyncio.ensure_future(
+                        anyio.to_thread.run_sync(Stream.flush, f, sha256, buffer)
+                    )
+                    written += len(buffer)
+                    buffer = bytearray()
+            if pending is not None:
+                await pending
+            if buffer:
+                await anyio.to_thread.run_sync(Stream.flush, f, sha256, buffer)
+                written += len(buffer)
+            if size and size != written:
+                await anyio.to_thread.run_sync(f.truncate, written)
+        finally:
+            if pending is not None:
+                await asyncio.wait([pending])
+            await anyio.to_thread.run_sync(f.close)
+        return sha256.hexdigest(), written
+
+    @staticmethod
+    async def allocate_file(file: Path, size: int):
+        f = await anyio.to_thread.run_sync(io.open, file, "wb")
+        try:
+            if size:
+                await anyio.to_thread.run_sync(Stream.fallocate, f, size)
+            await anyio.to_thread.run_sync(f.truncate, size)
+        finally:
+            await anyio.to_thread.run_sync(f.close)
+
+    @staticmethod
+    async def write_range(
+        file: Path,
+        start: int,
+        end: int,
+        stream: AsyncIterable[bytes],
+        *hashes: "hashlib._Hash",
+    ) -> bool:
+        async with open(file, "r+b") as f:
+            await f.seek(start)
+            async for chunk in stream:
+                if start + len(chunk) > end:
+                    return False
+                for sha256 in hashes:
+                    sha256.update(chunk)
+                await f.write(chunk)
+                start += len(chunk)
+        return start == end
+
+    @staticmethod
+    async def available(path: Path) -> int:
+        stat = await anyio.to_thread.run_sync(os.statvfs, path)
+        return stat.f_bavail * stat.f_frsize
+
+    @staticmethod
+    def flush(f: BinaryIO, sha256: "hashlib._Hash", buffer: bytearray):
+        sha256.update(buffer)
+        f.write(buffer)
+
+    @staticmethod
+    def fallocate(f: BinaryIO, size: int):
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+
+
+class SendfileResponse(Response):
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = background
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        extensions = scope.get("extensions") or {}
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+        elif "http.response.zerocopysend" in extensions:
+            await self.send_range(send, extensions, self.start, self.end)
+        elif "http.response.pathsend" in extensions and await self.is_whole_file():
+            await send(
+                {
+                    "type": "http.response.pathsend",
+                    "path": os.path.abspath(self.path),
+                }
+            )
+        else:
+            await self.send_range(send, extensions, self.start, self.end)
+
+        if self.background is not None:
+            await self.background()
+
+    async def send_range(
+        self, send: Send, extensions: dict, start: int, end: int, more_body=False
+    ):
+        if "http.response.zerocopysend" in extensions:
+            async with await anyio.open_file(self.path, "rb") as f:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": f.wrapped,
+                        "offset": start,
+                        "count": end - start,
+                        "more_body": more_body,
+                    }
+                )
+        else:
+            async for chunk in Stream.read_file(self.path, start, end):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send(
+                {"type": "http.response.body", "body": b"", "more_body": more_body}
+            )
+
+    async def is_whole_file(self):
+        stat = await anyio.to_thread.run_sync(os.stat, self.path)
+        return self.start == 0 and self.end == stat.st_size
+
+
+class MultipartSendfileResponse(SendfileResponse):
+    def __init__(
+        self,
+        path: Path,
+        ranges: list[tuple[int, int]],
+        size: int,
+        content_type: str,
+        status_code: int = 206,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        boundary = uuid.uuid4().hex
+        self.parts = [
+            (
+                (
+                    f"{'' if i == 0 else CRLF}--{boundary}{CRLF}"
+                    f"Content-Type: {content_type}{CRLF}"
+                    f"Content-Range: {ByteRange.content_range(start, end, size)}{CRLF}"
+                    f"{CRLF}"
+                ).encode("latin-1"),
+                start,
+                end,
+            )
+            for i, (start, end) in enumerate(ranges)
+        ]
+        self.tail = f"{CRLF}--{boundary}--{CRLF}".encode("latin-1")
+        length = len(self.tail)
+        for part, start, end in self.parts:
+            length += len(part) + end - start
+        super().__init__(
+            path,
+            ranges[0][0],
+            ranges[-1][1],
+            status_code=status_code,
+            headers={
+                **(headers or {}),
+                "Content-Type": f"multipart/byteranges; boundary={boundary}",
+                "Content-Length": str(length),
+            },
+            background=background,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        extensions = scope.get("extensions") or {}
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            for part, start, end in self.parts:
+                await send(
+                    {"type": "http.response.body", "body": part, "more_body": True}
+                )
+                await self.send_range(send, extensions, start, end, more_body=True)
+            await send({"type": "http.response.body", "body": self.tail})
+
+        if self.background is not None:
+            await self.background()
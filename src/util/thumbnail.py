@@ -0,0 +1,54 @@
+import os
+import re
+from pathlib import Path
+
+from PIL import Image, ImageOps
+from pillow_heif import register_heif_opener
+
+register_heif_opener()
+
+THUMBNAIL_SIZES = [128, 256, 512, 1024]
+
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+THUMBNAIL_PATTERN = re.compile(r"^thumbnail_(\d+)\.(webp|jpeg)$")
+
+
+def bucket(size: int) -> int:
+    for x in THUMBNAIL_SIZES:
+        if size <= x:
+            return x
+    return THUMBNAIL_SIZES[-1]
+
+
+def make_thumbnail(src: Path, dst: Path, size: int, format: str) -> int:
+    temp = dst.with_name(f".{dst.name}.tmp")
+    with Image.open(src) as img:
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if format == "jpeg" and img.mode != "RGB":
+            img = img.convert("RGB")
+        elif img.mode not in ["RGB", "RGBA"]:
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.save(temp, THUMBNAIL_FORMATS[format][0], quality=80)
+    os.replace(temp, dst)
+    return dst.stat().st_size
+
+
+def scan_thumbnails(metadata: Path) -> list[tuple[Path, int]]:
+    res: list[tuple[Path, int, float]] = []
+    if not metadata.is_dir():
+        return []
+    for blob in os.scandir(metadata):
+        if not blob.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(blob.path):
+            if THUMBNAIL_PATTERN.match(entry.name):
+                stat = entry.stat()
+                res.append((Path(entry.path), stat.st_size, stat.st_atime))
+    res.sort(key=lambda x: x[2])
+    return [(x, size) for x, size, _ in res]
@@ -1,16 +1,55 @@
 import xml.etree.ElementTree as ET
-from typing import Union
+from typing import AsyncGenerator, AsyncIterable, Optional, Union
+
+from src.models.propfind import PropFindModel
 
 
 def set_namespaces(namespaces: dict):
     return {f"xmlns:{k}": v for k, v in namespaces.items()}
 
 
-def to_webdav(data) -> bytes:
+def from_propfind(body: bytes) -> PropFindModel:
+    if not body.strip():
+        return PropFindModel()
+
+    propfind = ET.fromstring(body)
+    if propfind.find("{DAV:}propname") is not None:
+        return PropFindModel(allprop=False, propname=True)
+
+    prop = propfind.find("{DAV:}prop")
+    if prop is not None:
+        names = [x.tag.removeprefix("{DAV:}") for x in prop]
+        return PropFindModel(allprop=False, prop=names)
+
+    return PropFindModel()
+
+
+def from_lockinfo(body: bytes) -> Optional[tuple[str, Optional[str]]]:
+    if not body.strip():
+        return None
+
+    lockinfo = ET.fromstring(body)
+    if lockinfo.tag != "{DAV:}lockinfo":
+        raise ET.ParseError("lockinfo is required")
+
+    scope = "exclusive"
+    if lockinfo.find("{DAV:}lockscope/{DAV:}shared") is not None:
+        scope = "shared"
+
+    owner = lockinfo.find("{DAV:}owner")
+    if owner is None:
+        return scope, None
+    href = owner.find("{DAV:}href")
+    if href is not None:
+        return scope, (href.text or "").strip()
+    return scope, "".join(owner.itertext()).strip() or None
+
+
+def to_webdav(data, root: str = "multistatus") -> bytes:
     namespaces = {"d": "DAV:"}
 
     multistatus = ET.Element(
-        "d:multistatus",
+        f"d:{root}",
         **set_namespaces(namespaces),
     )
     to_webdav_child(multistatus, data)
@@ -21,17 +60,60 @@ def to_webdav(data) -> bytes:
     )
 
 
+async def to_webdav_stream(
+    data: AsyncIterable[dict], buffer_size: int = 64 * 1024
+) -> AsyncGenerator[bytes, None]:
+    namespaces = {"d": "DAV:"}
+    end = b"</d:multistatus>"
+
+    multistatus = ET.Element(
+        "d:multistatus",
+        **set_namespaces(namespaces),
+    )
+    started = False
+    buffer = bytearray()
+    async for item in data:
+        to_webdav_child(multistatus, item)
+        if not len(multistatus):
+            continue
+        elif started:
+            for child in multistatus:
+                buffer += ET.tostring(child, encoding="utf-8")
+        else:
+            started = True
+            buffer += ET.tostring(
+                multistatus,
+                encoding="utf-8",
+                xml_declaration=True,
+            ).removesuffix(end)
+        del multistatus[:]
+
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if started:
+        yield bytes(buffer + end)
+    else:
+        yield ET.tostring(
+            multistatus,
+            encoding="utf-8",
+            xml_declaration=True,
+        )
+
+
 def to_webdav_child(parent: ET.Element, data: Union[dict, list]):
     if isinstance(data, list):
         for item in data:
             to_webdav_child(parent, item)
     elif isinstance(data, dict):
         for key, value in data.items():
+            tag = key if key.startswith("{") else f"d:{key}"
             if isinstance(value, str):
-                ET.SubElement(parent, f"d:{key}").text = value
+                ET.SubElement(parent, tag).text = value
             elif isinstance(value, int):
-                ET.SubElement(parent, f"d:{key}").text = str(value)
+                ET.SubElement(parent, tag).text = str(value)
             elif isinstance(value, float):
-                ET.SubElement(parent, f"d:{key}").text = str(value)
+                ET.SubElement(parent, tag).text = str(value)
             else:
-                to_webdav_child(ET.SubElement(parent, f"d:{key}"), value)
+                to_webdav_child(ET.SubElement(parent, tag), value)
@@ -0,0 +1,163 @@
+import struct
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+from src.util.stream import Stream
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FILECOUNT_LIMIT = 0xFFFF
+ZIP_FLAGS = 0x08 | 0x800
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+DATA_DESCRIPTOR = struct.Struct("<IIII")
+DATA_DESCRIPTOR64 = struct.Struct("<IIQQ")
+END_RECORD = struct.Struct("<IHHHHIIH")
+END_RECORD64 = struct.Struct("<IQHHIIQQQQ")
+END_LOCATOR64 = struct.Struct("<IIQI")
+
+
+class ZipStream:
+    def __init__(self, members: list[tuple[str, Optional[Path], int, datetime]]):
+        self.members = []
+        offset = 0
+        for name, path, size, date_time in members:
+            zip64 = size >= ZIP64_LIMIT
+            member = (name.encode(), path, size, self.dos(date_time), offset, zip64)
+            self.members.append(member)
+            offset += len(self.local_header(member)) + size
+            offset += (DATA_DESCRIPTOR64 if zip64 else DATA_DESCRIPTOR).size
+        self.central_offset = offset
+        self.central_size = sum(len(self.central_header(x, 0)) for x in self.members)
+        self.length = offset + self.central_size + len(self.end_record())
+
+    @staticmethod
+    def dos(date_time: datetime) -> tuple[int, int]:
+        if date_time.year < 1980:
+            date_time = datetime(1980, 1, 1)
+        time = date_time.hour << 11 | date_time.minute << 5 | date_time.second // 2
+        date = (date_time.year - 1980) << 9 | date_time.month << 5 | date_time.day
+        return time, date
+
+    @staticmethod
+    def local_header(member: tuple) -> bytes:
+        name, _, _, (time, date), _, zip64 = member
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, 0, 0)
+            size = ZIP64_LIMIT
+        else:
+            extra = b""
+            size = 0
+        header = LOCAL_HEADER.pack(
+            0x04034B50,
+            45 if zip64 else 20,
+            ZIP_FLAGS,
+            0,
+            time,
+            date,
+            0,
+            size,
+            size,
+            len(name),
+            len(extra),
+        )
+        return header + name + extra
+
+    @staticmethod
+    def data_descriptor(member: tuple, crc: int) -> bytes:
+        _, _, size, _, _, zip64 = member
+        if zip64:
+            return DATA_DESCRIPTOR64.pack(0x08074B50, crc, size, size)
+        return DATA_DESCRIPTOR.pack(0x08074B50, crc, size, size)
+
+    @staticmethod
+    def central_header(member: tuple, crc: int) -> bytes:
+        name, path, size, (time, date), offset, _ = member
+        extra = b""
+        if size >= ZIP64_LIMIT:
+            extra += struct.pack("<QQ", size, size)
+        if offset >= ZIP64_LIMIT:
+            extra += struct.pack("<Q", offset)
+        if extra:
+            extra = struct.pack("<HH", 1, len(extra)) + extra
+        if path is None:
+            attr = 0o40755 << 16 | 0x10
+        else:
+            attr = 0o100644 << 16
+        header = CENTRAL_HEADER.pack(
+            0x02014B50,
+            3 << 8 | 45,
+            45 if extra else 20,
+            ZIP_FLAGS,
+            0,
+            time,
+            date,
+            crc,
+            min(size, ZIP64_LIMIT),
+            min(size, ZIP64_LIMIT),
+            len(name),
+            len(extra),
+            0,
+            0,
+            0,
+            attr,
+            min(offset, ZIP64_LIMIT),
+        )
+        return header + name + extra
+
+    def end_record(self) -> bytes:
+        count = len(self.members)
+        res = b""
+        if (
+            count >= ZIP_FILECOUNT_LIMIT
+            or self.central_size >= ZIP64_LIMIT
+            or self.central_offset >= ZIP64_LIMIT
+        ):
+            end64 = self.central_offset + self.central_size
+            res += END_RECORD64.pack(
+                0x06064B50,
+                END_RECORD64.size - 12,
+                3 << 8 | 45,
+                45,
+                0,
+                0,
+                count,
+                count,
+                self.central_size,
+                self.central_offset,
+            )
+            res += END_LOCATOR64.pack(0x07064B50, 0, end64, 1)
+        res += END_RECORD.pack(
+            0x06054B50,
+            0,
+            0,
+            min(count, ZIP_FILECOUNT_LIMIT),
+            min(count, ZIP_FILECOUNT_LIMIT),
+            min(self.central_size, ZIP64_LIMIT),
+            min(self.central_offset, ZIP64_LIMIT),
+            0,
+        )
+        return res
+
+    async def generate(self) -> AsyncGenerator[bytes, None]:
+        crcs = []
+        for member in self.members:
+            _, path, size, _, _, _ = member
+            yield self.local_header(member)
+            crc = 0
+            read = 0
+            if path is not None:
+                async for chunk in Stream.read_file(path, 0, size):
+                    crc = zlib.crc32(chunk, crc)
+                    read += len(chunk)
+                    yield chunk
+            if read != size:
+                raise OSError(f"Size mismatch: {path}")
+            yield self.data_descriptor(member, crc)
+            crcs.append(crc)
+
+        for member, crc in zip(self.members, crcs):
+            yield self.central_header(member, crc)
+        yield self.end_record()
@@ -0,0 +1,144 @@
+import asyncio
+import random
+import sys
+import time
+from os import environ
+from pathlib import Path
+
+import httpx
+import pytest
+import pytest_asyncio
+from aiofiles import os
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import src.util.aioshutils as shutil
+from src.depends.logging import LoggingDepends
+from src.depends.sql import SQLDepends
+from src.models.environ import Environ
+from src.models.slow_task import SlowTaskORM
+from src.util.file import FileResolver
+
+FileResolver.set_temp()
+
+WORKERS = 3
+
+
+@pytest_asyncio.fixture(scope="module")
+async def client():
+    await LoggingDepends.init(path=Path("logs/test.log"))
+    await shutil.rmtree(FileResolver.base_path, ignore_errors=True)
+    await os.makedirs(FileResolver.base_path, exist_ok=True)
+    await SQLDepends.test(drop_all=True)
+    await SQLDepends.stop()
+
+    port = random.randint(8000, 9000)
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "main.py",
+        env={
+            **environ,
+            "TESTING": "true",
+            "PORT": str(port),
+            "WORKERS": str(WORKERS),
+            "METADATA_DEFERRED": "true",
+        },
+    )
+
+    base_url = f"http://localhost:{port}"
+    deadline = time.monotonic() + 60
+    while True:
+        assert process.returncode is None, "server exited during startup"
+        if time.monotonic() > deadline:
+            process.kill()
+            await process.wait()
+            pytest.fail("server did not start")
+        try:
+            async with httpx.AsyncClient(base_url=base_url) as ac:
+                await ac.get("/stats")
+            break
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as ac:
+        yield ac
+    process.terminate()
+    await process.wait()
+
+
+@pytest.mark.asyncio
+async def test_cluster_leader(client: httpx.AsyncClient):
+    stats = [(await client.get("/stats")).json()["cluster"] for _ in range(30)]
+    assert all(x["enabled"] for x in stats)
+    assert len({x["pid"] for x in stats if x["leader"]}) <= 1
+
+
+@pytest.mark.asyncio
+async def test_cluster_upload(client: httpx.AsyncClient):
+    res = await client.request("MKCOL", "/webdav/cluster_upload")
+    assert res.status_code == 200
+
+    tasks = [
+        client.put(f"/webdav/cluster_upload/{i}.txt", content=str(i).encode())
+        for i in range(30)
+    ]
+    res = await asyncio.gather(*tasks)
+    assert all(x.status_code == 201 for x in res)
+
+    for _ in range(WORKERS * 2):
+        res = await client.request(
+            "PROPFIND", "/webdav/cluster_upload", headers={"Depth": "1"}
+        )
+        assert res.text.count("<d:response>") == 31
+
+
+@pytest.mark.asyncio
+async def test_cluster_overwrite(client: httpx.AsyncClient):
+    tasks = [
+        client.put("/webdav/cluster_overwrite.txt", content=str(i).encode())
+        for i in range(10)
+    ]
+    res = await asyncio.gather(*tasks)
+    assert sorted(x.status_code for x in res) == [201] + [409] * 9
+
+    created = [i for i, x in enumerate(res) if x.status_code == 201]
+    res = await client.get("/webdav/cluster_overwrite.txt")
+    assert res.content == str(created[0]).encode()
+
+
+@pytest.mark.asyncio
+async def test_cluster_invalidate(client: httpx.AsyncClient):
+    res = await client.put("/webdav/cluster_invalidate.txt", content=b"data")
+    assert res.status_code == 201
+    for _ in range(WORKERS * 4):
+        res = await client.get("/webdav/cluster_invalidate.txt")
+        assert res.status_code == 200
+
+    res = await client.delete("/webdav/cluster_invalidate.txt")
+    assert res.status_code < 300
+    for _ in range(WORKERS * 4):
+        res = await client.get("/webdav/cluster_invalidate.txt")
+        assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cluster_task_queue(client: httpx.AsyncClient):
+    engine = create_async_engine(f"{Environ().DB_URL}_test")
+    task_state = (
+        select(func.count())
+        .select_from(SlowTaskORM)
+        .where(SlowTaskORM.type == "metadata_extract")
+    )
+    for i in range(WORKERS * 2):
+        data = f"cluster task queue {i}".encode()
+        res = await client.put(f"/webdav/cluster_task_queue_{i}.txt", content=data)
+        assert res.status_code == 201
+        for _ in range(100):
+            async with engine.connect() as conn:
+                if not (await conn.execute(task_state)).scalar():
+                    break
+            await asyncio.sleep(0.01)
+        else:
+            pytest.fail("metadata_extract was not processed")
+    await engine.dispose()
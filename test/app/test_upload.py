@@ -61,3 +61,34 @@ async def test_post_upload(client: AsyncClient):
         f"/api/upload/test_upload{assets.suffix}",
         headers={"Destination": f"/api/upload/test_upload2{assets.suffix}"},
     )
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload(client: AsyncClient):
+    data = random.randbytes(100_000)
+    res = await client.post(
+        "/api/resumable/create/test_resumable.bin",
+        params={"size": len(data), "chunk_size": 30_000},
+    )
+    assert res.status_code == 200
+    upload_id = res.json()["upload"]["id"]
+
+    for number in [3, 1, 2]:
+        chunk = data[number * 30_000 : (number + 1) * 30_000]
+        res = await client.put(f"/api/resumable/{upload_id}/{number}", content=chunk)
+        assert res.status_code == 200
+
+    res = await client.post(f"/api/resumable/{upload_id}/finalize")
+    assert res.status_code == 409
+
+    res = await client.put(f"/api/resumable/{upload_id}/0", content=data[:30_000])
+    assert res.json()["received"] == [0, 1, 2, 3]
+
+    res = await client.post(f"/api/resumable/{upload_id}/finalize")
+    assert res.status_code == 201
+
+    res = await client.get("/api/download/test_resumable.bin")
+    assert res.content == data
+
+    res = await client.put(f"/api/resumable/{upload_id}/0", content=data[:30_000])
+    assert res.status_code == 404
@@ -5,6 +5,7 @@ import urllib.parse
 from os import environ
 from pathlib import Path
 
+import httpx
 import pytest
 import pytest_asyncio
 from aiofiles import os
@@ -90,3 +91,39 @@ async def test_webdav_upload(client):
     assets = Path(filename)
     webdav = Client(options)
     webdav.upload(assets.name, assets.as_posix())
+
+
+@pytest.mark.asyncio
+async def test_webdav_lock(client):
+    url = client("/api/webdav/test_lock.txt")
+    lockinfo = (
+        b'<?xml version="1.0" encoding="utf-8"?>'
+        b'<d:lockinfo xmlns:d="DAV:">'
+        b"<d:lockscope><d:exclusive/></d:lockscope>"
+        b"<d:locktype><d:write/></d:locktype>"
+        b"</d:lockinfo>"
+    )
+    async with httpx.AsyncClient() as http:
+        res = await http.request("LOCK", url, content=lockinfo)
+        assert res.status_code == 201
+        token = res.headers["Lock-Token"]
+
+        res = await http.get(url)
+        assert res.status_code == 200
+        assert res.content == b""
+
+        res = await http.delete(url)
+        assert res.status_code == 423
+
+        res = await http.delete(url, headers={"If": f"({token})"})
+        assert res.status_code == 200
+
+        res = await http.request("LOCK", url, content=lockinfo)
+        assert res.status_code == 201
+        token = res.headers["Lock-Token"]
+
+        res = await http.request("UNLOCK", url, headers={"Lock-Token": token})
+        assert res.status_code == 204
+
+        res = await http.delete(url)
+        assert res.status_code == 200
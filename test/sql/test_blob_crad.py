@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.models.blob import BlobORM
+from src.models.file import FileORM
+from src.sql.blob_crad import BlobCRAD
+from src.sql.sql import SQLBase
+
+
+def files(metadata_id: uuid.UUID, count: int):
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "metadata_id": str(metadata_id),
+            "directory": False,
+            "filename": f"data/{metadata_id}/{i}",
+            "pearent": f"data/{metadata_id}",
+            "created_at": datetime.now(),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_blob_crad():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLBase.metadata.create_all)
+
+    a, b = uuid.uuid4(), uuid.uuid4()
+    async with AsyncSession(engine) as session:
+        assert await BlobCRAD(session).add("a" * 64, a) == str(a)
+        assert await BlobCRAD(session).add("a" * 64, b) == str(a)
+        blobs = await BlobCRAD(session).add_all([("a" * 64, b, 2), ("b" * 64, b, 1)])
+        assert blobs == {"a" * 64: str(a), "b" * 64: str(b)}
+        blob_state = select(BlobORM.sha256, BlobORM.refcount).order_by(BlobORM.sha256)
+        assert (await session.execute(blob_state)).all() == [
+            ("a" * 64, 4),
+            ("b" * 64, 1),
+        ]
+
+        await session.execute(insert(FileORM), files(a, 4) + files(b, 1))
+        subtree = select(FileORM.id).where(FileORM.pearent == f"data/{a}")
+        assert await BlobCRAD(session).release(subtree.limit(3)) == []
+        assert (await session.execute(blob_state)).all() == [
+            ("a" * 64, 1),
+            ("b" * 64, 1),
+        ]
+        assert await BlobCRAD(session).acquire("a" * 64) == str(a)
+
+        subtree = select(FileORM.id).where(FileORM.pearent == f"data/{b}")
+        assert await BlobCRAD(session).release(subtree) == [str(b)]
+        assert (await session.execute(blob_state)).all() == [("a" * 64, 2)]
+    await engine.dispose()
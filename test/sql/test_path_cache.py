@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from src.sql.path_cache import PathCache
+
+
+def test_path_cache():
+    PathCache.init(2)
+    PathCache.set(Path("data/a"), None, PathCache.version)
+    PathCache.set(Path("data/a/b"), None, PathCache.version)
+    assert PathCache.get(Path("data/a")) == (True, None)
+    assert PathCache.get(Path("data/c")) == (False, None)
+
+    PathCache.set(Path("data/c"), None, PathCache.version)
+    assert PathCache.get(Path("data/a/b")) == (False, None)
+    assert PathCache.get(Path("data/a")) == (True, None)
+
+    version = PathCache.version
+    PathCache.invalidate(Path("data/a"))
+    PathCache.set(Path("data/a"), None, version)
+    assert PathCache.get(Path("data/a")) == (False, None)
+    assert PathCache.get(Path("data/c")) == (True, None)
+
+    PathCache.set(Path("data/ab"), None, PathCache.version)
+    PathCache.invalidate(Path("data/a"))
+    assert PathCache.get(Path("data/ab")) == (True, None)
+    assert PathCache.stats()["hits"] == 4
+    assert PathCache.stats()["misses"] == 3
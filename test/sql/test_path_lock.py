@@ -0,0 +1,176 @@
+import asyncio
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+
+from src.sql.path_lock import PathLock
+from src.util.flock import lock, offset, open_lock
+
+
+def hold_lock(path: Path, start: int, ready, done):
+    file = open_lock(path)
+    lock(file, start, "X")
+    ready.set()
+    done.wait()
+    os.close(file)
+
+
+def hold_path_lock(path: Path, targets: list[tuple[Path, str]], ready, done):
+    file = open_lock(path)
+    PathLock.init(file=file)
+    if PathLock.acquire(PathLock.plan(targets)):
+        ready.set()
+    done.wait()
+    os.close(file)
+
+
+def try_lock(path: Path, start: int, mode: str) -> bool:
+    file = open_lock(path)
+    try:
+        return lock(file, start, mode)
+    finally:
+        os.close(file)
+
+
+def test_path_lock():
+    PathLock.init()
+    a = PathLock.plan([(Path("data/a/x.txt"), "X")])
+    b = PathLock.plan([(Path("data/a/y.txt"), "X")])
+    assert PathLock.acquire(a)
+    assert PathLock.acquire(b)
+
+    directory = PathLock.plan([(Path("data/a"), "X")])
+    assert not PathLock.acquire(directory)
+    assert not PathLock.acquire(PathLock.plan([(Path("data/a/x.txt"), "S")]))
+
+    PathLock.release(a)
+    PathLock.release(b)
+    assert PathLock.acquire(directory)
+    assert not PathLock.acquire(PathLock.plan([(Path("data/a/b/c"), "X")]))
+    PathLock.release(directory)
+
+    src = PathLock.plan([(Path("data/b"), "X"), (Path("data/a"), "S")])
+    assert src == {
+        ".": "IX",
+        "data": "IX",
+        "data/a": "S",
+        "data/b": "X",
+    }
+    assert PathLock.acquire(src)
+    assert PathLock.acquire(
+        PathLock.plan([(Path("data/c"), "X"), (Path("data/a"), "S")])
+    )
+    assert not PathLock.acquire(PathLock.plan([(Path("data/a/z"), "X")]))
+
+    move = PathLock.plan([(Path("data/d"), "X"), (Path("data/d/e"), "X")])
+    assert move["data/d"] == "X"
+    assert PathLock.stats()["conflicts"] == 4
+
+
+@pytest.mark.asyncio
+async def test_path_lock_wait():
+    PathLock.init(timeout=1.0)
+    directory = PathLock.plan([(Path("data/a"), "X")])
+    file = PathLock.plan([(Path("data/a/x.txt"), "X")])
+    other = PathLock.plan([(Path("data/b"), "X")])
+    assert await PathLock.wait(file)
+    assert not await PathLock.wait(directory, timeout=0)
+
+    waiter = asyncio.ensure_future(PathLock.wait(directory))
+    await asyncio.sleep(0)
+    assert PathLock.stats()["waiting"] == 1
+    assert not PathLock.acquire(PathLock.plan([(Path("data/a/y.txt"), "X")]))
+    assert PathLock.acquire(other)
+
+    PathLock.release(file)
+    assert await waiter
+    assert PathLock.held["data/a"] == {"X": 1}
+    assert not await PathLock.wait(file, timeout=0.01)
+
+    cancelled = asyncio.ensure_future(PathLock.wait(file))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    PathLock.release(directory)
+    PathLock.release(other)
+    assert PathLock.held == {}
+
+    stats = PathLock.stats()
+    assert stats["waiting"] == 0
+    assert stats["max_waiting"] == 1
+    assert stats["timeouts"] == 2
+    assert stats["wait_seconds"]["+Inf"] == 3
+
+
+def test_path_lock_release(tmp_path: Path):
+    path = tmp_path.joinpath("path_lock.lock")
+    file = open_lock(path)
+    PathLock.init(file=file)
+    shared = PathLock.plan([(Path("data/x"), "S")])
+    granted = PathLock.plan([(Path("data/a"), "X")])
+    assert PathLock.acquire(shared)
+    PathLock.grant(granted)
+
+    context = multiprocessing.get_context("spawn")
+    ready, done = context.Event(), context.Event()
+    process = context.Process(
+        target=hold_lock, args=(path, offset("data") + 1, ready, done)
+    )
+    process.start()
+    try:
+        assert ready.wait(10)
+        PathLock.release(shared)
+        with context.Pool(1) as pool:
+            assert pool.apply(try_lock, (path, offset("data/x"), "X"))
+        assert "data/x" not in PathLock.applied
+        assert not PathLock.sync(granted)
+    finally:
+        done.set()
+        process.join()
+
+    assert PathLock.sync(granted)
+    PathLock.release(granted)
+    assert PathLock.applied == {}
+    os.close(file)
+    PathLock.init()
+
+
+def test_path_lock_shared(tmp_path: Path):
+    path = tmp_path.joinpath("path_lock.lock")
+    file = open_lock(path)
+    PathLock.init(file=file)
+    shared = PathLock.plan([(Path("data/x"), "S")])
+    exclusive = PathLock.plan([(Path("data/x/a"), "X")])
+    sibling = PathLock.plan([(Path("data/y"), "X")])
+
+    context = multiprocessing.get_context("spawn")
+    for targets, plan in [
+        ([(Path("data/x"), "S")], exclusive),
+        ([(Path("data/x/b"), "X")], shared),
+    ]:
+        ready, done = context.Event(), context.Event()
+        process = context.Process(
+            target=hold_path_lock, args=(path, targets, ready, done)
+        )
+        process.start()
+        try:
+            assert ready.wait(10)
+            assert not PathLock.acquire(plan)
+            assert PathLock.applied == {}
+            assert PathLock.acquire(sibling)
+            PathLock.release(sibling)
+            if targets[0][1] == "S":
+                assert PathLock.acquire(shared)
+                PathLock.release(shared)
+        finally:
+            done.set()
+            process.join()
+
+        assert PathLock.acquire(plan)
+        PathLock.release(plan)
+        assert PathLock.applied == {}
+    os.close(file)
+    PathLock.init()
@@ -0,0 +1,79 @@
+import hashlib
+import io
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+from src.util.archive import (
+    ArchiveLimitError,
+    extract_archive,
+    list_archive,
+    normalize,
+)
+
+
+def test_normalize():
+    assert normalize("./a//b/") == PurePosixPath("a/b")
+    assert normalize("a\\b") == PurePosixPath("a/b")
+    for name in ["/etc/passwd", "../a", "a/../../b", "."]:
+        with pytest.raises(ValueError):
+            normalize(name)
+
+
+def test_zip(tmp_path: Path):
+    archive = tmp_path.joinpath("a.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("x/y/z.txt", b"hello")
+        zf.writestr("x/empty/", b"")
+    assert list_archive(archive) == [
+        (PurePosixPath("x"), True),
+        (PurePosixPath("x/empty"), True),
+        (PurePosixPath("x/y"), True),
+        (PurePosixPath("x/y/z.txt"), False),
+    ]
+    dst = tmp_path.joinpath("dst")
+    dst.mkdir()
+    entries = extract_archive(archive, dst)
+    assert entries[PurePosixPath("x/y/z.txt")] == (
+        5,
+        hashlib.sha256(b"hello").hexdigest(),
+        "text/plain",
+    )
+    assert dst.joinpath("x/y/z.txt").read_bytes() == b"hello"
+    assert dst.joinpath("x/empty").is_dir()
+
+
+def test_tar(tmp_path: Path):
+    archive = tmp_path.joinpath("a.tar.gz")
+    with tarfile.open(archive, "w:gz") as tf:
+        for name in ["a.txt", "a.txt/b.txt"]:
+            info = tarfile.TarInfo(name)
+            info.size = 1
+            tf.addfile(info, io.BytesIO(b"a"))
+    with pytest.raises(ValueError):
+        list_archive(archive)
+
+
+def test_unsupported(tmp_path: Path):
+    archive = tmp_path.joinpath("a.bin")
+    archive.write_bytes(b"garbage")
+    with pytest.raises(ValueError):
+        list_archive(archive)
+
+
+def test_limit(tmp_path: Path):
+    archive = tmp_path.joinpath("a.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(3):
+            zf.writestr(f"{i}.bin", bytes(1000))
+    assert len(list_archive(archive, max_entries=3, max_size=3000)) == 3
+    with pytest.raises(ArchiveLimitError):
+        list_archive(archive, max_entries=2)
+    with pytest.raises(ArchiveLimitError):
+        list_archive(archive, max_size=2999)
+    dst = tmp_path.joinpath("dst")
+    dst.mkdir()
+    with pytest.raises(ArchiveLimitError):
+        extract_archive(archive, dst, max_size=1500)
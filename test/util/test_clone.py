@@ -0,0 +1,11 @@
+from pathlib import Path
+
+from src.util.clone import clonefile
+
+
+def test_clonefile(tmp_path: Path):
+    src = tmp_path.joinpath("src.bin")
+    dst = tmp_path.joinpath("dst.bin")
+    src.write_bytes(b"0123456789" * 1000)
+    assert clonefile(src, dst) in ["reflink", "hardlink", "copy"]
+    assert dst.read_bytes() == src.read_bytes()
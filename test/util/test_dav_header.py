@@ -0,0 +1,31 @@
+from src.util.dav_header import DAVHeader
+
+
+def test_tokens():
+    value = '</a> (<urn:uuid:1> ["etag"]) (Not <urn:uuid:2>) (<urn:uuid:3>)'
+    assert DAVHeader.tokens(value) == {"urn:uuid:1", "urn:uuid:3"}
+    assert DAVHeader.tokens(None) == set()
+
+
+def test_lock_token():
+    assert DAVHeader.lock_token("<urn:uuid:1>") == "urn:uuid:1"
+    assert DAVHeader.lock_token(" urn:uuid:1 ") == "urn:uuid:1"
+    assert DAVHeader.lock_token("<>") is None
+    assert DAVHeader.lock_token(None) is None
+
+
+def test_timeout():
+    assert DAVHeader.timeout(None, 600, 3600) == 600
+    assert DAVHeader.timeout("Second-120", 600, 3600) == 120
+    assert DAVHeader.timeout("Second-99999", 600, 3600) == 3600
+    assert DAVHeader.timeout("Infinite, Second-60", 600, 3600) == 3600
+    assert DAVHeader.timeout("Second-x, Second-60", 600, 3600) == 60
+    assert DAVHeader.timeout("invalid", 600, 3600) == 600
+
+
+def test_depth():
+    assert DAVHeader.depth(None) == "infinity"
+    assert DAVHeader.depth("Infinity") == "infinity"
+    assert DAVHeader.depth("0") == "0"
+    assert DAVHeader.depth(" 1 ") == "1"
+    assert DAVHeader.depth("2") is None
@@ -0,0 +1,10 @@
+from src.util.etag import ETag
+
+
+def test_etag():
+    assert ETag.match('"a"', '"a"')
+    assert ETag.match('"b", W/"a"', '"a"')
+    assert ETag.match('"a"', 'W/"a"')
+    assert ETag.match("*", '"a"')
+    assert not ETag.match('"b"', '"a"')
+    assert not ETag.match('"ab"', '"a"')
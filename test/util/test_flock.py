@@ -0,0 +1,32 @@
+import multiprocessing
+import os
+from pathlib import Path
+
+from src.util.flock import lock, offset, open_lock
+
+
+def try_lock(path: Path, start: int, mode: str) -> bool:
+    file = open_lock(path)
+    try:
+        return lock(file, start, mode)
+    finally:
+        os.close(file)
+
+
+def test_flock(tmp_path: Path):
+    path = tmp_path.joinpath("test.lock")
+    file = open_lock(path)
+    assert offset("data/a") == offset("data/a")
+    assert offset("data/a") % 3 == 0
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        assert lock(file, 0, "S")
+        assert pool.apply(try_lock, (path, 0, "S"))
+        assert not pool.apply(try_lock, (path, 0, "X"))
+        assert pool.apply(try_lock, (path, 1, "X"))
+
+        assert lock(file, 0, "X")
+        assert not pool.apply(try_lock, (path, 0, "S"))
+        assert lock(file, 0, None)
+        assert pool.apply(try_lock, (path, 0, "X"))
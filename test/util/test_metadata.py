@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from src.util.metadata import sniff, sniff_type
+
+
+def test_sniff(tmp_path: Path):
+    heads = {
+        "a.jpg": (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image"),
+        "a.png": (b"\x89PNG\r\n\x1a\n\x00\x00", "image"),
+        "a.heic": (b"\x00\x00\x00\x18ftypheic", "image"),
+        "a.gif": (b"GIF89a\x01\x00", "animation"),
+        "a.webp": (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "animation"),
+        "a.mp4": (b"\x00\x00\x00\x20ftypisom", "media"),
+        "a.mkv": (b"\x1a\x45\xdf\xa3\x00\x00", "media"),
+        "a.mp3": (b"ID3\x04\x00\x00", "media"),
+        "a.txt": (b"hello world", "unknown"),
+        "a.bin": (b"", "unknown"),
+    }
+    for name, (head, kind) in heads.items():
+        path = tmp_path.joinpath(name)
+        path.write_bytes(head)
+        assert sniff(path) == kind
+
+
+def test_sniff_type(tmp_path: Path):
+    heads = {
+        "a.jpg": (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+        "a.heic": (b"\x00\x00\x00\x18ftypheic", "image/heic"),
+        "a.mov": (b"\x00\x00\x00\x14ftypqt  ", "video/quicktime"),
+        "a.wav": (b"RIFF\x00\x00\x00\x00WAVEfmt ", "audio/wav"),
+        "a.txt": (b"hello world", "text/plain"),
+        "a": (b"hello world", "application/octet-stream"),
+    }
+    for name, (head, media_type) in heads.items():
+        path = tmp_path.joinpath(name)
+        path.write_bytes(head)
+        assert sniff_type(path)[1] == media_type
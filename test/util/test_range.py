@@ -0,0 +1,55 @@
+from src.util.range import ByteRange
+
+
+def test_range():
+    assert ByteRange.parse("bytes=0-499", 10000) == [(0, 500)]
+    assert ByteRange.parse("bytes=500-999", 10000) == [(500, 1000)]
+    assert ByteRange.parse("bytes=-500", 10000) == [(9500, 10000)]
+    assert ByteRange.parse("bytes=9500-", 10000) == [(9500, 10000)]
+    assert ByteRange.parse("bytes=0-0,-1", 10000) == [(0, 1), (9999, 10000)]
+    assert ByteRange.parse("bytes=500-600, 601-999", 10000) == [(500, 1000)]
+    assert ByteRange.parse("BYTES = 0-99999", 10000) == [(0, 10000)]
+    assert ByteRange.parse("bytes=-20000", 10000) == [(0, 10000)]
+    assert ByteRange.parse("bytes=0-1,,3-4", 10000) == [(0, 2), (3, 5)]
+
+
+def test_range_merge():
+    assert ByteRange.parse("bytes=0-1,,2-3", 10000) == [(0, 4)]
+    assert ByteRange.parse("bytes=-1,0-0", 10000) == [(0, 1), (9999, 10000)]
+    assert ByteRange.parse("bytes=" + ",".join(["0-"] * 1000), 10000) == [(0, 10000)]
+    assert ByteRange.parse("bytes=100-199,0-149,300-", 10000) == [
+        (0, 200),
+        (300, 10000),
+    ]
+
+
+def test_range_limit():
+    value = "bytes=" + ",".join(f"{i * 2}-{i * 2}" for i in range(16))
+    assert len(ByteRange.parse(value, 10000) or []) == 16
+    value = "bytes=" + ",".join(f"{i * 2}-{i * 2}" for i in range(17))
+    assert ByteRange.parse(value, 10000) is None
+    assert ByteRange.parse(value, 10000, limit=17) is not None
+
+
+def test_range_unsatisfiable():
+    assert ByteRange.parse("bytes=10000-", 10000) == []
+    assert ByteRange.parse("bytes=10000-10001", 10000) == []
+    assert ByteRange.parse("bytes=-0", 10000) == []
+    assert ByteRange.parse("bytes=0-", 0) == []
+    assert ByteRange.parse("bytes=-1", 0) == []
+    assert ByteRange.parse("bytes=10000-,0-0", 10000) == [(0, 1)]
+
+
+def test_range_invalid():
+    assert ByteRange.parse("", 10000) is None
+    assert ByteRange.parse("items=0-1", 10000) is None
+    assert ByteRange.parse("bytes=", 10000) is None
+    assert ByteRange.parse("bytes=-", 10000) is None
+    assert ByteRange.parse("bytes=5-1", 10000) is None
+    assert ByteRange.parse("bytes=a-1", 10000) is None
+    assert ByteRange.parse("bytes=0-1-2", 10000) is None
+    assert ByteRange.parse("bytes=0-1,x", 10000) is None
+
+
+def test_content_range():
+    assert ByteRange.content_range(0, 500, 10000) == "bytes 0-499/10000"
@@ -0,0 +1,12 @@
+from datetime import datetime
+
+import pytz
+
+from src.util.rfc1123 import RFC1123
+
+
+def test_rfc1123():
+    dt = datetime(2024, 1, 2, 3, 4, 5, tzinfo=pytz.utc)
+    value = RFC1123(dt).rfc_1123()
+    assert value == "Tue, 02 Jan 2024 03:04:05 GMT"
+    assert RFC1123.fromrfc1123(value).dt == dt
@@ -0,0 +1,56 @@
+import asyncio
+import random
+from pathlib import Path
+
+import httpx
+import pytest
+import uvicorn
+
+from src.util.stream import MultipartSendfileResponse, SendfileResponse
+
+pytest.importorskip("httptools")
+
+
+@pytest.mark.asyncio
+async def test_sendfile_protocol(tmp_path: Path):
+    from src.util.sendfile_protocol import SendfileProtocol
+
+    data = bytes(range(256)) * 64 * 1024
+    path = tmp_path.joinpath("send.bin")
+    path.write_bytes(data)
+    extensions = []
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        extensions.append(scope.get("extensions") or {})
+        if scope["path"] == "/multipart":
+            ranges = [(0, 10), (1000, 2000)]
+            response = MultipartSendfileResponse(
+                path, ranges, len(data), "application/octet-stream"
+            )
+        else:
+            response = SendfileResponse(
+                path, 100, len(data), headers={"Content-Length": str(len(data) - 100)}
+            )
+        await response(scope, receive, send)
+
+    port = random.randint(9000, 10000)
+    config = uvicorn.Config(
+        app, port=port, http=SendfileProtocol, loop="asyncio", lifespan="off"
+    )
+    server = uvicorn.Server(config)
+    task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://localhost:{port}") as client:
+            for _ in range(3):
+                res = await client.get("/")
+                assert res.content == data[100:]
+            res = await client.get("/multipart")
+            assert data[0:10] in res.content and data[1000:2000] in res.content
+    finally:
+        server.should_exit = True
+        await task
+    assert all("http.response.zerocopysend" in x for x in extensions)
@@ -0,0 +1,80 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from src.util.stream import (
+    MultipartSendfileResponse,
+    SendfileResponse,
+    Stream,
+    StreamLimitError,
+)
+
+
+async def chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.mark.asyncio
+async def test_write_file(tmp_path: Path):
+    data = bytes(range(256)) * 4096
+    path = tmp_path.joinpath("write.bin")
+    for size in [None, len(data), len(data) * 2]:
+        digest, written = await Stream.write_file(
+            path, chunks(data, 1000), size, buffer_size=64 * 1024
+        )
+        assert written == len(data)
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert path.read_bytes() == data
+
+
+@pytest.mark.asyncio
+async def test_write_file_limit(tmp_path: Path):
+    data = bytes(range(256)) * 4096
+    path = tmp_path.joinpath("limit.bin")
+    _, written = await Stream.write_file(path, chunks(data, 1000), max_size=len(data))
+    assert written == len(data)
+    with pytest.raises(StreamLimitError):
+        await Stream.write_file(path, chunks(data, 1000), max_size=len(data) - 1)
+
+
+async def respond(response: SendfileResponse, extensions: dict) -> bytes:
+    scope = {"type": "http", "method": "GET", "extensions": extensions}
+    body = bytearray()
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+        elif message["type"] == "http.response.zerocopysend":
+            message["file"].seek(message["offset"])
+            body.extend(message["file"].read(message["count"]))
+        elif message["type"] == "http.response.pathsend":
+            body.extend(Path(message["path"]).read_bytes())
+
+    await response(scope, None, send)
+    return bytes(body)
+
+
+@pytest.mark.asyncio
+async def test_sendfile_response(tmp_path: Path):
+    data = bytes(range(256)) * 4096
+    path = tmp_path.joinpath("send.bin")
+    path.write_bytes(data)
+    extensions = [
+        {},
+        {"http.response.pathsend": {}},
+        {"http.response.zerocopysend": {}},
+    ]
+    for extension in extensions:
+        response = SendfileResponse(path, 0, len(data))
+        assert await respond(response, extension) == data
+        response = SendfileResponse(path, 100, 5000)
+        assert await respond(response, extension) == data[100:5000]
+
+        response = MultipartSendfileResponse(
+            path, [(0, 10), (500, 600)], len(data), "application/octet-stream"
+        )
+        body = await respond(response, extension)
+        assert len(body) == int(response.headers["Content-Length"])
+        assert data[0:10] in body and data[500:600] in body
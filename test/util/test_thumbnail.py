@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from PIL import Image
+
+from src.util.thumbnail import bucket, make_thumbnail, scan_thumbnails
+
+
+def test_bucket():
+    assert bucket(1) == 128
+    assert bucket(128) == 128
+    assert bucket(129) == 256
+    assert bucket(100000) == 1024
+
+
+def test_make_thumbnail(tmp_path: Path):
+    src = tmp_path.joinpath("src.jpg")
+    Image.new("RGB", (2000, 1000), (255, 0, 0)).save(src, "JPEG")
+    blob = tmp_path.joinpath("blob")
+    blob.mkdir()
+    for format, name in [("webp", "WEBP"), ("jpeg", "JPEG")]:
+        dst = blob.joinpath(f"thumbnail_256.{format}")
+        assert make_thumbnail(src, dst, 256, format) == dst.stat().st_size
+        with Image.open(dst) as img:
+            assert img.format == name
+            assert img.size == (256, 128)
+
+    files = [x.name for x, _ in scan_thumbnails(tmp_path)]
+    assert sorted(files) == ["thumbnail_256.jpeg", "thumbnail_256.webp"]
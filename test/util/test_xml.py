@@ -0,0 +1,91 @@
+import xml.etree.ElementTree as ET
+from xml.etree.ElementTree import ParseError
+
+import pytest
+
+from src.util.xml import from_lockinfo, from_propfind, to_webdav, to_webdav_stream
+
+
+async def iterate(data: list):
+    for item in data:
+        yield item
+
+
+async def join(data: list, buffer_size: int):
+    return b"".join([x async for x in to_webdav_stream(iterate(data), buffer_size)])
+
+
+@pytest.mark.asyncio
+async def test_xml():
+    data = [
+        {
+            "response": {
+                "href": f"/webdav/a&b/{i}.txt",
+                "propstat": {
+                    "prop": {
+                        "getcontentlength": i,
+                        "resourcetype": {"collection": None},
+                        "getetag": "<etag>",
+                    },
+                    "status": "HTTP/1.1 200 OK",
+                },
+            },
+        }
+        for i in range(100)
+    ]
+
+    for buffer_size in [1, 1024, 64 * 1024]:
+        assert await join(data, buffer_size) == to_webdav(data)
+        assert await join(data[:1], buffer_size) == to_webdav(data[:1])
+        assert await join([], buffer_size) == to_webdav([])
+
+
+def test_propfind():
+    props = {"getetag": lambda: "etag", "resourcetype": lambda: {}}
+
+    propfind = from_propfind(b"")
+    assert propfind.select(props) == {"getetag": "etag", "resourcetype": {}}
+
+    propfind = from_propfind(b'<d:propfind xmlns:d="DAV:"><d:allprop/></d:propfind>')
+    assert propfind.select(props) == {"getetag": "etag", "resourcetype": {}}
+
+    propfind = from_propfind(b'<d:propfind xmlns:d="DAV:"><d:propname/></d:propfind>')
+    assert propfind.select(props) == {"getetag": None, "resourcetype": None}
+
+    propfind = from_propfind(
+        b'<d:propfind xmlns:d="DAV:"><d:prop><d:getetag/></d:prop></d:propfind>'
+    )
+    assert propfind.select(props) == {"getetag": "etag"}
+    assert propfind.missing(props) == {}
+
+    propfind = from_propfind(
+        b'<d:propfind xmlns:d="DAV:" xmlns:a="http://apple.com/ns">'
+        b"<d:prop><d:getetag/><d:lockdiscovery/><a:quota/></d:prop></d:propfind>"
+    )
+    missing = propfind.missing(props)
+    assert missing == {"lockdiscovery": None, "{http://apple.com/ns}quota": None}
+
+    data = [{"response": [{"href": "/"}, {"propstat": {"prop": missing}}]}]
+    prop = ET.fromstring(to_webdav(data)).find(".//{DAV:}prop")
+    assert prop is not None
+    assert [x.tag for x in prop] == [
+        "{DAV:}lockdiscovery",
+        "{http://apple.com/ns}quota",
+    ]
+
+
+def test_lockinfo():
+    assert from_lockinfo(b"") is None
+
+    lockinfo = (
+        b'<d:lockinfo xmlns:d="DAV:"><d:lockscope><d:shared/></d:lockscope>'
+        b"<d:locktype><d:write/></d:locktype>"
+        b"<d:owner><d:href>mailto:a@example.com</d:href></d:owner></d:lockinfo>"
+    )
+    assert from_lockinfo(lockinfo) == ("shared", "mailto:a@example.com")
+
+    lockinfo = b'<d:lockinfo xmlns:d="DAV:"><d:lockscope><d:exclusive/></d:lockscope></d:lockinfo>'
+    assert from_lockinfo(lockinfo) == ("exclusive", None)
+
+    with pytest.raises(ParseError):
+        from_lockinfo(b'<d:propfind xmlns:d="DAV:"/>')
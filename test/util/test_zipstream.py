@@ -0,0 +1,35 @@
+import io
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from src.util.zipstream import ZipStream
+
+
+@pytest.mark.asyncio
+async def test_zipstream(tmp_path: Path):
+    data = bytes(range(256)) * 1000
+    path = tmp_path.joinpath("a.bin")
+    path.write_bytes(data)
+    empty = tmp_path.joinpath("empty.txt")
+    empty.write_bytes(b"")
+    now = datetime(2024, 5, 6, 7, 8, 10)
+    stream = ZipStream(
+        [
+            ("dir/", None, 0, now),
+            ("dir/a.bin", path, len(data), now),
+            ("dir/空.txt", empty, 0, datetime(1970, 1, 1)),
+        ]
+    )
+    content = b"".join([x async for x in stream.generate()])
+    assert len(content) == stream.length
+
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["dir/", "dir/a.bin", "dir/空.txt"]
+        assert zf.getinfo("dir/").is_dir()
+        assert zf.getinfo("dir/a.bin").date_time == (2024, 5, 6, 7, 8, 10)
+        assert zf.read("dir/a.bin") == data
+        assert zf.read("dir/空.txt") == b""